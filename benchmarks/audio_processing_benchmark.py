@@ -14,19 +14,28 @@ import json
 import base64
 import statistics
 import argparse
+import io
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
-from glob import glob
 
-import requests
+import httpx
+import librosa
 import numpy as np
 import soundfile as sf
 from tqdm import tqdm
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Adjust path to import MCP server modules for direct testing
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from mcp_audio_server.analysis.chord_detection import BasicChordDetector
-from mcp_audio_server.analysis.key_detection import BasicKeyDetector
+from mcp_audio_server.analysis.key_detection import BasicKeyDetector, KEY_ANALYSIS_SR
 from mcp_audio_server.analysis.tempo_tracking import BasicTempoDetector
 
 # Constants
@@ -36,22 +45,32 @@ BENCHMARKS_DIR = Path(__file__).parent
 RESULTS_DIR = BENCHMARKS_DIR / "results"
 SERVER_URL = "http://localhost:8000"  # Default server URL
 
-# Test categories
+def _scan(directory, prefix, suffix):
+    """List files in directory whose names start with prefix and end with suffix."""
+    try:
+        with os.scandir(directory) as entries:
+            return [e.path for e in entries
+                    if e.name.startswith(prefix) and e.name.endswith(suffix)]
+    except FileNotFoundError:
+        return []
+
+
+# Test categories, resolved lazily so importing the module or --help does no I/O
 TEST_CATEGORIES = {
-    'sample_rate': [f for f in glob(f"{AUDIO_DIR}/440hz_sr_*.wav")],
-    'duration': [f for f in glob(f"{AUDIO_DIR}/440hz_duration_*.wav")],
-    'format': [
+    'sample_rate': lambda: _scan(AUDIO_DIR, '440hz_sr_', '.wav'),
+    'duration': lambda: _scan(AUDIO_DIR, '440hz_duration_', '.wav'),
+    'format': lambda: [
         f"{AUDIO_DIR}/440hz_sine.wav",
         f"{AUDIO_DIR}/440hz_sine.flac",
         f"{AUDIO_DIR}/440hz_sine.ogg",
         f"{AUDIO_DIR}/440hz_mp3_320k.mp3",
     ],
-    'complexity': [
+    'complexity': lambda: [
         f"{AUDIO_DIR}/440hz_sine.wav",        # Simple
         f"{AUDIO_DIR}/sweep_100hz_to_1000hz.wav",  # Moderate
         f"{AUDIO_DIR}/white_noise.wav",       # Complex
     ],
-    'channels': [
+    'channels': lambda: [
         f"{AUDIO_DIR}/440hz_sine.wav",        # Mono
         f"{AUDIO_DIR}/stereo_440_880hz.wav",  # Stereo
         f"{AUDIO_DIR}/surround_5_1.wav",      # 5.1
@@ -59,17 +78,32 @@ TEST_CATEGORIES = {
 }
 
 
-def get_test_audio(filepath):
-    """Load test audio file as base64."""
-    with open(filepath, "rb") as f:
-        audio_bytes = f.read()
-    return base64.b64encode(audio_bytes).decode("utf-8")
+def resolve_categories(category=None):
+    """Resolve the file lists for one category, or for all of them."""
+    names = [category] if category else list(TEST_CATEGORIES)
+    return {name: TEST_CATEGORIES[name]() for name in names}
+
+
+def _json_bytes(obj, indent=False):
+    """Serialize obj to JSON bytes, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def _write_json(path, obj):
+    """Write obj as indented JSON to path."""
+    with open(path, 'wb') as f:
+        f.write(_json_bytes(obj, indent=True))
 
 
 def load_audio(filepath):
-    """Load audio file as numpy array using soundfile."""
+    """Load audio file as a mono float32 numpy array using soundfile."""
     try:
-        audio, sr = sf.read(filepath)
+        audio, sr = sf.read(filepath, dtype="float32")
+        # Downmix once here rather than inside every detector call
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1, dtype=np.float32)
         return audio, sr
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
@@ -78,211 +112,239 @@ def load_audio(filepath):
 
 def time_operation(func, *args, **kwargs):
     """Measure execution time of a function."""
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     result = func(*args, **kwargs)
-    end_time = time.time()
-    return result, (end_time - start_time) * 1000  # time in ms
+    end_time = time.perf_counter_ns()
+    return result, (end_time - start_time) / 1e6  # time in ms
 
 
-def benchmark_local(audio_files, iterations=3):
-    """Benchmark local audio processing operations."""
-    results = {}
+def extract_shared_features(audio, sr):
+    """Compute the features that are shared between detectors.
+    
+    Each feature is computed the way its detector would: the key chroma at
+    KEY_ANALYSIS_SR at most, the onset envelope at the native rate.
+    """
+    chroma_sr = min(sr, KEY_ANALYSIS_SR)
+    y = librosa.resample(audio, orig_sr=sr, target_sr=chroma_sr) if sr > chroma_sr else audio
+    return {
+        "chroma_cqt": librosa.feature.chroma_cqt(y=y, sr=chroma_sr),
+        "onset_env": librosa.onset.onset_strength(y=audio, sr=sr),
+    }
+
+
+def _bench_one_file(filepath, iterations=3):
+    """Benchmark local processing of a single file.
     
-    # Initialize audio analysis objects
+    Detectors are created inside the worker process so nothing (including
+    numba caches) needs to be pickled across process boundaries.
+    """
     chord_detector = BasicChordDetector()
     key_detector = BasicKeyDetector()
     tempo_detector = BasicTempoDetector()
     
-    for filepath in tqdm(audio_files, desc="Benchmarking local processing"):
-        file_id = os.path.basename(filepath)
-        audio, sr = load_audio(filepath)
-        
-        if audio is None:
-            continue
-            
-        file_results = {
-            "file": file_id,
-            "sample_rate": sr,
-            "channels": 1 if len(audio.shape) == 1 else audio.shape[1],
-            "duration": len(audio) / sr,
-            "operations": {}
-        }
-        
-        # Benchmark chord detection
-        chord_times = []
-        for _ in range(iterations):
-            _, exec_time = time_operation(chord_detector.detect, audio, sr)
-            chord_times.append(exec_time)
-        
-        # Benchmark key detection
-        key_times = []
-        for _ in range(iterations):
-            _, exec_time = time_operation(key_detector.detect, audio, sr)
-            key_times.append(exec_time)
-        
-        # Benchmark tempo detection
-        tempo_times = []
-        for _ in range(iterations):
-            _, exec_time = time_operation(tempo_detector.detect, audio, sr)
-            tempo_times.append(exec_time)
+    file_id = os.path.basename(filepath)
+    audio, sr = load_audio(filepath)
+    
+    if audio is None:
+        return file_id, None
         
-        file_results["operations"] = {
-            "chord_detection": {
-                "mean": statistics.mean(chord_times),
-                "median": statistics.median(chord_times),
-                "min": min(chord_times),
-                "max": max(chord_times),
-                "stdev": statistics.stdev(chord_times) if len(chord_times) > 1 else 0
-            },
-            "key_detection": {
-                "mean": statistics.mean(key_times),
-                "median": statistics.median(key_times),
-                "min": min(key_times),
-                "max": max(key_times),
-                "stdev": statistics.stdev(key_times) if len(key_times) > 1 else 0
-            },
-            "tempo_detection": {
-                "mean": statistics.mean(tempo_times),
-                "median": statistics.median(tempo_times),
-                "min": min(tempo_times),
-                "max": max(tempo_times),
-                "stdev": statistics.stdev(tempo_times) if len(tempo_times) > 1 else 0
-            }
+    file_results = {
+        "file": file_id,
+        "sample_rate": sr,
+        "channels": sf.info(filepath).channels,
+        "duration": len(audio) / sr,
+        "operations": {}
+    }
+    
+    # Warm up librosa/numba caches so the first timed sample isn't skewed
+    chord_detector.detect(audio, sr)
+    key_detector.detect(audio, sr)
+    tempo_detector.detect(audio, sr)
+    
+    # Compute features shared by several detectors once, and time it
+    # separately so the per-detector numbers show their incremental cost
+    features, feature_time = time_operation(extract_shared_features, audio, sr)
+    
+    # Benchmark chord detection
+    chord_times = []
+    for _ in range(iterations):
+        _, exec_time = time_operation(chord_detector.detect, audio, sr)
+        chord_times.append(exec_time)
+    
+    # Benchmark key detection
+    key_times = []
+    for _ in range(iterations):
+        _, exec_time = time_operation(key_detector.detect, audio, sr, features)
+        key_times.append(exec_time)
+    
+    # Benchmark tempo detection
+    tempo_times = []
+    for _ in range(iterations):
+        _, exec_time = time_operation(tempo_detector.detect, audio, sr, features)
+        tempo_times.append(exec_time)
+    
+    file_results["operations"] = {
+        "feature_extraction": {
+            "mean": feature_time,
+            "median": feature_time,
+            "min": feature_time,
+            "max": feature_time,
+            "stdev": 0
+        },
+        "chord_detection": {
+            "mean": statistics.mean(chord_times),
+            "median": statistics.median(chord_times),
+            "min": min(chord_times),
+            "max": max(chord_times),
+            "stdev": statistics.stdev(chord_times) if len(chord_times) > 1 else 0
+        },
+        "key_detection": {
+            "mean": statistics.mean(key_times),
+            "median": statistics.median(key_times),
+            "min": min(key_times),
+            "max": max(key_times),
+            "stdev": statistics.stdev(key_times) if len(key_times) > 1 else 0
+        },
+        "tempo_detection": {
+            "mean": statistics.mean(tempo_times),
+            "median": statistics.median(tempo_times),
+            "min": min(tempo_times),
+            "max": max(tempo_times),
+            "stdev": statistics.stdev(tempo_times) if len(tempo_times) > 1 else 0
         }
-        
-        results[file_id] = file_results
+    }
     
-    return results
+    return file_id, file_results
 
 
-def benchmark_api(audio_files, server_url, iterations=3):
-    """Benchmark API calls to the server."""
+def benchmark_local(audio_files, iterations=3, workers=None, jsonl_path=None):
+    """Benchmark local audio processing operations, fanning files out to worker processes.
+    
+    If jsonl_path is given, each file's results are appended to it as a JSON
+    line as soon as they complete.
+    """
     results = {}
+    jsonl_file = open(jsonl_path, 'ab') if jsonl_path else None
     
-    for filepath in tqdm(audio_files, desc="Benchmarking API calls"):
-        file_id = os.path.basename(filepath)
-        
-        try:
-            audio_data = get_test_audio(filepath)
-        except Exception as e:
-            print(f"Error preparing {filepath}: {e}")
-            continue
-        
-        file_format = os.path.splitext(filepath)[1][1:]  # Get extension without dot
-        if file_format == "mp3":
-            format_name = "mp3"
-        else:
-            format_name = file_format
-        
-        file_results = {
-            "file": file_id,
-            "operations": {}
-        }
-        
-        # Benchmark chord analysis endpoint
-        chord_times = []
-        for _ in range(iterations):
-            request_data = {
-                "audio_data": audio_data,
-                "format": format_name,
-                "options": {"model": "basic"}
-            }
-            
-            try:
-                start_time = time.time()
-                response = requests.post(
-                    f"{server_url}/analyze_chords", 
-                    json=request_data,
-                    timeout=30
-                )
-                end_time = time.time()
-                
-                if response.status_code == 200:
-                    chord_times.append((end_time - start_time) * 1000)
-                else:
-                    print(f"Error analyzing chords for {file_id}: {response.text}")
-            except Exception as e:
-                print(f"Exception during chord analysis for {file_id}: {e}")
-        
-        # Benchmark key analysis endpoint
-        key_times = []
-        for _ in range(iterations):
-            request_data = {
-                "audio_data": audio_data,
-                "format": format_name,
-                "options": {"model": "basic"}
-            }
-            
-            try:
-                start_time = time.time()
-                response = requests.post(
-                    f"{server_url}/analyze_key", 
-                    json=request_data,
-                    timeout=30
-                )
-                end_time = time.time()
-                
-                if response.status_code == 200:
-                    key_times.append((end_time - start_time) * 1000)
-                else:
-                    print(f"Error analyzing key for {file_id}: {response.text}")
-            except Exception as e:
-                print(f"Exception during key analysis for {file_id}: {e}")
-        
-        # Benchmark tempo analysis endpoint
-        tempo_times = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            file_results = executor.map(
+                partial(_bench_one_file, iterations=iterations), audio_files
+            )
+            for file_id, result in tqdm(file_results, total=len(audio_files),
+                                        desc="Benchmarking local processing"):
+                if result is not None:
+                    results[file_id] = result
+                    if jsonl_file:
+                        jsonl_file.write(_json_bytes(result) + b"\n")
+    finally:
+        if jsonl_file:
+            jsonl_file.close()
+    
+    return results
+
+
+# Endpoint benchmarked for each API operation
+API_OPERATIONS = {
+    "chord_analysis": "/analyze_chords",
+    "key_analysis": "/analyze_key",
+    "tempo_analysis": "/analyze_tempo",
+}
+
+
+# soundfile container and subtype used to re-encode each format for the API
+API_ENCODINGS = {
+    "wav": ("WAV", "PCM_16"),
+    "flac": ("FLAC", "PCM_16"),
+    "ogg": ("OGG", "VORBIS"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+}
+
+
+def unique_payloads(filepath, count):
+    """Encode filepath's audio count times, each copy slightly different.
+    
+    The server caches results by payload, so repeating one request would time
+    a cache lookup rather than the analysis. Each copy gets a different gain
+    of a fraction of a dB plus a one-LSB nudge on its first sample, and is
+    re-encoded in the file's own format.
+    """
+    container, subtype = API_ENCODINGS[os.path.splitext(filepath)[1][1:]]
+    audio, sr = sf.read(filepath, dtype="float32", always_2d=True)
+    lsb = 2.0 ** -15
+    payloads = []
+    for i in range(1, count + 1):
+        variant = audio * np.float32(1 - i * 2.0 ** -12)
+        variant[0, 0] = np.clip(variant[0, 0] + i * lsb, -1.0, 1.0 - lsb)
+        buffer = io.BytesIO()
+        sf.write(buffer, variant, sr, format=container, subtype=subtype)
+        payloads.append(base64.b64encode(buffer.getvalue()).decode("ascii"))
+    return payloads
+
+
+def _bench_api_file(client, filepath, server_url, iterations):
+    """Benchmark every API operation for one file, one request at a time."""
+    file_id = os.path.basename(filepath)
+    
+    try:
+        payloads = iter(unique_payloads(filepath, iterations * len(API_OPERATIONS)))
+    except Exception as e:
+        print(f"Error preparing {filepath}: {e}")
+        return file_id, None
+    
+    file_format = os.path.splitext(filepath)[1][1:]  # Get extension without dot
+    file_results = {
+        "file": file_id,
+        "operations": {}
+    }
+    
+    for operation, endpoint in API_OPERATIONS.items():
+        times = []
         for _ in range(iterations):
             request_data = {
-                "audio_data": audio_data,
-                "format": format_name,
+                "audio_data": next(payloads),
+                "format": file_format,
                 "options": {"model": "basic"}
             }
-            
             try:
-                start_time = time.time()
-                response = requests.post(
-                    f"{server_url}/analyze_tempo", 
-                    json=request_data,
-                    timeout=30
+                response, exec_time = time_operation(
+                    client.post, f"{server_url}{endpoint}", json=request_data
                 )
-                end_time = time.time()
-                
-                if response.status_code == 200:
-                    tempo_times.append((end_time - start_time) * 1000)
-                else:
-                    print(f"Error analyzing tempo for {file_id}: {response.text}")
             except Exception as e:
-                print(f"Exception during tempo analysis for {file_id}: {e}")
+                print(f"Exception during {operation} for {file_id}: {e}")
+                continue
+            if response.status_code == 200:
+                times.append(exec_time)
+            else:
+                print(f"Error in {operation} for {file_id}: {response.text}")
         
         # Calculate statistics if we have valid measurements
-        if chord_times:
-            file_results["operations"]["chord_analysis"] = {
-                "mean": statistics.mean(chord_times),
-                "median": statistics.median(chord_times),
-                "min": min(chord_times),
-                "max": max(chord_times),
-                "stdev": statistics.stdev(chord_times) if len(chord_times) > 1 else 0
-            }
-        
-        if key_times:
-            file_results["operations"]["key_analysis"] = {
-                "mean": statistics.mean(key_times),
-                "median": statistics.median(key_times),
-                "min": min(key_times),
-                "max": max(key_times),
-                "stdev": statistics.stdev(key_times) if len(key_times) > 1 else 0
+        if times:
+            file_results["operations"][operation] = {
+                "mean": statistics.mean(times),
+                "median": statistics.median(times),
+                "min": min(times),
+                "max": max(times),
+                "stdev": statistics.stdev(times) if len(times) > 1 else 0
             }
-        
-        if tempo_times:
-            file_results["operations"]["tempo_analysis"] = {
-                "mean": statistics.mean(tempo_times),
-                "median": statistics.median(tempo_times),
-                "min": min(tempo_times),
-                "max": max(tempo_times),
-                "stdev": statistics.stdev(tempo_times) if len(tempo_times) > 1 else 0
-            }
-        
-        results[file_id] = file_results
+    
+    return file_id, file_results
+
+
+def benchmark_api(audio_files, server_url, iterations=3):
+    """Benchmark API calls to the server.
+    
+    Requests are sent sequentially with a fresh payload each, so every
+    number is the latency of one uncached request on an otherwise idle
+    server.
+    """
+    results = {}
+    
+    with httpx.Client(timeout=30) as client:
+        for filepath in tqdm(audio_files, desc="Benchmarking API calls"):
+            file_id, file_results = _bench_api_file(client, filepath, server_url, iterations)
+            if file_results is not None:
+                results[file_id] = file_results
     
     return results
 
@@ -301,14 +363,13 @@ def generate_report(local_results, api_results=None, save=True):
     if save:
         os.makedirs(RESULTS_DIR, exist_ok=True)
         output_file = RESULTS_DIR / f"benchmark_report_{timestamp}.json"
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        _write_json(output_file, report)
         print(f"Report saved to {output_file}")
     
     return report
 
 
-def generate_summary(report):
+def generate_summary(report, categories=None):
     """Generate a summary of the benchmark results."""
     local_results = report["local_processing"]
     api_results = report.get("api_processing", {})
@@ -318,11 +379,14 @@ def generate_summary(report):
         "categories": {}
     }
     
-    for category, files in TEST_CATEGORIES.items():
+    if categories is None:
+        categories = resolve_categories()
+    
+    for category, files in categories.items():
         cat_summary = {"local": {}, "api": {}}
         
         # Average times for local processing
-        for operation in ["chord_detection", "key_detection", "tempo_detection"]:
+        for operation in ["feature_extraction", "chord_detection", "key_detection", "tempo_detection"]:
             times = []
             for filepath in files:
                 file_id = os.path.basename(filepath)
@@ -368,6 +432,7 @@ def parse_args():
     parser.add_argument("--api", action="store_true", help="Run API benchmarks")
     parser.add_argument("--server", default=SERVER_URL, help=f"Server URL (default: {SERVER_URL})")
     parser.add_argument("--iterations", type=int, default=3, help="Number of iterations per test (default: 3)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for local benchmarks (default: CPU count)")
     parser.add_argument("--category", choices=list(TEST_CATEGORIES.keys()), help="Only benchmark a specific category")
     return parser.parse_args()
 
@@ -380,15 +445,12 @@ def main():
     if not args.local and not args.api:
         args.local = True
     
-    # Select files to benchmark
-    if args.category:
-        audio_files = TEST_CATEGORIES[args.category]
-    else:
-        # Use a unique set of all files
-        audio_files = set()
-        for files in TEST_CATEGORIES.values():
-            audio_files.update(files)
-        audio_files = list(audio_files)
+    # Select files to benchmark, using a unique set across categories
+    categories = resolve_categories(args.category)
+    audio_files = set()
+    for files in categories.values():
+        audio_files.update(files)
+    audio_files = list(audio_files)
     
     # Run benchmarks
     local_results = {}
@@ -396,7 +458,12 @@ def main():
     
     if args.local:
         print(f"Running local benchmarks ({args.iterations} iterations per test)...")
-        local_results = benchmark_local(audio_files, iterations=args.iterations)
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        local_results = benchmark_local(
+            audio_files, iterations=args.iterations, workers=args.workers,
+            jsonl_path=RESULTS_DIR / f"benchmark_local_{timestamp}.jsonl"
+        )
     
     if args.api:
         print(f"Running API benchmarks against {args.server} ({args.iterations} iterations per test)...")
@@ -406,7 +473,7 @@ def main():
     report = generate_report(local_results, api_results if args.api else None)
     
     # Generate summary
-    summary = generate_summary(report)
+    summary = generate_summary(report, categories)
     
     # Print summary
     print("\nBenchmark Summary:")
@@ -427,8 +494,7 @@ def main():
     os.makedirs(RESULTS_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     summary_file = RESULTS_DIR / f"benchmark_summary_{timestamp}.json"
-    with open(summary_file, 'w') as f:
-        json.dump(summary, f, indent=2)
+    _write_json(summary_file, summary)
     print(f"\nSummary saved to {summary_file}")
 
 
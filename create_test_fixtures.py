@@ -9,6 +9,7 @@ import os
 import numpy as np
 import soundfile as sf
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 
 # Base frequencies for notes (A4 = 440Hz standard tuning)
@@ -29,23 +30,35 @@ SAMPLE_RATE = 44100  # Standard sample rate (Hz)
 BASE_DIR = Path("tests/fixtures")
 
 
+@lru_cache(maxsize=None)
+def _pitch_ratio(semitone):
+    """Frequency ratio of an equal-tempered interval of the given semitones."""
+    return 2.0 ** (semitone / 12.0)
+
+
 def generate_sine_wave(freq, duration, sample_rate=SAMPLE_RATE, amplitude=0.2):
     """Generate a sine wave at the given frequency."""
     t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
     return amplitude * np.sin(2 * np.pi * freq * t)
 
 
-def generate_chord(root, chord_type, duration=2.0):
+def generate_chord(root, chord_type, duration=2.0, amplitude=0.2):
     """Generate a chord from root note and chord type."""
-    root_freq = NOTE_FREQUENCIES[root]
-    chord = np.zeros(int(SAMPLE_RATE * duration))
+    t = np.linspace(0, duration, int(SAMPLE_RATE * duration), endpoint=False)
+    ratios = np.array([_pitch_ratio(s) for s in CHORD_TYPES[chord_type]])
+    cycles = np.outer(NOTE_FREQUENCIES[root] * ratios, t)
+    
+    # Wrap the phase to within half a cycle while still in float64; a float32
+    # phase loses ~1e-3 of accuracy after a couple of seconds
+    cycles -= np.rint(cycles)
+    phase = (2 * np.pi * cycles).astype(np.float32)
     
-    for semitone in CHORD_TYPES[chord_type]:
-        freq = root_freq * (2 ** (semitone / 12))
-        chord += generate_sine_wave(freq, duration)
+    # Build all partials at once and sum them
+    chord = (amplitude * np.sin(phase)).sum(axis=0)
     
     # Normalize
-    return chord / np.max(np.abs(chord))
+    chord /= np.abs(chord).max()
+    return chord
 
 
 def generate_click_track(tempo, duration=2.0):
@@ -53,17 +66,15 @@ def generate_click_track(tempo, duration=2.0):
     beat_interval = 60.0 / tempo  # seconds between beats
     samples = np.zeros(int(SAMPLE_RATE * duration))
     
-    # Add clicks at regular intervals
-    for beat_time in np.arange(0, duration, beat_interval):
-        beat_pos = int(beat_time * SAMPLE_RATE)
-        click_len = min(int(0.01 * SAMPLE_RATE), len(samples) - beat_pos)
-        
-        # Generate a short click
-        t = np.linspace(0, 0.01, click_len, endpoint=False)
-        click = 0.8 * np.sin(2 * np.pi * 1000 * t) * np.exp(-10 * t)
-        
-        if beat_pos + click_len <= len(samples):
-            samples[beat_pos:beat_pos + click_len] = click
+    # Generate a short click once and copy it into place at every beat
+    click_len = int(0.01 * SAMPLE_RATE)
+    t = np.linspace(0, 0.01, click_len, endpoint=False)
+    click_template = (0.8 * np.sin(2 * np.pi * 1000 * t) * np.exp(-10 * t)).astype(np.float32)
+    
+    beat_positions = (np.arange(0, duration, beat_interval) * SAMPLE_RATE).astype(np.int64)
+    for beat_pos in beat_positions:
+        end = min(beat_pos + click_len, len(samples))
+        samples[beat_pos:end] = click_template[:end - beat_pos]
     
     return samples
 
@@ -80,7 +91,7 @@ def create_test_files():
         for chord_type in ['major', 'minor', 'dom7']:
             chord = generate_chord(root, chord_type)
             filename = f"{root}_{chord_type}.wav"
-            sf.write(str(BASE_DIR / 'chords' / filename), chord, SAMPLE_RATE)
+            sf.write(str(BASE_DIR / 'chords' / filename), chord, SAMPLE_RATE, subtype='PCM_16')
             print(f"  Created {filename}")
     
     # 2. Tempo samples
@@ -89,14 +100,14 @@ def create_test_files():
         # Pure click track
         click_track = generate_click_track(tempo)
         filename = f"{tempo}bpm_click.wav"
-        sf.write(str(BASE_DIR / 'tempo' / filename), click_track, SAMPLE_RATE)
+        sf.write(str(BASE_DIR / 'tempo' / filename), click_track, SAMPLE_RATE, subtype='PCM_16')
         
         # Click track with chord
         c_major = generate_chord('C', 'major')
         combined = 0.7 * c_major + 0.3 * click_track
         combined = combined / np.max(np.abs(combined))
         filename = f"{tempo}bpm_with_chord.wav"
-        sf.write(str(BASE_DIR / 'tempo' / filename), combined, SAMPLE_RATE)
+        sf.write(str(BASE_DIR / 'tempo' / filename), combined, SAMPLE_RATE, subtype='PCM_16')
         print(f"  Created tempo files at {tempo} BPM")
     
     # 3. Key examples (simple triads)
@@ -105,31 +116,31 @@ def create_test_files():
         for chord_type in ['major', 'minor']:
             chord = generate_chord(key, chord_type)
             filename = f"{key}_{chord_type}_key.wav"
-            sf.write(str(BASE_DIR / 'key' / filename), chord, SAMPLE_RATE)
+            sf.write(str(BASE_DIR / 'key' / filename), chord, SAMPLE_RATE, subtype='PCM_16')
             print(f"  Created {filename}")
     
     # 4. Edge cases
     print("\nCreating edge cases...")
     # Silent audio
     silent = np.zeros(int(SAMPLE_RATE * 2.0))
-    sf.write(str(BASE_DIR / 'edge_cases' / 'silent.wav'), silent, SAMPLE_RATE)
+    sf.write(str(BASE_DIR / 'edge_cases' / 'silent.wav'), silent, SAMPLE_RATE, subtype='PCM_16')
     
     # Very short audio (100ms)
     short = generate_chord('C', 'major', 0.1)
-    sf.write(str(BASE_DIR / 'edge_cases' / 'very_short.wav'), short, SAMPLE_RATE)
+    sf.write(str(BASE_DIR / 'edge_cases' / 'very_short.wav'), short, SAMPLE_RATE, subtype='PCM_16')
     
     # Very long audio
     long = np.concatenate([generate_chord('C', 'major'), 
                          generate_chord('F', 'major'),
                          generate_chord('G', 'major'), 
                          generate_chord('C', 'major')])
-    sf.write(str(BASE_DIR / 'edge_cases' / 'long_progression.wav'), long, SAMPLE_RATE)
+    sf.write(str(BASE_DIR / 'edge_cases' / 'long_progression.wav'), long, SAMPLE_RATE, subtype='PCM_16')
     
     # Low sample rate
     low_sr = 8000
     t = np.linspace(0, 2.0, int(low_sr * 2.0), endpoint=False)
     low_quality = 0.5 * np.sin(2 * np.pi * 440 * t)
-    sf.write(str(BASE_DIR / 'edge_cases' / 'low_sample_rate.wav'), low_quality, low_sr)
+    sf.write(str(BASE_DIR / 'edge_cases' / 'low_sample_rate.wav'), low_quality, low_sr, subtype='PCM_16')
     print("  Created edge case files")
     
     # 5. Error cases
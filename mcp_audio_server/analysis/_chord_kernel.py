@@ -0,0 +1,43 @@
+"""
+Chord labelling kernel, in plain Python/NumPy.
+
+chord_detection JIT-compiles it with numba. Deployments that don't want
+numba can compile it ahead of time with Pythran instead:
+
+    pythran -O3 -march=native mcp_audio_server/analysis/_chord_kernel.py
+
+The resulting extension module sits next to this file, takes precedence
+over it on import and is then used as is.
+"""
+
+import numpy as np
+
+#pythran export label_frames(float64[:,:])
+def label_frames(chroma):
+    """
+    Return the root, major/minor flag and confidence for each chroma frame.
+    
+    Single-pass equivalent of chord_detection._label_frames_numpy: the root,
+    its value and the frame sum are found in one sweep over each frame
+    instead of separate argmax, gather and sum passes. Serial, like the numba
+    build: an OpenMP pool started before the worker pool forks would hang it.
+    """
+    n_bins, n_frames = chroma.shape
+    roots = np.empty(n_frames, dtype=np.int64)
+    is_major = np.empty(n_frames, dtype=np.bool_)
+    confidences = np.empty(n_frames, dtype=np.float64)
+    for i in range(n_frames):
+        root = 0
+        best = chroma[0, i]
+        total = 0.0
+        for b in range(n_bins):
+            value = chroma[b, i]
+            total += value
+            if value > best:
+                best = value
+                root = b
+        roots[i] = root
+        is_major[i] = chroma[(root + 4) % 12, i] > chroma[(root + 3) % 12, i]
+        confidences[i] = best / total if total > 0 else 0.0
+    return roots, is_major, confidences
+
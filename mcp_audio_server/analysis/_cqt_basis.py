@@ -0,0 +1,79 @@
+"""
+In-memory cache for librosa's constant-Q filter bases.
+
+librosa rebuilds the frequency-domain CQT filter bank on every
+``cqt``/``chroma_cqt`` call. For clip-length inputs that setup costs more than
+the transform itself. librosa's own ``@cache`` only applies when
+``LIBROSA_CACHE_DIR`` is set, and then goes through joblib on disk.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import numpy as np
+
+try:
+    from librosa.core import constantq
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+_FILTER_FFT_NAME = "__vqt_filter_fft"
+BASIS_CACHE_SIZE = 32  # Per-octave bases; a full 7-octave CQT uses 7 entries
+
+_UNHASHABLE = object()
+_basis_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
+_basis_lock = threading.Lock()
+
+
+def _hashable(value: Any) -> Any:
+    """Return a cache-key form of an argument, or _UNHASHABLE."""
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tobytes())
+    try:
+        hash(value)
+    except TypeError:
+        return _UNHASHABLE
+    return value
+
+
+def _cached_filter_fft(original):
+    """Wrap librosa's filter-basis builder with an LRU keyed by its arguments."""
+    def filter_fft(*args, **kwargs):
+        cache_key = tuple(_hashable(arg) for arg in args) + tuple(
+            (name, _hashable(value)) for name, value in sorted(kwargs.items())
+        )
+        if _UNHASHABLE in cache_key or any(
+            key[1] is _UNHASHABLE for key in cache_key[len(args):]
+        ):
+            return original(*args, **kwargs)
+
+        with _basis_lock:
+            entry = _basis_cache.get(cache_key)
+            if entry is not None:
+                _basis_cache.move_to_end(cache_key)
+        if entry is None:
+            entry = original(*args, **kwargs)
+            with _basis_lock:
+                _basis_cache[cache_key] = entry
+                if len(_basis_cache) > BASIS_CACHE_SIZE:
+                    _basis_cache.popitem(last=False)
+
+        # librosa rescales the returned basis in place, so hand out copies
+        fft_basis, n_fft, lengths = entry
+        return fft_basis.copy(), n_fft, lengths.copy()
+
+    filter_fft.__wrapped__ = original
+    filter_fft._basis_cached = True
+    return filter_fft
+
+
+def enable_cqt_basis_cache() -> None:
+    """Route librosa's CQT filter construction through the in-memory cache."""
+    if not LIBROSA_AVAILABLE:
+        return
+    original = getattr(constantq, _FILTER_FFT_NAME, None)
+    if original is None or getattr(original, "_basis_cached", False):
+        return
+    setattr(constantq, _FILTER_FFT_NAME, _cached_filter_fft(original))
@@ -1,15 +1,101 @@
 """Chord detection module."""
 
 import logging
+import os
 from typing import List, Optional, Tuple
 
 import numpy as np
 
-from mcp_audio_server.analysis import register_detector
+from mcp_audio_server.analysis import _chord_kernel, register_detector
+from mcp_audio_server.analysis._cqt_basis import enable_cqt_basis_cache
 from mcp_audio_server.analysis.models import Chord
 
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import pyfftw
+    import pyfftw.interfaces.numpy_fft
+    PYFFTW_AVAILABLE = True
+except ImportError:
+    PYFFTW_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+if LIBROSA_AVAILABLE and PYFFTW_AVAILABLE:
+    # Route librosa's FFTs through FFTW and keep plans cached between calls,
+    # so repeated transforms of the same shape skip planning
+    pyfftw.interfaces.cache.enable()
+    librosa.set_fftlib(pyfftw.interfaces.numpy_fft)
+    logger.info("Using pyFFTW as librosa's FFT backend")
+
+# Reuse CQT filter banks across chroma_cqt calls
+enable_cqt_basis_cache()
+
+
+CHORD_NAMES = np.array(['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'])
+MINOR_CHORD_NAMES = np.char.add(CHORD_NAMES, "m")
+
+# Structure-of-arrays layout for detected chords; Chord objects are only
+# built from it for callers that need them
+CHORD_RECORD_DTYPE = np.dtype([("time", "f8"), ("label", "U6"), ("confidence", "f8")])
+
+
+def _records_to_chords(records: np.ndarray) -> List[Chord]:
+    """Materialize Chord objects from CHORD_RECORD_DTYPE records."""
+    return [
+        Chord(time=time, label=label, confidence=confidence)
+        for time, label, confidence in zip(
+            records["time"].tolist(),
+            records["label"].tolist(),
+            records["confidence"].tolist(),
+        )
+    ]
+
+
+def _next_pow2(n: int) -> int:
+    """Return the smallest power of two greater than or equal to n."""
+    return 1 << max(int(n) - 1, 0).bit_length()
+
+
+def _label_frames_numpy(chroma: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Label chroma frames with a root, major/minor flag and confidence.
+    
+    Takes the max chroma bin as the root and compares the relative strength
+    of the major third vs the minor third. Confidence is the share of the
+    frame's energy in the root bin.
+    """
+    frames = np.arange(chroma.shape[1])
+    roots = np.argmax(chroma, axis=0)
+    is_major = chroma[(roots + 4) % 12, frames] > chroma[(roots + 3) % 12, frames]
+    root_vals = chroma[roots, frames]
+    sums = chroma.sum(axis=0)
+    confidences = np.divide(
+        root_vals, sums, out=np.zeros(len(frames), dtype=float), where=sums > 0
+    )
+    return roots, is_major, confidences
+
+
+if not _chord_kernel.__file__.endswith(".py"):
+    # Pythran-compiled build of the kernel
+    _label_frames = _chord_kernel.label_frames
+elif NUMBA_AVAILABLE:
+    # Serial on purpose: parallel=True starts numba's thread pool in the
+    # importing process, and fork-based worker pools created afterwards hang
+    _label_frames = numba.njit(cache=True, fastmath=True)(_chord_kernel.label_frames)
+else:
+    _label_frames = _label_frames_numpy
+
 
 @register_detector("basic_chords")
 class BasicChordDetector:
@@ -17,6 +103,9 @@ class BasicChordDetector:
     
     def __init__(self, config: Optional[dict] = None):
         self.config = config or {}
+        if NUMBA_AVAILABLE:
+            # Trigger JIT compilation (or cache load) off the hot path
+            _label_frames(np.ones((12, 4)))
         
     def detect_chords(self, waveform: np.ndarray, sr: int) -> List[Chord]:
         """
@@ -29,73 +118,87 @@ class BasicChordDetector:
         Returns:
             List of detected chords with timing information
         """
-        try:
-            import librosa
-            import librosa.display
-        except ImportError:
+        return _records_to_chords(self.detect_chords_ndarray(waveform, sr))
+    
+    detect = detect_chords
+    
+    def detect_chords_ndarray(self, waveform: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Detect chords in audio waveform as a structured array.
+        
+        Args:
+            waveform: Audio samples as numpy array
+            sr: Sample rate
+            
+        Returns:
+            Array of CHORD_RECORD_DTYPE records (time, label, confidence)
+        """
+        if not LIBROSA_AVAILABLE:
             logger.error("librosa required for chord detection")
-            return []
+            return np.empty(0, dtype=CHORD_RECORD_DTYPE)
         
         logger.info(f"Analyzing chords in audio (sr={sr})")
         
         # Get time resolution from config or use default
         time_resolution = self.config.get("time_resolution", 0.5)  # seconds
         
-        # Extract chroma features
+        # Extract chroma features. The STFT chroma is several times cheaper
+        # than a full constant-Q transform but weights higher notes more
+        # heavily, so it is opt-in via the "chroma_impl" config option.
         hop_length = int(sr * time_resolution)
-        chroma = librosa.feature.chroma_cqt(y=waveform, sr=sr, hop_length=hop_length)
+        if self.config.get("chroma_impl", "cqt") == "stft":
+            chroma = librosa.feature.chroma_stft(
+                y=waveform, sr=sr, hop_length=hop_length, n_fft=_next_pow2(2 * hop_length)
+            )
+        else:
+            chroma = librosa.feature.chroma_cqt(y=waveform, sr=sr, hop_length=hop_length)
         
         # Get timestamps for each chroma frame
         timestamps = librosa.times_like(chroma, sr=sr, hop_length=hop_length)
         
         # Simplified chord detection - map chroma to basic chords
-        chords = self._chroma_to_chords(chroma, timestamps)
-        
-        return chords
+        return self._chroma_to_records(chroma, timestamps)
     
     def _chroma_to_chords(self, chroma: np.ndarray, timestamps: np.ndarray) -> List[Chord]:
+        """Convert chroma features to a list of Chord objects."""
+        return _records_to_chords(self._chroma_to_records(chroma, timestamps))
+    
+    def _chroma_to_records(self, chroma: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
         """
-        Convert chroma features to chord labels.
+        Convert chroma features to chord label records.
         
         This is a simplified implementation. A real chord detection algorithm
         would use more sophisticated techniques like template matching or HMMs.
         """
-        chord_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        minor_chord_names = [f"{n}m" for n in chord_names]
+        # Only label frames that have a timestamp
+        n_frames = min(chroma.shape[1], len(timestamps))
+        chroma = np.ascontiguousarray(chroma[:, :n_frames], dtype=np.float64)
         
-        # Simplified approach: take the max chroma bin and determine major/minor
-        chords = []
+        roots, is_major, confidences = _label_frames(chroma)
         
-        for i, time in enumerate(timestamps):
-            if i >= chroma.shape[1]:
-                break
-                
-            # Get the chroma vector for this frame
-            chroma_vector = chroma[:, i]
-            
-            # Find the root note (max chroma value)
-            root = np.argmax(chroma_vector)
-            
-            # Determine if it's major or minor
-            # Simplified: check relative strength of major third vs minor third
-            major_third = (root + 4) % 12
-            minor_third = (root + 3) % 12
-            
-            if chroma_vector[major_third] > chroma_vector[minor_third]:
-                label = chord_names[root]
-            else:
-                label = minor_chord_names[root]
-            
-            # Calculate a simple confidence measure based on the strength of the root note
-            confidence = float(chroma_vector[root] / np.sum(chroma_vector)) if np.sum(chroma_vector) > 0 else 0
-            
-            chords.append(Chord(
-                time=float(time),
-                label=label,
-                confidence=confidence
-            ))
-        
-        return chords
+        records = np.empty(n_frames, dtype=CHORD_RECORD_DTYPE)
+        records["time"] = timestamps[:n_frames]
+        records["label"] = np.where(is_major, CHORD_NAMES[roots], MINOR_CHORD_NAMES[roots])
+        records["confidence"] = confidences
+        return records
+
+
+_rng: Optional[Tuple[int, np.random.Generator]] = None
+
+
+def _process_rng() -> np.random.Generator:
+    """
+    Return this process's random generator, creating it on first use.
+    
+    Detectors are pickled into pool workers, so a generator stored on the
+    instance would arrive unadvanced for every task. Keying on the pid also
+    keeps forked children from inheriting the parent's stream.
+    """
+    global _rng
+    pid = os.getpid()
+    if _rng is None or _rng[0] != pid:
+        _rng = (pid, np.random.default_rng())
+    return _rng[1]
 
 
 @register_detector("advanced_chords")
@@ -116,12 +219,16 @@ class AdvancedChordDetector:
         
         # For demonstration, randomly convert some chords to seventh chords
         if self.enable_seventh_chords:
-            import random
-            for chord in chords:
-                if random.random() < 0.2:  # 20% chance to become a seventh chord
-                    if "m" in chord.label:
-                        chord.label = chord.label + "7"  # minor seventh
-                    else:
-                        chord.label = chord.label + "maj7"  # major seventh
+            # 20% chance for each chord to become a seventh chord
+            mask = _process_rng().random(len(chords)) < 0.2
+            for chord, flip in zip(chords, mask):
+                if not flip:
+                    continue
+                if "m" in chord.label:
+                    chord.label = chord.label + "7"  # minor seventh
+                else:
+                    chord.label = chord.label + "maj7"  # major seventh
         
         return chords
+    
+    detect = detect_chords
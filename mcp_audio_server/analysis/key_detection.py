@@ -1,14 +1,53 @@
 """Key detection module."""
 
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
 from mcp_audio_server.analysis import register_detector
+from mcp_audio_server.analysis._cqt_basis import enable_cqt_basis_cache
+from mcp_audio_server.cache import cached_feature
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Reuse CQT filter banks across chroma_cqt calls
+enable_cqt_basis_cache()
+
+# Maximum sample rate used for key analysis chroma
+KEY_ANALYSIS_SR = 22050
+
+# Frame settings for the opt-in STFT chroma
+STFT_CHROMA_N_FFT = 4096
+STFT_CHROMA_HOP = 2048
+
+# Krumhansl-Kessler key profiles for major and minor keys, from the probe-tone
+# ratings in Krumhansl & Kessler (1982), as tabulated in Krumhansl, "Cognitive
+# Foundations of Musical Pitch" (1990). The C# major weight is 2.23; 2.33 is a
+# common transcription error.
+_MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+_MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+_KEY_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+_KEY_LABELS = _KEY_NAMES + tuple(f"{k}m" for k in _KEY_NAMES)
+
+# All 24 rotated profiles (12 major then 12 minor), z-scored so a single
+# matrix-vector product gives the Pearson correlation with every key
+_PROFILES = np.stack(
+    [np.roll(_MAJOR_PROFILE, i) for i in range(12)]
+    + [np.roll(_MINOR_PROFILE, i) for i in range(12)]
+)
+_PROFILES_Z = (_PROFILES - _PROFILES.mean(axis=1, keepdims=True)) / _PROFILES.std(
+    axis=1, keepdims=True
+)
+_PROFILES_Z.setflags(write=False)
+
 
 @register_detector("basic_key")
 class BasicKeyDetector:
@@ -17,71 +56,127 @@ class BasicKeyDetector:
     def __init__(self, config: Optional[dict] = None):
         self.config = config or {}
         
-    def detect_key(self, waveform: np.ndarray, sr: int) -> Dict[str, any]:
+    def detect_key(
+        self, waveform: np.ndarray, sr: int, features: Optional[dict] = None
+    ) -> Dict[str, any]:
         """
         Detect musical key of audio waveform.
         
         Args:
             waveform: Audio samples as numpy array
             sr: Sample rate
+            features: Optional precomputed features; a "chroma_cqt" entry
+                (default hop length), or "chroma_stft" with the "stft"
+                chroma_impl, is used instead of recomputing it
             
         Returns:
             Dictionary with key name and confidence
         """
-        try:
-            import librosa
-        except ImportError:
+        if not LIBROSA_AVAILABLE:
             logger.error("librosa required for key detection")
             return {"key": "", "confidence": 0.0}
         
         logger.info(f"Analyzing key in audio (sr={sr})")
         
-        # Extract chroma features
-        chroma = librosa.feature.chroma_cqt(y=waveform, sr=sr)
+        chroma, _ = self._chroma(
+            waveform, sr, features, self.config.get("chroma_impl", "cqt")
+        )
         
         # Average chroma features over time
-        chroma_avg = np.mean(chroma, axis=1)
+        detected_key, confidence = self._score_chroma(np.mean(chroma, axis=1))
         
-        # Define key profiles for major and minor keys
-        # These are simplified Krumhansl-Kessler profiles
-        major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-        minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+        return {
+            "key": detected_key,
+            "confidence": confidence
+        }
+    
+    @staticmethod
+    def _chroma(
+        waveform: np.ndarray,
+        sr: int,
+        features: Optional[dict] = None,
+        chroma_impl: str = "cqt",
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Return the chroma for waveform, reusing a precomputed one if given.
         
-        # Calculate correlation with each possible key
-        key_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        minor_key_names = [f"{k}m" for k in key_names]
+        Key detection only needs harmonic content well below 11 kHz, so audio
+        is resampled to at most KEY_ANALYSIS_SR first.
         
-        max_corr = -1
-        detected_key = ""
+        Args:
+            chroma_impl: "cqt" (default) or "stft"; the STFT chroma is about
+                4x cheaper but less reliable on sparse harmonic content. A
+                precomputed "chroma_stft" must use STFT_CHROMA_HOP.
         
-        # Check correlation with major keys
-        for i in range(12):
-            # Rotate the profile to match each key
-            rotated_profile = np.roll(major_profile, i)
-            corr = np.corrcoef(rotated_profile, chroma_avg)[0, 1]
-            
-            if corr > max_corr:
-                max_corr = corr
-                detected_key = key_names[i]
-        
-        # Check correlation with minor keys
-        for i in range(12):
-            # Rotate the profile to match each key
-            rotated_profile = np.roll(minor_profile, i)
-            corr = np.corrcoef(rotated_profile, chroma_avg)[0, 1]
+        Returns:
+            Tuple of (chroma, sample rate the chroma frames are based on)
+        """
+        chroma = (features or {}).get(f"chroma_{chroma_impl}")
+        if chroma is not None:
+            return chroma, sr
+        
+        # Work in float32 so the resampler and chroma transform run at single precision
+        waveform = np.asarray(waveform, dtype=np.float32)
+        target_sr = min(sr, KEY_ANALYSIS_SR)
+        
+        def compute():
+            y = waveform
+            if sr > target_sr:
+                y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+            if chroma_impl == "stft":
+                return librosa.feature.chroma_stft(
+                    y=y, sr=target_sr, n_fft=STFT_CHROMA_N_FFT, hop_length=STFT_CHROMA_HOP
+                )
+            return librosa.feature.chroma_cqt(y=y, sr=target_sr)
+        
+        if chroma_impl == "stft":
+            params = {"n_fft": STFT_CHROMA_N_FFT, "hop_length": STFT_CHROMA_HOP}
+        else:
+            params = {"hop_length": 512}
+        params["target_sr"] = target_sr
+        name = f"chroma_{chroma_impl}_{target_sr}"
+        return cached_feature(name, waveform, sr, compute, params), target_sr
+    
+    @staticmethod
+    def _score_chroma(chroma_avg: np.ndarray) -> Tuple[str, float]:
+        """
+        Score a time-averaged chroma vector against all key profiles.
+        
+        Returns:
+            Tuple of (key name, confidence)
+        """
+        return BasicKeyDetector._score_chroma_batch(chroma_avg[np.newaxis, :])[0]
+    
+    @staticmethod
+    def _score_chroma_batch(chroma_avgs: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        Score several time-averaged chroma vectors against all key profiles.
+        
+        Args:
+            chroma_avgs: Array of shape (n, 12), one averaged chroma per row
             
-            if corr > max_corr:
-                max_corr = corr
-                detected_key = minor_key_names[i]
+        Returns:
+            List of (key name, confidence) tuples, one per row
+        """
+        # Correlate every averaged chroma against all 24 key profiles at once
+        centered = chroma_avgs - chroma_avgs.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centered, axis=1)
+        safe_norms = np.where(norms > 0, norms, 1.0)
+        correlations = (centered / safe_norms[:, np.newaxis]) @ _PROFILES_Z.T / np.sqrt(12)
+        
+        best = np.argmax(correlations, axis=1)
         
         # Convert correlation coefficient to confidence (range 0-1)
         # Adjust the range from [-1, 1] to [0, 1]
-        confidence = (max_corr + 1) / 2
+        confidences = (correlations[np.arange(len(best)), best] + 1) / 2
         
-        return {
-            "key": detected_key,
-            "confidence": float(confidence)
-        }
+        return [
+            # Flat chroma (e.g. silence) has no defined correlation
+            (_KEY_LABELS[idx], float(conf)) if norm > 0 else ("", 0.0)
+            for idx, conf, norm in zip(best.tolist(), confidences.tolist(), norms.tolist())
+        ]
+    
+    detect = detect_key
 
 
 @register_detector("advanced_key")
@@ -92,44 +187,64 @@ class AdvancedKeyDetector:
         self.config = config or {}
         self.enable_segment_analysis = self.config.get("enable_segment_analysis", False)
         
-    def detect_key(self, waveform: np.ndarray, sr: int) -> Dict[str, any]:
+    def detect_key(
+        self, waveform: np.ndarray, sr: int, features: Optional[dict] = None
+    ) -> Dict[str, any]:
         """
         Advanced key detection implementation.
         
         Args:
             waveform: Audio samples as numpy array
             sr: Sample rate
+            features: Optional precomputed features for the whole waveform
             
         Returns:
             Dictionary with key name, confidence, and optional segment analysis
         """
-        basic_detector = BasicKeyDetector(self.config)
-        result = basic_detector.detect_key(waveform, sr)
+        if not LIBROSA_AVAILABLE:
+            logger.error("librosa required for key detection")
+            return {"key": "", "confidence": 0.0}
+        
+        # Compute the chroma once and derive both the global and the
+        # per-segment keys from it
+        chroma_impl = self.config.get("chroma_impl", "cqt")
+        chroma, chroma_sr = BasicKeyDetector._chroma(waveform, sr, features, chroma_impl)
+        detected_key, confidence = BasicKeyDetector._score_chroma(np.mean(chroma, axis=1))
+        result = {
+            "key": detected_key,
+            "confidence": confidence
+        }
         
         # If segment analysis is enabled, also analyze the key by segments
         if self.enable_segment_analysis and len(waveform) > sr * 10:  # Only for tracks > 10 seconds
             try:
-                import librosa
+                # Split the chroma into 10-second segments
+                num_segments = len(waveform) // (sr * 10)
+                hop_length = STFT_CHROMA_HOP if chroma_impl == "stft" else 512
+                frames_per_segment = int(
+                    librosa.time_to_frames(10, sr=chroma_sr, hop_length=hop_length)
+                )
                 
-                # Split audio into segments
-                segment_length = sr * 10  # 10-second segments
-                num_segments = len(waveform) // segment_length
+                # Average each segment's frames and score all segments together
+                n_frames = min(num_segments * frames_per_segment, chroma.shape[1])
+                num_segments = n_frames // frames_per_segment
+                segment_avgs = (
+                    chroma[:, :num_segments * frames_per_segment]
+                    .reshape(chroma.shape[0], num_segments, frames_per_segment)
+                    .mean(axis=2)
+                    .T
+                )
+                segment_scores = BasicKeyDetector._score_chroma_batch(segment_avgs)
                 
-                segment_keys = []
-                
-                for i in range(num_segments):
-                    start = i * segment_length
-                    end = (i + 1) * segment_length
-                    segment = waveform[start:end]
-                    
-                    # Detect key in this segment
-                    segment_result = basic_detector.detect_key(segment, sr)
-                    segment_keys.append({
+                segment_keys = [
+                    {
                         "start_time": i * 10,  # in seconds
                         "end_time": (i + 1) * 10,
-                        "key": segment_result["key"],
-                        "confidence": segment_result["confidence"]
-                    })
+                        "key": segment_key,
+                        "confidence": segment_confidence
+                    }
+                    for i, (segment_key, segment_confidence) in enumerate(segment_scores)
+                ]
                 
                 # Add segment analysis to the result
                 result["segments"] = segment_keys
@@ -138,3 +253,5 @@ class AdvancedKeyDetector:
                 logger.error(f"Error in segment analysis: {e}")
         
         return result
+    
+    detect = detect_key
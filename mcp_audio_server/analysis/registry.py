@@ -3,8 +3,20 @@
 import importlib
 import inspect
 import pkgutil
-from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, Type
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+
+@lru_cache(maxsize=None)
+def _package_modules(package_name: str) -> Tuple[str, ...]:
+    """Return the fully qualified names of the non-package modules in a package."""
+    package = importlib.import_module(package_name)
+    return tuple(
+        name
+        for _, name, is_pkg in pkgutil.iter_modules(package.__path__, package.__name__ + ".")
+        if not is_pkg
+    )
+
 
 class AnalysisRegistry:
     """Registry for audio analysis plugins."""
@@ -13,8 +25,15 @@ class AnalysisRegistry:
         self._detectors = {}
         
     def register(self, name: str, detector: Any) -> None:
-        """Register a detector implementation."""
-        if name in self._detectors:
+        """Register a detector implementation.
+        
+        Re-registering the same detector instance under the same name is a
+        no-op; any other detector under a taken name raises ValueError.
+        """
+        existing = self._detectors.get(name)
+        if existing is detector:
+            return
+        if existing is not None:
             raise ValueError(f"Detector with name '{name}' already registered")
         self._detectors[name] = detector
         
@@ -30,20 +49,22 @@ class AnalysisRegistry:
     
     def autodiscover(self, package_name: str = "mcp_audio_server.analysis") -> None:
         """Auto-discover and register all detectors in the package."""
-        package = importlib.import_module(package_name)
-        
-        for _, name, is_pkg in pkgutil.iter_modules(package.__path__, package.__name__ + "."):
-            if not is_pkg:
-                module = importlib.import_module(name)
-                # Register any compatible classes
-                for attr_name in dir(module):
-                    if attr_name.startswith('_'):
-                        continue
-                    
-                    attr = getattr(module, attr_name)
-                    if inspect.isclass(attr) and hasattr(attr, '_detector_name'):
-                        detector_name = getattr(attr, '_detector_name')
-                        self.register(detector_name, attr())
+        for name in _package_modules(package_name):
+            module = importlib.import_module(name)
+            # Register compatible classes defined in this module, skipping re-exports
+            for attr_name, attr in vars(module).items():
+                if attr_name.startswith('_'):
+                    continue
+                
+                if not (inspect.isclass(attr) and attr.__module__ == name):
+                    continue
+                detector_name = getattr(attr, '_detector_name', None)
+                if detector_name is None:
+                    continue
+                # Don't build a new instance for a detector that is already registered
+                if type(self._detectors.get(detector_name)) is attr:
+                    continue
+                self.register(detector_name, attr())
 
 
 def register_detector(name: str) -> Callable:
@@ -1,11 +1,12 @@
 """Tempo tracking module."""
 
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
 
 from mcp_audio_server.analysis import register_detector
+from mcp_audio_server.cache import cached_feature
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +18,18 @@ class BasicTempoDetector:
     def __init__(self, config: Optional[dict] = None):
         self.config = config or {}
         
-    def detect_tempo(self, waveform: np.ndarray, sr: int) -> Dict[str, float]:
+    def detect_tempo(
+        self, waveform: np.ndarray, sr: int, features: Optional[dict] = None
+    ) -> Dict[str, float]:
         """
         Detect tempo in audio waveform.
         
         Args:
             waveform: Audio samples as numpy array
             sr: Sample rate
+            features: Optional precomputed features; an "onset_env" entry
+                is used instead of recomputing the onset envelope. If the
+                dict has none, the computed envelope is stored in it.
             
         Returns:
             Dictionary with tempo in BPM and confidence
@@ -37,7 +43,18 @@ class BasicTempoDetector:
         logger.info(f"Analyzing tempo in audio (sr={sr})")
         
         # Extract onset envelope from audio
-        onset_env = librosa.onset.onset_strength(y=waveform, sr=sr)
+        onset_env = (features or {}).get("onset_env")
+        if onset_env is None:
+            # Single precision halves the memory traffic of the STFT
+            waveform = np.asarray(waveform, dtype=np.float32)
+            onset_env = cached_feature(
+                "onset_strength", waveform, sr,
+                lambda: librosa.onset.onset_strength(y=waveform, sr=sr),
+                {"hop_length": 512},
+            )
+            if features is not None:
+                # Hand the envelope back to the caller for reuse
+                features["onset_env"] = onset_env
         
         # Perform tempo estimation
         tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=sr)[0]
@@ -50,6 +67,8 @@ class BasicTempoDetector:
             "tempo": float(tempo),
             "confidence": confidence
         }
+    
+    detect = detect_tempo
 
 
 @register_detector("advanced_tempo")
@@ -59,16 +78,22 @@ class AdvancedTempoDetector:
     def __init__(self, config: Optional[dict] = None):
         self.config = config or {}
         
-    def detect_tempo(self, waveform: np.ndarray, sr: int) -> Dict[str, float]:
+    def detect_tempo(
+        self, waveform: np.ndarray, sr: int, features: Optional[dict] = None
+    ) -> Dict[str, Union[float, np.ndarray]]:
         """
         Advanced tempo detection with beat tracking.
         
         Args:
             waveform: Audio samples as numpy array
             sr: Sample rate
+            features: Optional precomputed features; an "onset_env" entry
+                is used instead of recomputing the onset envelope. If the
+                dict has none, the computed envelope is stored in it.
             
         Returns:
-            Dictionary with tempo in BPM, confidence, and optional beat positions
+            Dictionary with tempo in BPM, confidence, and optional beat
+            positions (float32 array of times in seconds)
         """
         try:
             import librosa
@@ -77,7 +102,18 @@ class AdvancedTempoDetector:
             return {"tempo": 0.0, "confidence": 0.0}
         
         # Extract onset envelope
-        onset_env = librosa.onset.onset_strength(y=waveform, sr=sr)
+        onset_env = (features or {}).get("onset_env")
+        if onset_env is None:
+            # Single precision halves the memory traffic of the STFT
+            waveform = np.asarray(waveform, dtype=np.float32)
+            onset_env = cached_feature(
+                "onset_strength", waveform, sr,
+                lambda: librosa.onset.onset_strength(y=waveform, sr=sr),
+                {"hop_length": 512},
+            )
+            if features is not None:
+                # Hand the envelope back to the caller for reuse
+                features["onset_env"] = onset_env
         
         # Dynamic tempo estimation
         ac_tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=sr, aggregate=None)
@@ -98,6 +134,9 @@ class AdvancedTempoDetector:
         if self.config.get("return_beats", False):
             _, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
             beat_times = librosa.frames_to_time(beats, sr=sr)
-            result["beat_positions"] = beat_times.tolist()
+            # Kept as an array; the cache serializes ndarrays in binary form
+            result["beat_positions"] = beat_times.astype(np.float32)
         
         return result
+    
+    detect = detect_tempo
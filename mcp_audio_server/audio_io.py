@@ -1,21 +1,28 @@
 """Audio input/output utilities with robust FFmpeg decoding."""
 
-import base64
 import io
 import json
 import logging
-import os
 import shutil
-import signal
 import subprocess
 import tempfile
 import time
-from contextlib import contextmanager
 from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
 
-from mcp_audio_server.security import SecureTempFile, validate_file_type, apply_resource_limits
+from mcp_audio_server.security import (
+    SecureTempFile,
+    validate_buffer_type,
+    validate_file_type,
+)
+
+# Optional in-process decoding via PyAV (FFmpeg's libraries)
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -62,24 +69,9 @@ def check_ffmpeg_available() -> Tuple[bool, str]:
         return False, ""
 
 
-@contextmanager
-def time_limit(seconds: int):
-    """Context manager to limit execution time of a block."""
-    def signal_handler(signum, frame):
-        raise AudioDecodingException(
-            "FFmpeg processing timed out", 
-            AudioDecodeError.TIMEOUT
-        )
-        
-    signal.signal(signal.SIGALRM, signal_handler)
-    signal.alarm(seconds)
-    try:
-        yield
-    finally:
-        signal.alarm(0)
-
-
-def get_audio_info(file_path: str) -> Dict[str, Union[float, int, str]]:
+def get_audio_info(
+    file_path: str, timeout: float = FFMPEG_TIMEOUT_SEC
+) -> Dict[str, Union[float, int, str]]:
     """Get audio file information using FFprobe."""
     # First, validate the file type
     is_valid, mime_type = validate_file_type(file_path)
@@ -99,7 +91,9 @@ def get_audio_info(file_path: str) -> Dict[str, Union[float, int, str]]:
     ]
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, check=True, timeout=timeout
+        )
         info = json.loads(result.stdout)
         
         # Extract relevant information
@@ -113,6 +107,11 @@ def get_audio_info(file_path: str) -> Dict[str, Union[float, int, str]]:
             "size_mb": size_bytes / (1024 * 1024),
             "codec": codec
         }
+    except subprocess.TimeoutExpired:
+        raise AudioDecodingException(
+            "FFprobe processing timed out",
+            AudioDecodeError.TIMEOUT
+        )
     except (subprocess.SubprocessError, json.JSONDecodeError) as e:
         logger.error(f"Error getting audio info: {e}")
         raise AudioDecodingException(
@@ -122,93 +121,187 @@ def get_audio_info(file_path: str) -> Dict[str, Union[float, int, str]]:
         )
 
 
-def normalize_audio(input_path: str, output_path: str = None) -> Tuple[np.ndarray, int]:
-    """Normalize audio to standard format using FFmpeg and load as numpy array."""
-    # If no output path provided, use a secure temporary file
-    temp_file = None
-    if not output_path:
-        with SecureTempFile(suffix=".wav") as secure_temp:
-            temp_file = secure_temp.name
-            output_path = temp_file
+def normalize_audio(input_path: str) -> Tuple[np.ndarray, int]:
+    """Normalize audio to standard format using FFmpeg and load as numpy array.
+    
+    FFmpeg writes raw 16-bit PCM to stdout, which is read straight into a
+    numpy buffer instead of going through an intermediate WAV file.
+    """
+    # FFprobe and FFmpeg share a single time budget
+    deadline = time.monotonic() + FFMPEG_TIMEOUT_SEC
     
     try:
-        with time_limit(FFMPEG_TIMEOUT_SEC):
-            # Get audio info to validate size and duration
-            info = get_audio_info(input_path)
-            
-            # Validate size
-            if info["size_mb"] > MAX_AUDIO_SIZE_MB:
-                raise AudioDecodingException(
-                    f"Audio file too large ({info['size_mb']:.2f} MB). Maximum allowed: {MAX_AUDIO_SIZE_MB} MB",
-                    AudioDecodeError.FILE_TOO_LARGE,
-                    {"size_mb": info["size_mb"], "max_size_mb": MAX_AUDIO_SIZE_MB}
-                )
-            
-            # Validate duration
-            if info["duration"] > MAX_AUDIO_DURATION_SEC:
-                raise AudioDecodingException(
-                    f"Audio duration too long ({info['duration']:.2f} seconds). Maximum allowed: {MAX_AUDIO_DURATION_SEC} seconds",
-                    AudioDecodeError.DURATION_TOO_LONG,
-                    {"duration": info["duration"], "max_duration": MAX_AUDIO_DURATION_SEC}
-                )
-            
-            # Normalize using FFmpeg
-            cmd = [
-                "ffmpeg",
-                "-i", input_path,
-                "-ac", str(TARGET_CHANNELS),  # Convert to mono
-                "-ar", str(TARGET_SAMPLE_RATE),  # Sample rate
-                "-sample_fmt", "s16",  # 16-bit depth
-                "-y",  # Overwrite output file if it exists
-                output_path
-            ]
-            
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+        # Get audio info to validate size and duration
+        info = get_audio_info(input_path, timeout=FFMPEG_TIMEOUT_SEC)
+        
+        # Validate size
+        if info["size_mb"] > MAX_AUDIO_SIZE_MB:
+            raise AudioDecodingException(
+                f"Audio file too large ({info['size_mb']:.2f} MB). Maximum allowed: {MAX_AUDIO_SIZE_MB} MB",
+                AudioDecodeError.FILE_TOO_LARGE,
+                {"size_mb": info["size_mb"], "max_size_mb": MAX_AUDIO_SIZE_MB}
             )
+        
+        # Validate duration
+        if info["duration"] > MAX_AUDIO_DURATION_SEC:
+            raise AudioDecodingException(
+                f"Audio duration too long ({info['duration']:.2f} seconds). Maximum allowed: {MAX_AUDIO_DURATION_SEC} seconds",
+                AudioDecodeError.DURATION_TOO_LONG,
+                {"duration": info["duration"], "max_duration": MAX_AUDIO_DURATION_SEC}
+            )
+        
+        # Normalize using FFmpeg, streaming raw PCM to stdout
+        cmd = [
+            "ffmpeg",
+            "-i", input_path,
+            "-ac", str(TARGET_CHANNELS),  # Convert to mono
+            "-ar", str(TARGET_SAMPLE_RATE),  # Sample rate
+            "-f", "s16le",  # Raw 16-bit little-endian PCM
+            "-"
+        ]
+        
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        try:
+            raw, stderr = process.communicate(
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise AudioDecodingException(
+                "FFmpeg processing timed out", 
+                AudioDecodeError.TIMEOUT
+            )
+        
+        if process.returncode != 0:
+            stderr_str = stderr.decode("utf-8", errors="replace")
+            logger.error(f"FFmpeg error: {stderr_str}")
+            raise AudioDecodingException(
+                "Failed to decode audio", 
+                AudioDecodeError.DECODE_FAILED,
+                {"ffmpeg_error": stderr_str}
+            )
+        
+        # Scale 16-bit samples to [-1, 1) the same way soundfile does
+        audio_data = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+        
+        return audio_data, TARGET_SAMPLE_RATE
+
+    except AudioDecodingException:
+        raise  # Re-raise without modification
+    except Exception as e:
+        logger.error(f"Error normalizing audio: {e}")
+        raise AudioDecodingException(
+            f"Failed to normalize audio: {e}",
+            AudioDecodeError.DECODE_FAILED,
+            {"error": str(e)}
+        )
+
+
+def decode_with_pyav(binary_data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode and normalize audio bytes in-process with PyAV.
+    
+    Produces the same output as normalize_audio (mono, TARGET_SAMPLE_RATE,
+    16-bit samples loaded as float32) without spawning FFmpeg or touching
+    the filesystem.
+    
+    Args:
+        binary_data: Raw audio file bytes
+        
+    Returns:
+        Tuple of (audio_samples, sample_rate)
+        
+    Raises:
+        AudioDecodingException: For any decoding errors with structured info
+    """
+    is_valid, mime_type = validate_buffer_type(binary_data)
+    if not is_valid:
+        raise AudioDecodingException(
+            f"Invalid file type: {mime_type}",
+            AudioDecodeError.INVALID_FILE_TYPE,
+            {"detected_mime": mime_type}
+        )
+    
+    # Validate size
+    size_mb = len(binary_data) / (1024 * 1024)
+    if size_mb > MAX_AUDIO_SIZE_MB:
+        raise AudioDecodingException(
+            f"Audio file too large ({size_mb:.2f} MB). Maximum allowed: {MAX_AUDIO_SIZE_MB} MB",
+            AudioDecodeError.FILE_TOO_LARGE,
+            {"size_mb": size_mb, "max_size_mb": MAX_AUDIO_SIZE_MB}
+        )
+    
+    def duration_error(duration: float) -> AudioDecodingException:
+        return AudioDecodingException(
+            f"Audio duration too long ({duration:.2f} seconds). Maximum allowed: {MAX_AUDIO_DURATION_SEC} seconds",
+            AudioDecodeError.DURATION_TOO_LONG,
+            {"duration": duration, "max_duration": MAX_AUDIO_DURATION_SEC}
+        )
+    
+    try:
+        deadline = time.monotonic() + FFMPEG_TIMEOUT_SEC
+        with av.open(io.BytesIO(binary_data)) as container:
+            # Validate duration from the container header when available
+            if container.duration is not None:
+                duration = container.duration / av.time_base
+                if duration > MAX_AUDIO_DURATION_SEC:
+                    raise duration_error(duration)
             
-            _, stderr = process.communicate()
-            
-            if process.returncode != 0:
-                stderr_str = stderr.decode("utf-8", errors="replace")
-                logger.error(f"FFmpeg error: {stderr_str}")
-                raise AudioDecodingException(
-                    "Failed to decode audio", 
-                    AudioDecodeError.DECODE_FAILED,
-                    {"ffmpeg_error": stderr_str}
-                )
+            resampler = av.AudioResampler(
+                format="s16", layout="mono", rate=TARGET_SAMPLE_RATE
+            )
+            max_samples = MAX_AUDIO_DURATION_SEC * TARGET_SAMPLE_RATE
+            chunks = []
+            n_samples = 0
             
-            # Load normalized audio data
-            import soundfile as sf
-            audio_data, sample_rate = sf.read(output_path)
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    chunk = resampled.to_ndarray().reshape(-1)
+                    chunks.append(chunk)
+                    n_samples += len(chunk)
+                # Guard against containers without (or with wrong) duration info
+                if n_samples > max_samples:
+                    raise duration_error(n_samples / TARGET_SAMPLE_RATE)
+                if time.monotonic() > deadline:
+                    raise AudioDecodingException(
+                        "Audio decoding timed out",
+                        AudioDecodeError.TIMEOUT
+                    )
             
-            return audio_data, sample_rate
-    
+            # Flush samples buffered in the resampler
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray().reshape(-1))
     except AudioDecodingException:
         raise  # Re-raise without modification
     except Exception as e:
-        logger.error(f"Error normalizing audio: {e}")
+        logger.error(f"Error decoding audio with PyAV: {e}")
         raise AudioDecodingException(
-            f"Failed to normalize audio: {e}",
+            f"Failed to decode audio: {e}",
             AudioDecodeError.DECODE_FAILED,
             {"error": str(e)}
         )
-    finally:
-        # Clean up temporary file if created
-        if temp_file and os.path.exists(output_path):
-            try:
-                os.unlink(output_path)
-            except Exception as e:
-                logger.warning(f"Failed to clean up temporary file: {e}")
+    
+    if not chunks:
+        raise AudioDecodingException(
+            "Failed to decode audio: no audio samples found",
+            AudioDecodeError.DECODE_FAILED
+        )
+    
+    # Scale 16-bit samples to [-1, 1) the same way soundfile does
+    audio = np.concatenate(chunks).astype(np.float32) / 32768.0
+    return audio, TARGET_SAMPLE_RATE
 
 
-def decode_audio(audio_data: str, format_type: str) -> Tuple[np.ndarray, int]:
-    """Decode base64-encoded audio data into numpy array using FFmpeg.
+def decode_audio(binary_data: bytes, format_type: str) -> Tuple[np.ndarray, int]:
+    """Decode raw audio file bytes into numpy array using PyAV or FFmpeg.
     
     Args:
-        audio_data: Base64-encoded audio data
+        binary_data: Encoded audio file contents (already base64-decoded)
         format_type: Format of the audio data ('wav', 'mp3', etc.)
         
     Returns:
@@ -217,8 +310,9 @@ def decode_audio(audio_data: str, format_type: str) -> Tuple[np.ndarray, int]:
     Raises:
         AudioDecodingException: For any decoding errors with structured info
     """
-    # Apply resource limits
-    apply_resource_limits()
+    # Decode in-process when PyAV is installed
+    if PYAV_AVAILABLE:
+        return decode_with_pyav(binary_data)
     
     # Check if FFmpeg is available
     is_ffmpeg_available, version = check_ffmpeg_available()
@@ -230,27 +324,11 @@ def decode_audio(audio_data: str, format_type: str) -> Tuple[np.ndarray, int]:
     
     logger.info(f"Using FFmpeg: {version}")
     
-    # Create secure temporary files for input and output
+    # Create a secure temporary file for the FFmpeg input
     with SecureTempFile(suffix=f".{format_type}") as input_file:
-        try:
-            # Decode base64 data
-            try:
-                binary_data = base64.b64decode(audio_data)
-            except Exception as e:
-                logger.error(f"Error decoding base64 data: {e}")
-                raise AudioDecodingException(
-                    f"Invalid base64 data: {e}",
-                    AudioDecodeError.DECODE_FAILED,
-                    {"error": str(e)}
-                )
-            
-            # Write to temporary file
-            input_file.write(binary_data)
-            input_file.flush()
-            
-            # Normalize and load audio data
-            return normalize_audio(input_file.name)
-            
-        finally:
-            # Cleanup is handled by the context manager
-            pass
+        # Write to temporary file
+        input_file.write(binary_data)
+        input_file.flush()
+        
+        # Normalize and load audio data
+        return normalize_audio(input_file.name)
@@ -2,12 +2,16 @@
 
 import asyncio
 import hashlib
+import importlib.metadata
 import json
 import os
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -16,16 +20,30 @@ logger = structlog.get_logger(__name__)
 CACHE_DIR = os.environ.get("MCP_CACHE_DIR", "/var/lib/mcp/cache")
 DEFAULT_CACHE_TTL = int(os.environ.get("MCP_CACHE_TTL", 24 * 60 * 60))  # 24 hours in seconds
 MAX_CACHE_SIZE = int(os.environ.get("MCP_CACHE_SIZE_MB", 1024)) * 1024 * 1024  # MB to bytes
+FEATURE_CACHE_ENABLED = os.environ.get("MCP_FEATURE_CACHE", "0") == "1"
+MEMORY_CACHE_SIZE = int(os.environ.get("MCP_MEMORY_CACHE_SIZE", 1024))  # Entries
 
-# Lock for cache operations
+# Chunk size for hashing files and streams
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+# Payloads at least this long are hashed and decoded off the event loop thread
+PAYLOAD_HASH_THREAD_MIN = 1 << 20
+
+# Lock for cache eviction; reads and writes rely on atomic file replacement
 _cache_lock = asyncio.Lock()
 
+# Optional binary serialization for file cache entries
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
 # Optional Redis support
 try:
-    import redis
+    import redis.asyncio as aioredis
     REDIS_URL = os.environ.get("MCP_REDIS_URL")
     if REDIS_URL:
-        redis_client = redis.from_url(REDIS_URL)
+        redis_client = aioredis.from_url(REDIS_URL)
         REDIS_AVAILABLE = True
     else:
         REDIS_AVAILABLE = False
@@ -33,17 +51,138 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 
-def compute_file_hash(file_bytes: bytes) -> str:
+class MemoryCache:
+    """Thread-safe in-process LRU cache with a per-entry time-to-live."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live entry, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store an entry, evicting the least recently used beyond maxsize.
+        
+        Args:
+            ttl: Lifetime in seconds; defaults to the cache's ttl. Entries
+                copied from another cache tier pass their remaining lifetime.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def expire(self) -> None:
+        """Drop all expired entries."""
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._entries.items() if now >= expires_at]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Hot analysis results, checked before Redis and the file cache
+_memory_cache = MemoryCache(MEMORY_CACHE_SIZE, DEFAULT_CACHE_TTL)
+
+
+# msgpack extension type code for numpy arrays
+_NDARRAY_EXT_TYPE = 1
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Pack numpy arrays as raw bytes with a dtype/shape header."""
+    if isinstance(obj, np.ndarray):
+        header = [obj.dtype.str, list(obj.shape), np.ascontiguousarray(obj).tobytes()]
+        return msgpack.ExtType(_NDARRAY_EXT_TYPE, msgpack.packb(header, use_bin_type=True))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    """Restore numpy arrays packed by _msgpack_default."""
+    if code == _NDARRAY_EXT_TYPE:
+        dtype, shape, buffer = msgpack.unpackb(data, raw=False)
+        return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+    return msgpack.ExtType(code, data)
+
+
+def _json_default(obj: Any) -> Any:
+    """Fall back to lists for numpy values in JSON cache entries."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
+
+
+def compute_file_hash(source: Union[bytes, bytearray, memoryview, str, os.PathLike, BinaryIO]) -> str:
     """
     Compute a unique hash for a file.
     
+    In-memory buffers are passed to hashlib in a single call; paths and
+    file objects are read in HASH_CHUNK_SIZE chunks so the whole file never
+    has to be held in memory. hashlib's OpenSSL backend uses the CPU's SHA
+    extensions (SHA-NI, ARMv8 crypto) where available.
+    
     Args:
-        file_bytes: Raw file bytes
+        source: Raw file bytes, a file path, or a binary file object
         
     Returns:
         SHA-256 hash hex digest
     """
-    return hashlib.sha256(file_bytes).hexdigest()
+    digest = hashlib.sha256()
+    
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    else:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    
+    return digest.hexdigest()
+
+
+def compute_payload_hash(payload: Union[str, bytes]) -> str:
+    """
+    Compute a cache key from a request payload.
+    
+    Hashing the base64-encoded string directly means a cache hit never has to
+    base64-decode the audio. hashlib releases the GIL for large buffers, so
+    callers can run this in a thread for big payloads.
+    
+    Args:
+        payload: Base64-encoded audio data, or raw audio file bytes
+        
+    Returns:
+        128-bit BLAKE2b hex digest
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("ascii")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
 
 def get_cache_path(cache_key: str) -> Path:
@@ -54,7 +193,8 @@ def get_cache_path(cache_key: str) -> Path:
         cache_key: Cache key (hash)
         
     Returns:
-        Path object for the cached file
+        Path object for the cached file (.msgpack when msgpack is installed,
+        .json otherwise)
     """
     # Use a two-level directory structure to avoid too many files in one directory
     prefix = cache_key[:2]
@@ -69,7 +209,78 @@ def get_cache_path(cache_key: str) -> Path:
             # Fall back to the root cache directory
             cache_dir = Path(CACHE_DIR)
     
-    return cache_dir / f"{cache_key}.json"
+    suffix = ".msgpack" if MSGPACK_AVAILABLE else ".json"
+    return cache_dir / f"{cache_key}{suffix}"
+
+
+def _feature_library_version() -> str:
+    """Version of the library that computes cached features."""
+    global _FEATURE_LIBRARY_VERSION
+    if _FEATURE_LIBRARY_VERSION is None:
+        try:
+            _FEATURE_LIBRARY_VERSION = importlib.metadata.version("librosa")
+        except importlib.metadata.PackageNotFoundError:
+            _FEATURE_LIBRARY_VERSION = "none"
+    return _FEATURE_LIBRARY_VERSION
+
+
+_FEATURE_LIBRARY_VERSION: Optional[str] = None
+
+
+def cached_feature(
+    name: str,
+    waveform: np.ndarray,
+    sr: int,
+    compute_fn: Callable[[], np.ndarray],
+    params: Optional[Dict[str, Any]] = None,
+) -> np.ndarray:
+    """
+    Get an intermediate feature array, computing and caching it on a miss.
+    
+    Features are stored as .npy files keyed by the feature name, sample rate,
+    compute parameters, librosa version and a hash of the waveform samples,
+    and are memory-mapped on a hit.
+    
+    Args:
+        name: Feature name (e.g. "chroma_cqt")
+        waveform: Audio samples the feature is computed from
+        sr: Sample rate
+        compute_fn: Callable that computes the feature on a cache miss
+        params: Parameters compute_fn depends on (hop length, target rate, ...)
+        
+    Returns:
+        Feature array
+    """
+    if not FEATURE_CACHE_ENABLED:
+        return compute_fn()
+    
+    samples = np.ascontiguousarray(waveform)
+    digest = hashlib.sha256(samples.dtype.str.encode())
+    digest.update(samples.data)
+    digest.update(repr(sorted((params or {}).items())).encode())
+    digest.update(_feature_library_version().encode())
+    cache_path = get_cache_path(f"{digest.hexdigest()}_{name}_{sr}").with_suffix(".npy")
+    
+    try:
+        if cache_path.exists():
+            return np.load(cache_path, mmap_mode='r')
+    except Exception as e:
+        logger.warning("Error reading cached feature", error=str(e), feature=name)
+    
+    feature = compute_fn()
+    
+    # Write to a temporary file first so readers never see a partial array
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, feature)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning("Error saving cached feature", error=str(e), feature=name)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    
+    return feature
 
 
 async def get_from_cache(cache_key: str) -> Optional[Dict[str, Any]]:
@@ -82,12 +293,23 @@ async def get_from_cache(cache_key: str) -> Optional[Dict[str, Any]]:
     Returns:
         Cached result or None if not found or expired
     """
-    # Try Redis first if available
+    # Try the in-process cache first
+    result = _memory_cache.get(cache_key)
+    if result is not None:
+        return result
+    
+    # Then Redis if available
     if REDIS_AVAILABLE:
         try:
-            cached_data = redis_client.get(f"mcp:analysis:{cache_key}")
+            redis_key = f"mcp:analysis:{cache_key}"
+            # Fetch the remaining TTL in the same round trip
+            async with redis_client.pipeline(transaction=False) as pipe:
+                cached_data, remaining = await pipe.get(redis_key).ttl(redis_key).execute()
             if cached_data:
-                return json.loads(cached_data)
+                result = json.loads(cached_data)
+                if remaining is not None and remaining > 0:
+                    _memory_cache.set(cache_key, result, ttl=remaining)
+                return result
         except Exception as e:
             logger.warning("Redis cache retrieval failed", error=str(e))
     
@@ -95,26 +317,55 @@ async def get_from_cache(cache_key: str) -> Optional[Dict[str, Any]]:
     cache_path = get_cache_path(cache_key)
     
     if not cache_path.exists():
-        return None
+        # Entries written before msgpack was available are stored as JSON
+        cache_path = cache_path.with_suffix(".json")
+        if not cache_path.exists():
+            return None
     
     try:
-        async with _cache_lock:
-            # Check if the file is expired
-            stat = cache_path.stat()
-            current_time = time.time()
-            
-            if current_time - stat.st_mtime > DEFAULT_CACHE_TTL:
-                logger.debug("Cache entry expired", key=cache_key)
-                # Delete expired entry
-                cache_path.unlink()
-                return None
-            
-            # Load the cache entry
-            with open(cache_path, 'r') as f:
-                return json.load(f)
+        entry = await asyncio.to_thread(_read_cache_file, cache_key, cache_path)
     except Exception as e:
         logger.error("Error reading from cache", error=str(e), key=cache_key)
         return None
+    
+    if entry is None:
+        return None
+    result, remaining = entry
+    _memory_cache.set(cache_key, result, ttl=remaining)
+    return result
+
+
+def _read_cache_file(
+    cache_key: str, cache_path: Path
+) -> Optional[Tuple[Dict[str, Any], float]]:
+    """
+    Load a file cache entry, deleting it if it has expired.
+    
+    Returns:
+        Tuple of (entry, remaining lifetime in seconds), or None
+    """
+    try:
+        # Check if the file is expired
+        stat = cache_path.stat()
+    except FileNotFoundError:
+        # Removed by a concurrent expiry or eviction
+        return None
+    
+    remaining = DEFAULT_CACHE_TTL - (time.time() - stat.st_mtime)
+    if remaining <= 0:
+        logger.debug("Cache entry expired", key=cache_key)
+        # Delete expired entry
+        cache_path.unlink(missing_ok=True)
+        return None
+    
+    # Load the cache entry
+    if cache_path.suffix == ".msgpack":
+        with open(cache_path, 'rb') as f:
+            data = msgpack.unpackb(f.read(), raw=False, ext_hook=_msgpack_ext_hook)
+    else:
+        with open(cache_path, 'r') as f:
+            data = json.load(f)
+    return data, remaining
 
 
 async def save_to_cache(cache_key: str, data: Dict[str, Any]) -> bool:
@@ -128,13 +379,15 @@ async def save_to_cache(cache_key: str, data: Dict[str, Any]) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    _memory_cache.set(cache_key, data)
+    
     # Try Redis first if available
     if REDIS_AVAILABLE:
         try:
-            redis_client.setex(
+            await redis_client.setex(
                 f"mcp:analysis:{cache_key}",
                 DEFAULT_CACHE_TTL,
-                json.dumps(data)
+                json.dumps(data, default=_json_default)
             )
             logger.debug("Saved to Redis cache", key=cache_key)
             # Still save to file cache as backup
@@ -145,93 +398,119 @@ async def save_to_cache(cache_key: str, data: Dict[str, Any]) -> bool:
     cache_path = get_cache_path(cache_key)
     
     try:
-        async with _cache_lock:
-            with open(cache_path, 'w') as f:
-                json.dump(data, f)
-            logger.debug("Saved to file cache", key=cache_key, path=str(cache_path))
-            return True
+        await asyncio.to_thread(_write_cache_file, cache_path, data)
+        logger.debug("Saved to file cache", key=cache_key, path=str(cache_path))
+        return True
     except Exception as e:
         logger.error("Error saving to cache", error=str(e), key=cache_key)
         return False
 
 
+def _write_cache_file(cache_path: Path, data: Dict[str, Any]) -> None:
+    """Write a file cache entry atomically so readers never see a partial file."""
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if MSGPACK_AVAILABLE:
+            with open(tmp_path, 'wb') as f:
+                f.write(msgpack.packb(data, use_bin_type=True, default=_msgpack_default))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, default=_json_default)
+        os.replace(tmp_path, cache_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
 async def clean_cache() -> None:
     """
     Clean up expired and excess cache entries.
     """
+    _memory_cache.expire()
+    
     cache_dir = Path(CACHE_DIR)
     if not cache_dir.exists():
         return
     
     try:
+        # Get all cache files
+        files = await asyncio.to_thread(_scan_cache_files, cache_dir)
+        
         async with _cache_lock:
-            # Get all cache files
-            files = []
-            for path in cache_dir.glob('**/*.json'):
-                if path.is_file():
-                    stat = path.stat()
-                    files.append((path, stat.st_mtime, stat.st_size))
-            
-            # Remove expired files
-            current_time = time.time()
-            for path, mtime, _ in files:
-                if current_time - mtime > DEFAULT_CACHE_TTL:
-                    try:
-                        path.unlink()
-                        logger.debug("Removed expired cache entry", path=str(path))
-                    except Exception as e:
-                        logger.warning("Failed to remove expired cache entry", error=str(e), path=str(path))
-            
-            # Check cache size and remove oldest files if over limit
-            files = [(path, mtime, size) for path, mtime, size in files if path.exists()]
-            files.sort(key=lambda x: x[1])  # Sort by modification time
-            
-            total_size = sum(size for _, _, size in files)
-            while total_size > MAX_CACHE_SIZE and files:
-                path, _, size = files.pop(0)  # Remove oldest file
-                try:
-                    path.unlink()
-                    total_size -= size
-                    logger.debug("Removed oldest cache entry to reduce cache size", path=str(path))
-                except Exception as e:
-                    logger.warning("Failed to remove cache entry", error=str(e), path=str(path))
+            await asyncio.to_thread(_evict_cache_files, files)
     except Exception as e:
         logger.error("Error cleaning cache", error=str(e))
 
 
+def _scan_cache_files(cache_dir: Path) -> List[Tuple[Path, float, int]]:
+    """Return (path, mtime, size) for every cache entry under cache_dir."""
+    files = []
+    for path in cache_dir.glob('**/*'):
+        if path.suffix in ('.json', '.msgpack', '.npy', '.tmp') and path.is_file():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path, stat.st_mtime, stat.st_size))
+    return files
+
+
+def _evict_cache_files(files: List[Tuple[Path, float, int]]) -> None:
+    """Remove expired entries, then the oldest entries while over MAX_CACHE_SIZE."""
+    # Remove expired files
+    current_time = time.time()
+    for path, mtime, _ in files:
+        if current_time - mtime > DEFAULT_CACHE_TTL:
+            try:
+                path.unlink(missing_ok=True)
+                logger.debug("Removed expired cache entry", path=str(path))
+            except Exception as e:
+                logger.warning("Failed to remove expired cache entry", error=str(e), path=str(path))
+    
+    # Check cache size and remove oldest files if over limit
+    files = [(path, mtime, size) for path, mtime, size in files if path.exists()]
+    files.sort(key=lambda x: x[1])  # Sort by modification time
+    
+    total_size = sum(size for _, _, size in files)
+    while total_size > MAX_CACHE_SIZE and files:
+        path, _, size = files.pop(0)  # Remove oldest file
+        try:
+            path.unlink(missing_ok=True)
+            total_size -= size
+            logger.debug("Removed oldest cache entry to reduce cache size", path=str(path))
+        except Exception as e:
+            logger.warning("Failed to remove cache entry", error=str(e), path=str(path))
+
+
 class PerformanceStats:
     """Utility for measuring and reporting performance statistics."""
     
     def __init__(self, operation_name: str):
         self.operation_name = operation_name
         self.start_time = time.perf_counter()
-        self.checkpoints = {}
+        self.checkpoints = {}  # Elapsed time since start, by checkpoint name
+        self.intervals = {}  # Time between consecutive checkpoints
+        self._last_name = "start"
+        self._last_time = self.start_time
     
     def checkpoint(self, name: str) -> float:
         """Record a checkpoint and return the time since the last checkpoint."""
         now = time.perf_counter()
-        elapsed = now - self.start_time
-        self.checkpoints[name] = elapsed
-        return elapsed
+        delta = now - self._last_time
+        self.checkpoints[name] = now - self.start_time
+        self.intervals[f"{self._last_name}_to_{name}"] = delta
+        self._last_name = name
+        self._last_time = now
+        return delta
     
     def finish(self) -> Dict[str, float]:
         """Finish timing and return all checkpoint times."""
         self.checkpoint("total")
         
-        # Calculate time between checkpoints
-        checkpoint_names = sorted(self.checkpoints.keys(), key=lambda k: self.checkpoints[k])
-        intervals = {}
-        
-        for i in range(1, len(checkpoint_names)):
-            prev = checkpoint_names[i-1]
-            curr = checkpoint_names[i]
-            intervals[f"{prev}_to_{curr}"] = self.checkpoints[curr] - self.checkpoints[prev]
-        
         result = {
             "operation": self.operation_name,
             "total_time": self.checkpoints["total"],
             "checkpoints": self.checkpoints,
-            "intervals": intervals
+            "intervals": self.intervals
         }
         
         logger.info(
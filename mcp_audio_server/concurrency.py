@@ -1,21 +1,40 @@
 """Concurrency controls and resource management."""
 
 import asyncio
+import atexit
 import logging
 import os
 import resource
 import time
+import warnings
 from concurrent.futures import ProcessPoolExecutor
-from functools import wraps
-from typing import Any, Callable, Dict, Optional
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial, wraps
+from multiprocessing import shared_memory
+from typing import (Any, AsyncIterator, Callable, Dict, Iterator, NamedTuple,
+                    Optional, Tuple)
 
+import numpy as np
+import psutil
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 # Load configuration from environment variables
-MAX_WORKERS = int(os.environ.get("MCP_MAX_WORKERS", os.cpu_count() or 4))
+# Default to physical cores: FFT-heavy workers gain nothing from SMT siblings
+# and each one carries its own librosa/NumPy memory footprint
+MAX_WORKERS_CAP = int(os.environ.get("MCP_MAX_WORKERS_CAP", 8))
+MAX_WORKERS = min(
+    int(os.environ.get("MCP_MAX_WORKERS")
+        or psutil.cpu_count(logical=False) or os.cpu_count() or 2),
+    MAX_WORKERS_CAP,
+)
 MAX_MEMORY_MB = int(os.environ.get("MCP_MAX_MEMORY_MB", 1024))  # 1GB default
+MAX_OPEN_FILES = int(os.environ.get("MCP_MAX_OPEN_FILES", 1024))
+# RLIMIT_NPROC counts every thread of the user, not just this worker's
+MAX_PROCS = int(os.environ.get("MCP_MAX_PROCS", 4096))
+DISABLE_RLIMIT = os.environ.get("MCP_DISABLE_RLIMIT", "0") == "1"
+ADMISSION_RETRIES = int(os.environ.get("MCP_ADMISSION_RETRIES", 3))
 REQUEST_TIMEOUT = int(os.environ.get("MCP_REQUEST_TIMEOUT", 30))  # 30 seconds default
 MAX_CONCURRENT = int(os.environ.get("MCP_MAX_CONCURRENT", 10))
 MAX_QUEUE_SIZE = int(os.environ.get("MCP_MAX_QUEUE_SIZE", 100))
@@ -38,51 +57,223 @@ class ServerBusy(Exception):
         super().__init__(f"Server busy, retry after {retry_after} seconds")
 
 
-# Semaphore for limiting concurrent requests
+# Semaphore for limiting concurrent requests; waiters are woken in FIFO order
 _request_semaphore = asyncio.Semaphore(MAX_CONCURRENT)
-_active_requests = 0
-_request_queue = []
+# Number of requests waiting for a slot. Only touched from the event loop
+# with no await between check and update, so it needs no lock.
+_waiting_requests = 0
+
+# Worker pool for CPU-bound analysis, created by start_process_pool()
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+_LIMITS_APPLIED = False
+
+# CPU seconds each pool task may use; armed per task because RLIMIT_CPU
+# counts the whole process lifetime and pool workers are long-lived
+TASK_CPU_BUDGET = REQUEST_TIMEOUT * 2  # Give some extra headroom
+
+
+def _set_limit(limit: int, value: int) -> None:
+    """Lower a soft limit to value, keeping the hard limit; never loosen it."""
+    soft, hard = resource.getrlimit(limit)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    if soft != resource.RLIM_INFINITY and soft <= value:
+        return  # Already at least as strict, e.g. set by the container runtime
+    resource.setrlimit(limit, (value, hard))
 
 
 def apply_resource_limits():
-    """Apply OS-level resource limits to the current process."""
+    """
+    Apply OS-level resource limits to the current process.
+    
+    Limits are only ever tightened, and only on the first call. The memory
+    cap uses RLIMIT_DATA rather than RLIMIT_AS: the address space also
+    counts mapped BLAS/LLVM libraries, thread stacks and shared memory, so
+    an RLIMIT_AS cap fails allocations at unpredictable points. These
+    limits are a per-worker backstop only; production deployments should
+    bound memory with cgroups (e.g. systemd MemoryHigh=/MemoryMax=).
+    Set MCP_DISABLE_RLIMIT=1 to skip them entirely.
+    """
+    global _LIMITS_APPLIED
+    if _LIMITS_APPLIED:
+        return
+    _LIMITS_APPLIED = True
+    
+    if DISABLE_RLIMIT:
+        logger.info("Resource limits disabled")
+        return
+    
     # Convert MB to bytes
     max_memory_bytes = MAX_MEMORY_MB * 1024 * 1024
     
     try:
-        # Set memory limit
-        resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes, max_memory_bytes))
+        # Set heap memory limit
+        _set_limit(resource.RLIMIT_DATA, max_memory_bytes)
         
-        # Optionally, set CPU time limit
-        cpu_time_limit = REQUEST_TIMEOUT * 2  # Give some extra headroom
-        resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_limit, cpu_time_limit))
+        # Bound file descriptors and processes/threads
+        _set_limit(resource.RLIMIT_NOFILE, MAX_OPEN_FILES)
+        _set_limit(resource.RLIMIT_NPROC, MAX_PROCS)
         
         logger.info("Resource limits applied", 
                     memory_limit_mb=MAX_MEMORY_MB, 
-                    cpu_time_limit=cpu_time_limit)
+                    task_cpu_budget=TASK_CPU_BUDGET,
+                    open_files_limit=MAX_OPEN_FILES,
+                    procs_limit=MAX_PROCS)
     except (ValueError, resource.error) as e:
         logger.warning("Failed to set resource limits", error=str(e))
 
 
+def _arm_task_cpu_limit() -> None:
+    """Allow the current process TASK_CPU_BUDGET more CPU seconds from now."""
+    if DISABLE_RLIMIT:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + TASK_CPU_BUDGET
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, resource.error) as e:
+        logger.warning("Failed to set CPU time limit", error=str(e))
+
+
+def _warm_up_analysis() -> None:
+    """
+    Run the analysis front ends once on a short tone.
+    
+    The first call in a process pays for librosa's lazy submodule imports,
+    numba dispatch, FFT plan setup and CQT filter construction; doing it at
+    worker start keeps that off the first request each worker serves.
+    """
+    try:
+        import librosa
+        from mcp_audio_server.audio_io import TARGET_SAMPLE_RATE
+        
+        t = np.arange(TARGET_SAMPLE_RATE, dtype=np.float32) / TARGET_SAMPLE_RATE
+        tone = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+        with warnings.catch_warnings():
+            # The low CQT octaves warn about the clip being short
+            warnings.simplefilter("ignore")
+            librosa.stft(tone, n_fft=2048)
+            librosa.onset.onset_strength(y=tone, sr=TARGET_SAMPLE_RATE)
+            librosa.feature.chroma_cqt(y=tone, sr=TARGET_SAMPLE_RATE)
+    except Exception as e:
+        # An exception here would break the whole pool; warm-up is optional
+        logger.warning("Worker warm-up failed", error=str(e))
+
+
+def _worker_init() -> None:
+    """Process pool initializer: apply resource limits, then warm up."""
+    apply_resource_limits()
+    _warm_up_analysis()
+
+
+def start_process_pool() -> ProcessPoolExecutor:
+    """Create the worker process pool if it doesn't exist yet."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                            initializer=_worker_init)
+        atexit.register(shutdown_process_pool)
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the worker process pool without waiting for running tasks."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+class SharedArray(NamedTuple):
+    """Picklable handle to an array published in shared memory."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+@contextmanager
+def shared_array(array: np.ndarray) -> Iterator[SharedArray]:
+    """
+    Copy an array into a shared memory segment for the duration of the block.
+    
+    Pass the yielded handle to run_in_process_pool in place of the array:
+    workers map the segment instead of unpickling their own copy. The
+    segment is unlinked on exit, so every task using it must have finished.
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        yield SharedArray(shm.name, array.shape, array.dtype.str)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _call_with_shared_arrays(func: Callable, *args, **kwargs) -> Any:
+    """Map SharedArray arguments into this process, then call func."""
+    segments = []
+    
+    def attach(value):
+        if not isinstance(value, SharedArray):
+            return value
+        shm = shared_memory.SharedMemory(name=value.name)
+        segments.append(shm)
+        view = np.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)
+        view.flags.writeable = False
+        return view
+    
+    args = tuple(attach(arg) for arg in args)
+    kwargs = {key: attach(value) for key, value in kwargs.items()}
+    try:
+        return func(*args, **kwargs)
+    finally:
+        del args, kwargs
+        for shm in segments:
+            try:
+                shm.close()
+            except BufferError:
+                # func kept a view alive; the mapping goes when that does
+                pass
+
+
+def _run_pool_task(func: Callable, *args, **kwargs) -> Any:
+    """Worker-side entry point: arm the CPU budget, then call func."""
+    _arm_task_cpu_limit()
+    if any(isinstance(value, SharedArray)
+           for value in (*args, *kwargs.values())):
+        return _call_with_shared_arrays(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
 async def run_in_process_pool(func: Callable, *args, **kwargs) -> Any:
     """Run a CPU-intensive function in a process pool with resource limits."""
     loop = asyncio.get_running_loop()
+    # The server creates the pool at startup; other callers get one on first use
+    pool = _process_pool or start_process_pool()
     
-    # Initialize the process pool if it doesn't exist
-    global _process_pool
-    if '_process_pool' not in globals():
-        _process_pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, 
-                                          initializer=apply_resource_limits)
+    call = partial(_run_pool_task, func, *args, **kwargs)
     
     # Run the function in the process pool
     try:
-        return await loop.run_in_executor(_process_pool, 
-                                        lambda: func(*args, **kwargs))
+        return await loop.run_in_executor(pool, call)
     except Exception as e:
         logger.exception("Error in process pool", error=str(e))
         raise
 
 
+async def run_in_thread(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking, mostly non-CPU-bound function in the default thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+
 async def with_concurrency_control(func: Callable, *args, **kwargs) -> Any:
     """
     Run a function with concurrency control, timeouts, and resource limits.
@@ -99,55 +290,125 @@ async def with_concurrency_control(func: Callable, *args, **kwargs) -> Any:
         ServerBusy: If the server is too busy to process the request
         ResourceLimitExceeded: If a resource limit is exceeded
     """
-    global _active_requests, _request_queue
+    return await _run_admitted(run_in_process_pool, func, *args, **kwargs)
+
+
+async def with_thread_concurrency_control(func: Callable, *args, **kwargs) -> Any:
+    """
+    Like with_concurrency_control, but run the function in a thread.
     
-    # Check if we're over capacity
-    if _active_requests >= MAX_CONCURRENT:
-        # Check if the queue is full
-        if len(_request_queue) >= MAX_QUEUE_SIZE:
-            raise ServerBusy()
-        
-        # Add to queue and wait
-        future = asyncio.Future()
-        _request_queue.append(future)
+    For work that mostly waits on subprocesses or I/O, where pickling the
+    arguments and result to a worker process would cost more than the work.
+    """
+    return await _run_admitted(run_in_thread, func, *args, **kwargs)
+
+
+async def with_admission_retry(func: Callable, *args,
+                               max_retries: Optional[int] = None,
+                               timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Await func(*args, **kwargs), retrying when it is rejected with ServerBusy.
+    
+    Used for admission (see admission_context) so a short burst is absorbed
+    in the server instead of surfacing as a 503. Waits
+    min(retry_after, 2**attempt) seconds between attempts. All attempts and
+    waits share one deadline, so a request that queued for its whole budget
+    is not queued again.
+    
+    Args:
+        func: Async function that may raise ServerBusy
+        max_retries: Retries after the first attempt (default ADMISSION_RETRIES)
+        timeout: Seconds for all attempts together (default REQUEST_TIMEOUT)
+        *args, **kwargs: Arguments to pass to the function
         
-        try:
-            # Wait for our turn with a timeout
-            await asyncio.wait_for(future, timeout=REQUEST_TIMEOUT)
-        except asyncio.TimeoutError:
-            # Remove from queue if we're still there
-            if future in _request_queue:
-                _request_queue.remove(future)
-            raise ServerBusy(retry_after=30)
-    
-    # We've acquired the semaphore, increment active requests
-    _active_requests += 1
+    Raises:
+        ServerBusy: If every attempt was rejected or the deadline passed
+    """
+    if max_retries is None:
+        max_retries = ADMISSION_RETRIES
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
     
     try:
-        # Run the function with a timeout
-        start_time = time.time()
-        result = await asyncio.wait_for(
-            run_in_process_pool(func, *args, **kwargs),
-            timeout=REQUEST_TIMEOUT
-        )
-        
-        # Log execution time
-        execution_time = time.time() - start_time
-        logger.info("Function executed successfully", 
-                    func=func.__name__, 
-                    execution_time=execution_time)
+        async with asyncio.timeout(timeout):
+            for attempt in range(max_retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except ServerBusy as e:
+                    if attempt == max_retries:
+                        raise
+                    delay = min(e.retry_after, 2 ** attempt)
+                    logger.info("Server busy, retrying", attempt=attempt + 1, delay=delay)
+                    await asyncio.sleep(delay)
+    except asyncio.TimeoutError:
+        raise ServerBusy(retry_after=30) from None
+
+
+async def _acquire_slot() -> None:
+    """Wait for a request slot, or raise ServerBusy if none frees up."""
+    global _waiting_requests
+    
+    if not _request_semaphore.locked():
+        # A slot is free: acquire() takes it without yielding to the loop,
+        # so concurrent arrivals in the same tick see the updated count
+        await _request_semaphore.acquire()
+        return
+    
+    # Reject immediately if the queue is full
+    if _waiting_requests >= MAX_QUEUE_SIZE:
+        raise ServerBusy()
+    
+    # Wait for our turn with a timeout
+    _waiting_requests += 1
+    try:
+        async with asyncio.timeout(REQUEST_TIMEOUT):
+            await _request_semaphore.acquire()
+    except asyncio.TimeoutError:
+        raise ServerBusy(retry_after=30)
+    finally:
+        _waiting_requests -= 1
+
+
+@asynccontextmanager
+async def admission_context(max_retries: Optional[int] = None) -> AsyncIterator[None]:
+    """
+    Hold one request slot for the whole block, with REQUEST_TIMEOUT applied to it.
+    
+    Lets a multi-stage request (decode, then parallel analyses) be admitted
+    once instead of per stage; inside the block, call run_in_thread and
+    run_in_process_pool directly.
+    
+    Args:
+        max_retries: Admission retries on ServerBusy (default ADMISSION_RETRIES)
         
-        return result
+    Raises:
+        ServerBusy: If no slot could be acquired
+        asyncio.TimeoutError: If the block runs longer than REQUEST_TIMEOUT
+    """
+    await with_admission_retry(_acquire_slot, max_retries=max_retries)
+    try:
+        async with asyncio.timeout(REQUEST_TIMEOUT):
+            yield
+    finally:
+        _request_semaphore.release()
+
+
+async def _run_admitted(runner: Callable, func: Callable, *args, **kwargs) -> Any:
+    """Wait for a request slot, then run func through runner with a timeout."""
+    try:
+        async with admission_context(max_retries=0):
+            start_time = time.time()
+            result = await runner(func, *args, **kwargs)
     except asyncio.TimeoutError:
         logger.error("Function execution timed out", 
                     func=func.__name__, 
                     timeout=REQUEST_TIMEOUT)
         raise
-    finally:
-        # Decrement active requests
-        _active_requests -= 1
-        
-        # Signal the next request in queue if any
-        if _request_queue:
-            next_future = _request_queue.pop(0)
-            next_future.set_result(True)
+    
+    # Log execution time
+    execution_time = time.time() - start_time
+    logger.info("Function executed successfully", 
+                func=func.__name__, 
+                execution_time=execution_time)
+    
+    return result
@@ -6,16 +6,16 @@ import json
 import logging
 import os
 import shutil
-import subprocess
 import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import structlog
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel, Field, ValidationError
 
 from mcp_audio_server.analysis import registry
@@ -23,9 +23,24 @@ from mcp_audio_server.analysis.chord_detection import BasicChordDetector, Advanc
 from mcp_audio_server.analysis.key_detection import BasicKeyDetector, AdvancedKeyDetector
 from mcp_audio_server.analysis.models import AudioAnalysisResult, Chord
 from mcp_audio_server.analysis.tempo_tracking import BasicTempoDetector, AdvancedTempoDetector
-from mcp_audio_server.audio_io import AudioDecodingException, decode_audio
-from mcp_audio_server.cache import compute_file_hash, get_from_cache, save_to_cache, clean_cache, PerformanceStats
-from mcp_audio_server.concurrency import with_concurrency_control, ServerBusy
+from mcp_audio_server.audio_io import AudioDecodeError, AudioDecodingException, decode_audio
+from mcp_audio_server.cache import (
+    PAYLOAD_HASH_THREAD_MIN,
+    PerformanceStats,
+    clean_cache,
+    compute_payload_hash,
+    get_from_cache,
+    save_to_cache,
+)
+from mcp_audio_server.concurrency import (
+    ServerBusy,
+    admission_context,
+    run_in_process_pool,
+    run_in_thread,
+    shared_array,
+    shutdown_process_pool,
+    start_process_pool,
+)
 from mcp_audio_server.metrics import instrument, setup_metrics_server, start_memory_tracking
 from mcp_audio_server.utils.validation import validate_payload
 
@@ -52,6 +67,7 @@ app = FastAPI(
     title="MCP Audio Server",
     description="MCP server for audio processing and chord analysis",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -119,6 +135,13 @@ registry.register("advanced_tempo", AdvancedTempoDetector())
 registry.register("basic_key", BasicKeyDetector())
 registry.register("advanced_key", AdvancedKeyDetector())
 
+# (chord, tempo, key) detectors per model option, resolved once at import;
+# unknown models fall back to "basic"
+_DETECTORS = {
+    model: tuple(registry.get(f"{model}_{kind}") for kind in ("chords", "tempo", "key"))
+    for model in ("basic", "advanced")
+}
+
 
 # Middleware for correlation IDs and timing
 @app.middleware("http")
@@ -168,7 +191,7 @@ async def add_correlation_id(request: Request, call_next):
                 error_code="INTERNAL_ERROR",
                 message="An unexpected error occurred",
                 correlation_id=correlation_id,
-            ).dict(),
+            ).model_dump(),
         )
 
 
@@ -182,7 +205,7 @@ async def audio_decoding_exception_handler(request: Request, exc: AudioDecodingE
             message=exc.message,
             details=exc.details,
             correlation_id=request.state.correlation_id,
-        ).dict(),
+        ).model_dump(),
     )
 
 
@@ -195,7 +218,7 @@ async def validation_exception_handler(request: Request, exc: ValidationError):
             message="Request validation failed",
             details={"errors": exc.errors()},
             correlation_id=request.state.correlation_id,
-        ).dict(),
+        ).model_dump(),
     )
 
 
@@ -209,7 +232,7 @@ async def server_busy_exception_handler(request: Request, exc: ServerBusy):
             message=f"Server is currently busy. Please retry after {exc.retry_after} seconds.",
             details={"retry_after": exc.retry_after},
             correlation_id=request.state.correlation_id,
-        ).dict(),
+        ).model_dump(),
     )
 
 
@@ -221,13 +244,16 @@ async def timeout_exception_handler(request: Request, exc: asyncio.TimeoutError)
             error_code="TIMEOUT",
             message="The request processing has timed out",
             correlation_id=request.state.correlation_id,
-        ).dict(),
+        ).model_dump(),
     )
 
 
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
+    # Create the analysis worker pool up front
+    start_process_pool()
+    
     # Start metrics server
     setup_metrics_server(port=8001)
     
@@ -237,18 +263,18 @@ async def startup_event():
     # Start periodic cache cleaning
     asyncio.create_task(periodic_cache_cleaning())
     
-    # Check FFmpeg availability
-    try:
-        result = subprocess.run(
-            ["ffmpeg", "-version"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        ffmpeg_version = result.stdout.split('\n')[0]
-        logger.info(f"FFmpeg available: {ffmpeg_version}")
-    except Exception as e:
-        logger.error(f"FFmpeg not available: {e}")
+    # Check FFmpeg availability with a PATH lookup; running `ffmpeg -version`
+    # here would block startup on a fork/exec
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path:
+        logger.info(f"FFmpeg available: {ffmpeg_path}")
+    else:
+        logger.error("FFmpeg not available: not found on PATH")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_process_pool()
 
 
 async def periodic_cache_cleaning():
@@ -311,159 +337,159 @@ async def readiness_check():
     return response
 
 
-# MCP tool endpoint
-@app.post("/analyze_chords", response_model=ChordAnalysisResponse)
-@instrument(tool_name="analyze_chords")
-async def analyze_chords(request: ChordAnalysisRequest, req: Request) -> ChordAnalysisResponse:
-    """Analyze chords in the provided audio data."""
-    correlation_id = req.state.correlation_id
-    perf_stats = PerformanceStats("analyze_chords")
+async def analyze_audio(
+    audio_data: np.ndarray, sample_rate: int, model: str = "basic"
+) -> Dict[str, Any]:
+    """Run chord, tempo and key analysis on decoded audio.
     
-    # Log request (without the actual audio data which could be large)
-    logger.info(
-        "chord_analysis_request",
-        format=request.format,
-        options=request.options,
+    This is the pipeline behind /analyze_chords without the HTTP layer:
+    no base64, caching, schema validation or correlation ID.
+    
+    Args:
+        audio_data: Mono audio samples
+        sample_rate: Sample rate of the audio
+        model: Detector model to use; unknown models fall back to "basic"
+        
+    Returns:
+        The analysis response body, minus correlation_id
+    """
+    chord_detector, tempo_detector, key_detector = _DETECTORS.get(
+        model, _DETECTORS["basic"]
     )
     
-    # Validate request against schema
-    try:
-        validate_payload(request.dict(), "chord_analysis.schema.json")
-        perf_stats.checkpoint("schema_validation")
-    except ValueError as e:
-        logger.error("schema_validation_error", error=str(e))
-        raise HTTPException(status_code=400, detail=str(e))
+    start_time = time.perf_counter()
+    # The analyses are independent, so run them in parallel pool workers
+    # Publish the waveform once instead of pickling it to each worker
+    with shared_array(audio_data) as shared_audio:
+        chord_results, tempo_results, key_results = await asyncio.gather(
+            run_in_process_pool(chord_detector.detect_chords, shared_audio, sample_rate),
+            run_in_process_pool(tempo_detector.detect_tempo, shared_audio, sample_rate),
+            run_in_process_pool(key_detector.detect_key, shared_audio, sample_rate),
+        )
+    processing_time = time.perf_counter() - start_time
+    
+    # Build the chord entries as plain dicts; detector values may be
+    # NumPy scalars, which orjson does not serialize
+    chord_entries = [
+        {
+            "time": float(chord.time),
+            "label": chord.label,
+            "confidence": None if chord.confidence is None else float(chord.confidence),
+        }
+        for chord in chord_results
+    ]
+    
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "key": key_results.get("key", ""),
+        "tempo": float(tempo_results.get("tempo", 0)),
+        "chords": chord_entries,
+        "duration": len(audio_data) / sample_rate,
+        "processing_info": {
+            "sample_rate": int(sample_rate),
+            "channels": 1,
+            "processing_time": processing_time,
+            "model_used": model,
+        },
+    }
 
-    # Generate a hash for the audio data to use as cache key
+
+async def _check_cache(
+    payload: Union[str, bytes], correlation_id: str, perf_stats: PerformanceStats
+) -> Tuple[Optional[str], Optional[ORJSONResponse]]:
+    """Key the cache on the request payload and look it up.
+    
+    Returns (cache_key, response): the key is None when hashing failed, and
+    the response is the cached result under this request's correlation ID,
+    or None on a miss.
+    """
+    try:
+        if len(payload) >= PAYLOAD_HASH_THREAD_MIN:
+            cache_key = await run_in_thread(compute_payload_hash, payload)
+        else:
+            cache_key = compute_payload_hash(payload)
+    except Exception as e:
+        # Non-fatal error, continue without caching
+        logger.warning("Cache check failed", error=str(e))
+        return None, None
+    
     try:
-        binary_data = base64.b64decode(request.audio_data)
-        cache_key = compute_file_hash(binary_data)
-        perf_stats.checkpoint("hash_computation")
-        
         # Check if we have cached results
         cached_result = await get_from_cache(cache_key)
         if cached_result:
             # Add cache hit metrics
             logger.info("cache_hit", cache_key=cache_key)
-            perf_stats.checkpoint("cache_hit")
             
-            # Convert cached result to response model
-            response = ChordAnalysisResponse(
-                schema_version=cached_result.get("schema_version", SCHEMA_VERSION),
-                key=cached_result.get("key", ""),
-                tempo=cached_result.get("tempo", 0),
-                chords=[ChordEntry(**chord) for chord in cached_result.get("chords", [])],
-                duration=cached_result.get("duration", 0),
-                processing_info=cached_result.get("processing_info"),
-                correlation_id=correlation_id
-            )
+            # The cached dict was schema-validated when saved: return it as is
+            # under this request's correlation ID. Copy the top level only,
+            # since the in-memory cache hands out its own dict.
+            response = {**cached_result, "correlation_id": correlation_id}
             
             # Log response from cache
             logger.info(
                 "chord_analysis_from_cache",
                 cache_key=cache_key,
-                num_chords=len(response.chords),
+                num_chords=len(response["chords"]),
             )
             
             perf_stats.finish()
-            return response
+            return cache_key, ORJSONResponse(response)
         
         # Log cache miss
         logger.info("cache_miss", cache_key=cache_key)
-        perf_stats.checkpoint("cache_check")
         
     except Exception as e:
         # Non-fatal error, continue without caching
         logger.warning("Cache check failed", error=str(e))
-
-    # Decode audio data
-    try:
-        audio_data, sample_rate = await with_concurrency_control(
-            decode_audio, request.audio_data, request.format
-        )
-        perf_stats.checkpoint("audio_decode")
-    except Exception as e:
-        # AudioDecodingException will be caught by the exception handler
-        # Other exceptions will be re-raised as HTTPException
-        if not isinstance(e, (AudioDecodingException, asyncio.TimeoutError, ServerBusy)):
-            logger.error("audio_decoding_error", error=str(e), error_type=type(e).__name__)
-            raise HTTPException(status_code=400, detail=f"Error decoding audio: {e}")
-        raise
-
-    # Determine which detector to use based on options
-    model = request.options.get("model", "basic")
-    chord_detector_name = "advanced_chords" if model == "advanced" else "basic_chords"
-    tempo_detector_name = "advanced_tempo" if model == "advanced" else "basic_tempo"
-    key_detector_name = "advanced_key" if model == "advanced" else "basic_key"
     
-    try:
-        # Get the detector instances
-        chord_detector = registry.get(chord_detector_name)
-        tempo_detector = registry.get(tempo_detector_name)
-        key_detector = registry.get(key_detector_name)
-        
-        # Perform analyses asynchronously with resource controls
-        chord_results = await with_concurrency_control(
-            chord_detector.detect_chords, audio_data, sample_rate
-        )
-        perf_stats.checkpoint("chord_detection")
-        
-        tempo_results = await with_concurrency_control(
-            tempo_detector.detect_tempo, audio_data, sample_rate
-        )
-        perf_stats.checkpoint("tempo_detection")
-        
-        key_results = await with_concurrency_control(
-            key_detector.detect_key, audio_data, sample_rate
-        )
-        perf_stats.checkpoint("key_detection")
-        
-        # Create chord entry objects
-        chord_entries = [
-            ChordEntry(
-                time=chord.time,
-                label=chord.label,
-                confidence=chord.confidence
+    return cache_key, None
+
+
+async def _analyze_binary(
+    binary_data: bytes,
+    format_type: str,
+    model: str,
+    correlation_id: str,
+    perf_stats: PerformanceStats,
+    cache_key: Optional[str],
+) -> ORJSONResponse:
+    """Decode and analyze encoded audio bytes, then validate and cache the response."""
+    # Admit the request once for decode and analysis together, so it holds a
+    # single slot end to end instead of re-queueing between stages
+    async with admission_context():
+        # Decode audio data in a thread: FFmpeg/PyAV do the work outside the GIL,
+        # and a worker process would need the payload and samples pickled both ways
+        try:
+            audio_data, sample_rate = await run_in_thread(
+                decode_audio, binary_data, format_type
             )
-            for chord in chord_results
-        ]
-        
-        # Calculate processing time and duration
-        processing_time = perf_stats.checkpoint("processing") - perf_stats.checkpoints.get("audio_decode", 0)
-        duration = len(audio_data) / sample_rate
-        
-        # Create processing info
-        processing_info = ProcessingInfo(
-            sample_rate=sample_rate,
-            channels=1,
-            processing_time=processing_time,
-            model_used=model
-        )
+            perf_stats.checkpoint("audio_decode")
+        except Exception as e:
+            # AudioDecodingException will be caught by the exception handler
+            # Other exceptions will be re-raised as HTTPException
+            if not isinstance(e, (AudioDecodingException, asyncio.TimeoutError, ServerBusy)):
+                logger.error("audio_decoding_error", error=str(e), error_type=type(e).__name__)
+                raise HTTPException(status_code=400, detail=f"Error decoding audio: {e}")
+            raise
         
+        result = await analyze_audio(audio_data, sample_rate, model)
+    perf_stats.checkpoint("analysis")
+    
+    try:
         # Log response summary
         logger.info(
             "chord_analysis_complete",
-            processing_time=processing_time,
-            num_chords=len(chord_entries),
-            key=key_results.get("key", ""),
-            tempo=tempo_results.get("tempo", 0),
+            processing_time=result["processing_info"]["processing_time"],
+            num_chords=len(result["chords"]),
+            key=result["key"],
+            tempo=result["tempo"],
         )
         
-        # Prepare and validate response
-        response = ChordAnalysisResponse(
-            schema_version=SCHEMA_VERSION,
-            key=key_results.get("key", ""),
-            tempo=tempo_results.get("tempo", 0),
-            chords=chord_entries,
-            duration=duration,
-            processing_info=processing_info,
-            correlation_id=correlation_id
-        )
+        response = {**result, "correlation_id": correlation_id}
         
         # Validate response against schema
         try:
-            validate_payload(response.dict(), "audio_analysis_response.schema.json")
-            perf_stats.checkpoint("response_validation")
+            validate_payload(response, "audio_analysis_response.schema.json")
         except ValueError as e:
             logger.error("response_validation_error", error=str(e))
             raise HTTPException(
@@ -472,18 +498,16 @@ async def analyze_chords(request: ChordAnalysisRequest, req: Request) -> ChordAn
             )
         
         # Cache the results
-        if 'cache_key' in locals():
+        if cache_key is not None:
             try:
-                # Cache the response as a dictionary
-                cache_data = response.dict()
-                await save_to_cache(cache_key, cache_data)
+                await save_to_cache(cache_key, response)
                 logger.debug("Saved results to cache", cache_key=cache_key)
             except Exception as e:
                 # Non-fatal error, continue without caching
                 logger.warning("Failed to cache results", error=str(e), cache_key=cache_key)
         
         perf_stats.finish()
-        return response
+        return ORJSONResponse(response)
         
     except KeyError as e:
         # Handle missing detector
@@ -491,6 +515,116 @@ async def analyze_chords(request: ChordAnalysisRequest, req: Request) -> ChordAn
         raise HTTPException(status_code=400, detail=f"Detector not found: {e}")
 
 
+# MCP tool endpoint
+@app.post("/analyze_chords", response_model=ChordAnalysisResponse,
+          response_class=ORJSONResponse)
+@app.post("/analyze", response_model=ChordAnalysisResponse,
+          response_class=ORJSONResponse)
+@instrument(tool_name="analyze_chords")
+async def analyze_chords(request: ChordAnalysisRequest, req: Request) -> ORJSONResponse:
+    """Analyze chords in the provided audio data.
+    
+    The response is built as a plain dict, validated against the JSON schema
+    and serialized with orjson; ChordAnalysisResponse documents its shape.
+    
+    Chord, tempo and key analysis always run together on one decode, so
+    this is also served as the combined /analyze endpoint. An "analyzers"
+    list in the request body is accepted and ignored there.
+    """
+    correlation_id = req.state.correlation_id
+    perf_stats = PerformanceStats("analyze_chords")
+    
+    # Log request (without the actual audio data which could be large)
+    logger.info(
+        "chord_analysis_request",
+        format=request.format,
+        options=request.options,
+    )
+    
+    # Validate request against schema
+    try:
+        validate_payload(request.model_dump(), "chord_analysis.schema.json")
+    except ValueError as e:
+        logger.error("schema_validation_error", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Key the cache on the encoded payload so a hit never decodes it
+    cache_key, cached_response = await _check_cache(
+        request.audio_data, correlation_id, perf_stats
+    )
+    if cached_response is not None:
+        return cached_response
+
+    # Base64-decode once on a miss, then drop the encoded copy, a third
+    # larger than the bytes, before decoding the audio. Large payloads are
+    # decoded in a thread so the loop keeps serving other requests.
+    try:
+        if len(request.audio_data) >= PAYLOAD_HASH_THREAD_MIN:
+            binary_data = await run_in_thread(base64.b64decode, request.audio_data)
+        else:
+            binary_data = base64.b64decode(request.audio_data)
+    except Exception as e:
+        logger.error("base64_decoding_error", error=str(e))
+        raise AudioDecodingException(
+            f"Invalid base64 data: {e}",
+            AudioDecodeError.DECODE_FAILED,
+            {"error": str(e)}
+        )
+    request.audio_data = ""
+
+    # Determine which detector model to use based on options
+    model = request.options.get("model", "basic")
+    
+    return await _analyze_binary(
+        binary_data, request.format, model, correlation_id, perf_stats, cache_key
+    )
+
+
+@app.post("/analyze_chords/raw", response_model=ChordAnalysisResponse,
+          response_class=ORJSONResponse)
+@instrument(tool_name="analyze_chords_raw")
+async def analyze_chords_raw(
+    req: Request,
+    format: str = Query(..., description="Format of the audio data"),
+    model: str = Query("basic", description="Chord detection model to use"),
+) -> ORJSONResponse:
+    """Analyze chords in audio file bytes sent as the request body.
+    
+    Same analysis and response as /analyze_chords, without the base64
+    request encoding: the body is the encoded audio file itself.
+    """
+    correlation_id = req.state.correlation_id
+    perf_stats = PerformanceStats("analyze_chords_raw")
+    options = {"model": model}
+    
+    logger.info(
+        "chord_analysis_request",
+        format=format,
+        options=options,
+    )
+    
+    # Validate the query parameters against the request schema
+    try:
+        validate_payload(
+            {"audio_data": "", "format": format, "options": options},
+            "chord_analysis.schema.json",
+        )
+    except ValueError as e:
+        logger.error("schema_validation_error", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    binary_data = await req.body()
+    cache_key, cached_response = await _check_cache(
+        binary_data, correlation_id, perf_stats
+    )
+    if cached_response is not None:
+        return cached_response
+    
+    return await _analyze_binary(
+        binary_data, format, model, correlation_id, perf_stats, cache_key
+    )
+
+
 @app.get("/metrics")
 async def metrics_dashboard():
     """Redirect to the metrics dashboard."""
@@ -1,13 +1,21 @@
 """Metrics and observability utilities."""
 
-import os
 import time
+from functools import wraps
 from typing import Callable, Optional, TypeVar
 
 import structlog
 from prometheus_client import (Counter, Gauge, Histogram, start_http_server,
                                Summary)
 
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+    _PROC = psutil.Process()
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    _PROC = None
+
 logger = structlog.get_logger(__name__)
 
 # Initialize Prometheus metrics
@@ -86,16 +94,8 @@ def instrument(tool_name: str) -> Callable[[F], F]:
                 JOB_DURATION.labels(tool=tool_name).observe(duration)
                 
                 # Update active requests gauge
+                # (memory usage is sampled by start_memory_tracking)
                 ACTIVE_REQUESTS.dec()
-                
-                # Update memory usage
-                try:
-                    import psutil
-                    process = psutil.Process(os.getpid())
-                    memory_info = process.memory_info()
-                    MEMORY_USAGE.set(memory_info.rss)
-                except ImportError:
-                    pass
         
         return wrapper
     
@@ -118,13 +118,10 @@ def setup_metrics_server(port: int = 8001) -> None:
 
 def record_memory_usage() -> None:
     """Record current memory usage."""
-    try:
-        import psutil
-        process = psutil.Process(os.getpid())
-        memory_info = process.memory_info()
-        MEMORY_USAGE.set(memory_info.rss)
-    except ImportError:
+    if not PSUTIL_AVAILABLE:
         logger.warning("psutil not installed, memory usage not tracked")
+        return
+    MEMORY_USAGE.set(_PROC.memory_info().rss)
 
 
 # Periodic memory usage tracking
@@ -1,15 +1,22 @@
 """Security and file-handling utilities."""
 
 import os
-import re
-import magic
-import resource
+import secrets
+import string
 import tempfile
+import time
 from pathlib import Path
 from typing import Optional, Set, Tuple
 
 import structlog
 
+# libmagic is only consulted for files the audio header sniffer doesn't know
+try:
+    import magic
+    MAGIC_AVAILABLE = True
+except ImportError:
+    MAGIC_AVAILABLE = False
+
 logger = structlog.get_logger(__name__)
 
 # Constants
@@ -21,37 +28,28 @@ ALLOWED_AUDIO_MIME_TYPES = {
     'audio/aac',
 }
 
-# Memory limit in bytes (1GB)
-MEMORY_LIMIT_BYTES = 1024 * 1024 * 1024
-
-# CPU time limit in seconds
-CPU_TIME_LIMIT = 60
+# MIME types implied by extension, for callers that trust the file name
+_EXT_TO_MIME = {
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.flac': 'audio/flac',
+    '.aac': 'audio/aac',
+}
 
-# File descriptor limit
-FD_LIMIT = 1024
+# Characters allowed in validated filenames
+_FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-.")
 
 # Temporary directory
 TEMP_DIR = os.environ.get('MCP_TEMP_DIR', '/tmp/mcp-audio-server')
 
+# Age in seconds after which leftover temp files are removed at startup
+TEMP_FILE_TTL = int(os.environ.get('MCP_TEMP_FILE_TTL', '3600'))
 
-def apply_resource_limits() -> None:
-    """Apply OS-level resource limits to the current process."""
-    try:
-        # Set memory limit
-        resource.setrlimit(resource.RLIMIT_AS, (MEMORY_LIMIT_BYTES, MEMORY_LIMIT_BYTES))
-        
-        # Set CPU time limit
-        resource.setrlimit(resource.RLIMIT_CPU, (CPU_TIME_LIMIT, CPU_TIME_LIMIT))
-        
-        # Set file descriptor limit
-        resource.setrlimit(resource.RLIMIT_NOFILE, (FD_LIMIT, FD_LIMIT))
-        
-        logger.info("Resource limits applied", 
-                   memory_limit_mb=MEMORY_LIMIT_BYTES / (1024 * 1024),
-                   cpu_time_limit=CPU_TIME_LIMIT,
-                   fd_limit=FD_LIMIT)
-    except (ValueError, resource.error) as e:
-        logger.warning("Failed to set resource limits", error=str(e))
+# Per-process component of temp file names
+_RUN_ID = secrets.token_hex(6)
+TEMP_FILE_PREFIX = "mcp_"
+_temp_dir_swept = False
 
 
 def validate_filename(filename: str) -> bool:
@@ -64,27 +62,78 @@ def validate_filename(filename: str) -> bool:
     Returns:
         True if the filename is safe, False otherwise
     """
+    if not filename:
+        return False
+    
     # Check for path traversal
     if '..' in filename or filename.startswith('/'):
         logger.warning("Path traversal attempt detected", filename=filename)
         return False
     
-    # Check for unusual characters
-    allowed_pattern = re.compile(r'^[a-zA-Z0-9_\-\.]+$')
-    if not allowed_pattern.match(filename):
+    # Check for unusual characters (a set check runs in C, no regex engine)
+    if not _FILENAME_CHARS.issuperset(filename):
         logger.warning("Filename contains unusual characters", filename=filename)
         return False
     
     return True
 
 
-def validate_file_type(file_path: str, allowed_mime_types: Optional[Set[str]] = None) -> Tuple[bool, str]:
+# Bytes needed to recognise every format _sniff_audio_mime knows
+SNIFF_HEADER_SIZE = 12
+
+# Second byte of an MPEG-1/2/2.5 Layer III frame header, with and without CRC
+_MP3_FRAME_SYNC = {0xFB, 0xFA, 0xF3, 0xF2, 0xE3, 0xE2}
+# Second byte of an AAC ADTS header (MPEG-4 / MPEG-2)
+_ADTS_SYNC = {0xF1, 0xF9}
+
+_magic: Optional["magic.Magic"] = None
+
+
+def _sniff_audio_mime(header: bytes) -> Optional[str]:
+    """Identify an allowed audio container from its leading bytes, or return None."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "audio/wav"
+    if header[:3] == b"ID3":
+        return "audio/mpeg"
+    if header[:4] == b"OggS":
+        return "audio/ogg"
+    if header[:4] == b"fLaC":
+        return "audio/flac"
+    if len(header) >= 2 and header[0] == 0xFF:
+        if header[1] in _MP3_FRAME_SYNC:
+            return "audio/mpeg"
+        if header[1] in _ADTS_SYNC:
+            return "audio/aac"
+    return None
+
+
+def _detect_mime(header: bytes, from_magic) -> str:
+    """Sniff the header; fall back to libmagic (if installed) for anything else."""
+    global _magic
+    detected_mime = _sniff_audio_mime(header)
+    if detected_mime is not None:
+        return detected_mime
+    if not MAGIC_AVAILABLE:
+        return "unknown"
+    if _magic is None:
+        # Loading the magic database is slow; python-magic serialises calls
+        _magic = magic.Magic(mime=True)
+    return from_magic(_magic)
+
+
+def validate_file_type(
+    file_path: str,
+    allowed_mime_types: Optional[Set[str]] = None,
+    strict: bool = True
+) -> Tuple[bool, str]:
     """
     Validate a file's MIME type.
     
     Args:
         file_path: Path to the file
         allowed_mime_types: Set of allowed MIME types (defaults to ALLOWED_AUDIO_MIME_TYPES)
+        strict: Inspect the file contents; when False, a known audio extension
+            is trusted without opening the file
         
     Returns:
         Tuple of (is_valid, mime_type)
@@ -92,9 +141,15 @@ def validate_file_type(file_path: str, allowed_mime_types: Optional[Set[str]] =
     if allowed_mime_types is None:
         allowed_mime_types = ALLOWED_AUDIO_MIME_TYPES
     
+    if not strict:
+        ext_mime = _EXT_TO_MIME.get(os.path.splitext(file_path)[1].lower())
+        if ext_mime in allowed_mime_types:
+            return True, ext_mime
+    
     try:
-        mime = magic.Magic(mime=True)
-        detected_mime = mime.from_file(file_path)
+        with open(file_path, "rb") as f:
+            header = f.read(SNIFF_HEADER_SIZE)
+        detected_mime = _detect_mime(header, lambda m: m.from_file(file_path))
         
         is_valid = detected_mime in allowed_mime_types
         
@@ -110,6 +165,65 @@ def validate_file_type(file_path: str, allowed_mime_types: Optional[Set[str]] =
         return False, "unknown"
 
 
+def validate_buffer_type(data: bytes, allowed_mime_types: Optional[Set[str]] = None) -> Tuple[bool, str]:
+    """
+    Validate the MIME type of in-memory file contents.
+    
+    Args:
+        data: Raw file bytes
+        allowed_mime_types: Set of allowed MIME types (defaults to ALLOWED_AUDIO_MIME_TYPES)
+        
+    Returns:
+        Tuple of (is_valid, mime_type)
+    """
+    if allowed_mime_types is None:
+        allowed_mime_types = ALLOWED_AUDIO_MIME_TYPES
+    
+    try:
+        detected_mime = _detect_mime(bytes(data[:SNIFF_HEADER_SIZE]),
+                                     lambda m: m.from_buffer(data))
+        
+        is_valid = detected_mime in allowed_mime_types
+        
+        if not is_valid:
+            logger.warning("Buffer type validation failed", 
+                         detected_mime=detected_mime,
+                         allowed_types=allowed_mime_types)
+        
+        return is_valid, detected_mime
+    except Exception as e:
+        logger.error("Error validating buffer type", error=str(e))
+        return False, "unknown"
+
+
+def _sweep_stale_temp_files(temp_dir: Path) -> None:
+    """Remove temp files left behind by earlier processes, once per process."""
+    global _temp_dir_swept
+    if _temp_dir_swept:
+        return
+    _temp_dir_swept = True
+    
+    cutoff = time.time() - TEMP_FILE_TTL
+    removed = 0
+    try:
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
+                try:
+                    if (entry.name.startswith(TEMP_FILE_PREFIX)
+                            and entry.is_file(follow_symlinks=False)
+                            and entry.stat(follow_symlinks=False).st_mtime < cutoff):
+                        os.unlink(entry.path)
+                        removed += 1
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.warning("Failed to sweep temporary directory", path=str(temp_dir), error=str(e))
+        return
+    
+    if removed:
+        logger.info("Removed stale temporary files", path=str(temp_dir), count=removed)
+
+
 def get_secure_temp_dir() -> str:
     """
     Get or create a secure temporary directory.
@@ -124,6 +238,8 @@ def get_secure_temp_dir() -> str:
         if not temp_dir.exists():
             temp_dir.mkdir(parents=True, mode=0o700)  # Restricted permissions
             logger.info("Created secure temporary directory", path=str(temp_dir))
+        else:
+            _sweep_stale_temp_files(temp_dir)
         
         return str(temp_dir)
     except Exception as e:
@@ -135,8 +251,13 @@ def get_secure_temp_dir() -> str:
 class SecureTempFile:
     """Context manager for secure temporary file handling."""
     
-    def __init__(self, suffix: Optional[str] = None, prefix: Optional[str] = "mcp_"):
-        self.temp_dir = get_secure_temp_dir()
+    _TEMP_DIR: Optional[str] = None  # Resolved once per process
+    
+    def __init__(self, suffix: Optional[str] = None,
+                 prefix: Optional[str] = f"{TEMP_FILE_PREFIX}{_RUN_ID}_"):
+        if SecureTempFile._TEMP_DIR is None:
+            SecureTempFile._TEMP_DIR = get_secure_temp_dir()
+        self.temp_dir = SecureTempFile._TEMP_DIR
         self.suffix = suffix
         self.prefix = prefix
         self.file = None
@@ -145,17 +266,17 @@ class SecureTempFile:
     def __enter__(self):
         """Create a temporary file with restricted permissions."""
         try:
-            self.file = tempfile.NamedTemporaryFile(
+            # mkstemp already creates the file owner-only (0600) on POSIX
+            fd, self.path = tempfile.mkstemp(
                 dir=self.temp_dir,
                 suffix=self.suffix,
-                prefix=self.prefix,
-                delete=False,
-                mode='wb'
+                prefix=self.prefix
             )
-            self.path = self.file.name
+            self.file = os.fdopen(fd, 'wb')
+            self.file.raw.name = self.path  # Callers pass file.name to FFmpeg
             
-            # Set permissions to owner-only
-            os.chmod(self.path, 0o600)
+            if os.name != 'posix':
+                os.chmod(self.path, 0o600)
             
             return self.file
         except Exception as e:
@@ -1,9 +1,18 @@
 """Schema loader utility for versioned JSON schemas."""
 
+import hashlib
 import json
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set, Tuple
+
+# orjson parses several times faster than the stdlib; json.loads also
+# accepts bytes, so files are read in binary mode either way
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +22,56 @@ SCHEMA_DIR = os.path.join(
 )
 INDEX_PATH = os.path.join(SCHEMA_DIR, "index.json")
 
+# Parsed index as (mtime, index); reloaded when the file's mtime changes
+_index_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+# Parsed schemas by absolute path; cleared whenever the index is reloaded.
+# Entries are shared between callers and must not be mutated.
+_schema_cache: Dict[str, Dict[str, Any]] = {}
+# Schema paths known to be missing on disk, so repeated lookups of a bad
+# entry don't hit the filesystem; cleared along with _schema_cache
+_missing_schemas: Set[str] = set()
+# Non-deprecated version_history entries by version, derived from the index
+_supported_versions: Optional[Dict[str, Dict[str, Any]]] = None
+# Parsed schemas by SHA-256 of the file contents, so versions that ship an
+# identical schema share one dict (and so one compiled validator). Bounded by
+# the number of distinct schema files, so kept across index reloads.
+_schema_by_digest: Dict[bytes, Dict[str, Any]] = {}
+
+
+def _load_index() -> Dict[str, Any]:
+    """
+    Return the parsed schema index, re-reading it only when it has changed.
+
+    Raises:
+        FileNotFoundError: If the index file does not exist
+        json.JSONDecodeError: If the index file is not valid JSON
+    """
+    global _index_cache, _supported_versions
+    mtime = os.stat(INDEX_PATH).st_mtime
+    if _index_cache is None or _index_cache[0] != mtime:
+        with open(INDEX_PATH, "rb") as f:
+            index = json_loads(f.read())
+        _schema_cache.clear()
+        _missing_schemas.clear()
+        _supported_versions = None
+        _index_cache = (mtime, index)
+    return _index_cache[1]
+
+
+def parse_schema(raw: bytes) -> Dict[str, Any]:
+    """
+    Parse schema file contents, reusing the dict of any identical schema.
+
+    Raises:
+        json.JSONDecodeError: If the contents are not valid JSON
+    """
+    digest = hashlib.sha256(raw).digest()
+    schema = _schema_by_digest.get(digest)
+    if schema is None:
+        schema = json_loads(raw)
+        _schema_by_digest[digest] = schema
+    return schema
+
 
 def get_schema_path(schema_name: str, version: Optional[str] = None) -> str:
     """
@@ -23,15 +82,15 @@ def get_schema_path(schema_name: str, version: Optional[str] = None) -> str:
         version: The schema version, or None for the current version
 
     Returns:
-        The absolute path to the schema file
+        The absolute path to the schema file; whether it exists on disk is
+        left to the caller opening it
 
     Raises:
         ValueError: If the schema or version is not found
     """
     try:
         # Load the index file
-        with open(INDEX_PATH, "r") as f:
-            index = json.load(f)
+        index = _load_index()
 
         # Determine the version to use
         if version is None:
@@ -49,11 +108,7 @@ def get_schema_path(schema_name: str, version: Optional[str] = None) -> str:
             raise ValueError(f"Schema {schema_name} not found in version {version}")
 
         # Construct the absolute path
-        abs_path = os.path.join(SCHEMA_DIR, schema_path)
-        if not os.path.exists(abs_path):
-            raise ValueError(f"Schema file not found: {abs_path}")
-
-        return abs_path
+        return os.path.join(SCHEMA_DIR, schema_path)
 
     except FileNotFoundError:
         logger.error(f"Schema index file not found: {INDEX_PATH}")
@@ -68,6 +123,9 @@ def load_schema(schema_name: str, version: Optional[str] = None) -> Dict[str, An
     """
     Load a schema from a file.
 
+    Parsed schemas are cached until the index changes; the returned
+    dictionary is shared and must not be modified.
+
     Args:
         schema_name: The name of the schema
         version: The schema version, or None for the current version
@@ -79,12 +137,20 @@ def load_schema(schema_name: str, version: Optional[str] = None) -> Dict[str, An
         ValueError: If the schema or version is not found
     """
     schema_path = get_schema_path(schema_name, version)
+    schema = _schema_cache.get(schema_path)
+    if schema is not None:
+        return schema
+    if schema_path in _missing_schemas:
+        raise ValueError(f"Schema file not found: {schema_path}")
 
     try:
-        with open(schema_path, "r") as f:
-            return json.load(f)
+        with open(schema_path, "rb") as f:
+            schema = parse_schema(f.read())
+        _schema_cache[schema_path] = schema
+        return schema
 
     except FileNotFoundError:
+        _missing_schemas.add(schema_path)
         logger.error(f"Schema file not found: {schema_path}")
         raise ValueError(f"Schema file not found: {schema_path}")
 
@@ -97,24 +163,47 @@ def get_supported_versions() -> Dict[str, Dict[str, Any]]:
     """
     Get a dictionary of supported schema versions and their metadata.
 
+    The result is cached until the index changes and must not be modified.
+
     Returns:
         A dictionary mapping version strings to metadata dictionaries
     """
+    global _supported_versions
     try:
-        with open(INDEX_PATH, "r") as f:
-            index = json.load(f)
+        index = _load_index()
+    except (FileNotFoundError, json.JSONDecodeError):
+        logger.error(f"Failed to load schema index: {INDEX_PATH}")
+        return {}
+
+    if _supported_versions is None:
+        _supported_versions = {
+            version_info["version"]: version_info
+            for version_info in index.get("version_history", [])
+            if version_info.get("version") and not version_info.get("deprecated", False)
+        }
+    return _supported_versions
 
-        versions = {}
-        for version_info in index.get("version_history", []):
-            version = version_info.get("version")
-            if version and not version_info.get("deprecated", False):
-                versions[version] = version_info
 
-        return versions
+def get_version_summary(version: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a version's metadata from the index without loading any schema file.
+
+    Args:
+        version: The schema version
 
+    Returns:
+        The version's ``version_history`` entry, or None if it isn't listed
+    """
+    try:
+        index = _load_index()
     except (FileNotFoundError, json.JSONDecodeError):
         logger.error(f"Failed to load schema index: {INDEX_PATH}")
-        return {}
+        return None
+
+    for version_info in index.get("version_history", []):
+        if version_info.get("version") == version:
+            return version_info
+    return None
 
 
 def get_current_version() -> str:
@@ -128,10 +217,7 @@ def get_current_version() -> str:
         ValueError: If the current version cannot be determined
     """
     try:
-        with open(INDEX_PATH, "r") as f:
-            index = json.load(f)
-
-        current_version = index.get("current_version")
+        current_version = _load_index().get("current_version")
         if current_version is None:
             raise ValueError("No current version defined in schema index")
 
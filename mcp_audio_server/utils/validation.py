@@ -1,11 +1,11 @@
 """JSON schema validation utilities."""
 
-import json
 import os
 import logging
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from mcp_audio_server.utils.schema_loader import load_schema as load_versioned_schema
+from mcp_audio_server.utils.schema_loader import load_schema as load_versioned_schema, parse_schema
 
 # Try to import jsonschema, but don't fail if not available
 try:
@@ -15,6 +15,14 @@ except ImportError:
     logging.warning("jsonschema not available, validation will be skipped")
     JSONSCHEMA_AVAILABLE = False
 
+# fastjsonschema generates Python code per schema; used instead of
+# jsonschema's interpreter when installed
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+
 # Directory containing JSON schemas
 SCHEMAS_DIR = os.path.join(
     os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "schemas"
@@ -22,6 +30,15 @@ SCHEMAS_DIR = os.path.join(
 
 logger = logging.getLogger(__name__)
 
+# Parsed legacy schemas by file name; shared, must not be mutated
+_legacy_schema_cache: Dict[str, Dict[str, Any]] = {}
+
+# Compiled validators by id() of the schema dict they were built from. The
+# loaders intern schemas by content, so identical schemas share an entry; the
+# entry holds the schema itself so its id can't be reused by another dict.
+_validator_cache: Dict[int, Tuple[Dict[str, Any], Callable[[Any], Optional[str]]]] = {}
+_validator_lock = threading.Lock()
+
 
 def _load_legacy_schema(schema_name: str) -> Dict[str, Any]:
     """
@@ -31,53 +48,120 @@ def _load_legacy_schema(schema_name: str) -> Dict[str, Any]:
         schema_name: Name of the schema file
         
     Returns:
-        Loaded schema as a dictionary
+        Loaded schema as a dictionary (cached after the first load)
     """
+    schema = _legacy_schema_cache.get(schema_name)
+    if schema is not None:
+        return schema
+    
     schema_path = os.path.join(SCHEMAS_DIR, schema_name)
     
     if not os.path.exists(schema_path):
         raise FileNotFoundError(f"Schema file not found: {schema_path}")
     
-    with open(schema_path, "r") as f:
-        return json.load(f)
+    with open(schema_path, "rb") as f:
+        schema = parse_schema(f.read())
+    _legacy_schema_cache[schema_name] = schema
+    return schema
 
 
-def validate_payload(
-    payload: Dict[str, Any], schema_name: str, version: Optional[str] = None
-) -> None:
+def _compile_validator(schema: Dict[str, Any]) -> Callable[[Any], Optional[str]]:
     """
-    Validate a payload against a JSON schema.
+    Build a function that returns a payload's validation error message, or None.
+    
+    Uses fastjsonschema's generated code when available, otherwise a
+    jsonschema validator whose schema is checked against its metaschema once.
+    """
+    if FASTJSONSCHEMA_AVAILABLE:
+        # use_default=False: don't fill schema defaults into the payload
+        compiled = fastjsonschema.compile(schema, use_default=False)
+        
+        def check(payload: Any) -> Optional[str]:
+            try:
+                compiled(payload)
+            except fastjsonschema.JsonSchemaValueException as e:
+                return e.message
+            return None
+        
+        return check
+    
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+    
+    def check(payload: Any) -> Optional[str]:
+        # Report the same error jsonschema.validate() would pick
+        error = jsonschema.exceptions.best_match(validator.iter_errors(payload))
+        return None if error is None else error.message
+    
+    return check
+
+
+def _get_validator(schema: Dict[str, Any]) -> Callable[[Any], Optional[str]]:
+    """Return the compiled validator for a schema, building it on first use."""
+    entry = _validator_cache.get(id(schema))
+    if entry is not None:
+        return entry[1]
+    
+    with _validator_lock:
+        entry = _validator_cache.get(id(schema))
+        if entry is None:
+            entry = (schema, _compile_validator(schema))
+            _validator_cache[id(schema)] = entry
+    return entry[1]
+
+
+def load_schema(schema_name: str, version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a schema by name, preferring the versioned schemas over legacy files.
     
     Args:
-        payload: Data to validate
         schema_name: Name of the schema (e.g., 'audio_analysis_response')
         version: Schema version to use, or None for the current version
         
+    Returns:
+        The schema as a dictionary; shared, must not be modified
+        
     Raises:
-        ValueError: If validation fails
+        ValueError: If neither a versioned nor a legacy schema is found
     """
-    if not JSONSCHEMA_AVAILABLE:
-        logger.warning("Skipping validation because jsonschema is not available")
-        return
-    
     try:
         # First try to load versioned schema
-        schema = load_versioned_schema(schema_name, version)
+        return load_versioned_schema(schema_name, version)
     except ValueError as e:
         # If not found, try legacy schema
         logger.warning(
             f"Failed to load versioned schema: {e}. Falling back to legacy schema."
         )
         try:
-            schema = _load_legacy_schema(schema_name)
+            return _load_legacy_schema(schema_name)
         except FileNotFoundError:
             logger.error(f"Schema not found: {schema_name}")
             raise ValueError(f"Schema not found: {schema_name}")
+
+
+def validate_payload(
+    payload: Dict[str, Any], schema_name: str, version: Optional[str] = None
+) -> None:
+    """
+    Validate a payload against a JSON schema.
     
-    try:
-        jsonschema.validate(instance=payload, schema=schema)
-    except jsonschema.exceptions.ValidationError as e:
-        message = f"Validation error: {e.message}"
+    Args:
+        payload: Data to validate
+        schema_name: Name of the schema (e.g., 'audio_analysis_response')
+        version: Schema version to use, or None for the current version
+        
+    Raises:
+        ValueError: If validation fails
+    """
+    if not (JSONSCHEMA_AVAILABLE or FASTJSONSCHEMA_AVAILABLE):
+        logger.warning("Skipping validation because jsonschema is not available")
+        return
+    
+    schema = load_schema(schema_name, version)
+    error = _get_validator(schema)(payload)
+    if error is not None:
+        message = f"Validation error: {error}"
         logger.error(message)
         raise ValueError(message)
     
@@ -85,32 +169,43 @@ def validate_payload(
 
 
 def validate_payload_for_all_versions(
-    payload: Dict[str, Any], schema_name: str
+    payload: Dict[str, Any], schema_name: str, stop_on_first: bool = False
 ) -> Dict[str, bool]:
     """
     Validate a payload against all available schema versions.
     
+    Versions come from the index metadata alone; a version's schema is only
+    loaded and compiled when the payload is validated against it.
+    
     Args:
         payload: Data to validate
         schema_name: Name of the schema
+        stop_on_first: Try versions newest first and stop at the first one
+            the payload is valid for
         
     Returns:
         Dictionary mapping version strings to validation results
         (True for valid, False for invalid)
     """
-    if not JSONSCHEMA_AVAILABLE:
+    if not (JSONSCHEMA_AVAILABLE or FASTJSONSCHEMA_AVAILABLE):
         logger.warning("Skipping validation because jsonschema is not available")
         return {}
     
     from mcp_audio_server.utils.schema_loader import get_supported_versions
     
+    versions = list(get_supported_versions())
+    if stop_on_first:
+        versions.reverse()
+    
     results = {}
-    for version in get_supported_versions().keys():
+    for version in versions:
         try:
             validate_payload(payload, schema_name, version)
             results[version] = True
         except ValueError:
             results[version] = False
+        if stop_on_first and results[version]:
+            break
     
     return results
 
@@ -108,77 +108,70 @@ def update_changelog(version: str) -> None:
     """Update the CHANGELOG.md with the new version."""
     today = date.today().isoformat()
 
+    # Single pass: keep the "Unreleased" heading, open the new version's
+    # section right under it, and let the old unreleased entries fall into it
+    new_content = []
+    state = "before"
     with open(CHANGELOG_PATH, "r") as f:
-        content = f.readlines()
-
-    # Find the "Unreleased" section
-    unreleased_idx = -1
-    for i, line in enumerate(content):
-        if line.strip() == "## [Unreleased]":
-            unreleased_idx = i
-            break
-
-    if unreleased_idx == -1:
+        for line in f:
+            if state == "before" and line.strip() == "## [Unreleased]":
+                new_content += [line, "\n", f"## [{version}] - {today}\n"]
+                state = "in_unreleased"
+                continue
+            if state == "in_unreleased" and line.startswith("## ["):
+                state = "after"
+            new_content.append(line)
+
+    if state == "before":
         print("Could not find '## [Unreleased]' section in CHANGELOG.md")
         return
 
-    # Insert the new version section after the "Unreleased" section
-    version_section = f"\n## [{version}] - {today}\n"
-
-    # Find the next section to determine the end of the "Unreleased" section
-    next_section_idx = -1
-    for i in range(unreleased_idx + 1, len(content)):
-        if content[i].startswith("## ["):
-            next_section_idx = i
-            break
-
-    if next_section_idx == -1:
+    if state == "in_unreleased":
         print("Could not find next section after '## [Unreleased]' in CHANGELOG.md")
         return
 
-    # Create a new "Unreleased" section
-    new_unreleased = ["## [Unreleased]\n", "\n"]
-
-    # Copy content from the old "Unreleased" section to the new version section
-    new_content = (
-        content[: unreleased_idx + 1]
-        + new_unreleased
-        + [version_section]
-        + content[unreleased_idx + 1 : next_section_idx]
-        + content[next_section_idx:]
-    )
-
     with open(CHANGELOG_PATH, "w") as f:
         f.writelines(new_content)
 
     print(f"Updated CHANGELOG.md with version {version}")
 
 
+def _git(*args: str) -> subprocess.CompletedProcess:
+    """Run one git command against the repository, without a shell or cwd change."""
+    return subprocess.run(
+        ["git", "-C", REPO_ROOT, *args], capture_output=True, text=True
+    )
+
+
 def create_release_branch(version: str) -> None:
     """Create a release branch for the new version."""
     branch_name = f"release/v{version}"
 
-    # Check if the branch already exists
-    result = subprocess.run(
-        ["git", "branch", "--list", branch_name], capture_output=True, text=True
-    )
+    # Create and switch in one call; git refuses if the branch already exists
+    result = _git("switch", "-c", branch_name)
 
-    if branch_name in result.stdout:
-        print(f"Branch {branch_name} already exists")
+    if result.returncode != 0:
+        if "already exists" in result.stderr:
+            print(f"Branch {branch_name} already exists")
+        else:
+            print(f"Failed to create branch {branch_name}: {result.stderr.strip()}")
         return
 
-    # Create the branch
-    subprocess.run(["git", "checkout", "-b", branch_name])
     print(f"Created branch {branch_name}")
 
 
 def commit_changes(version: str) -> None:
     """Commit the changes to the release branch."""
-    # Add the files
-    subprocess.run(["git", "add", PYPROJECT_PATH, SCHEMA_INDEX_PATH, CHANGELOG_PATH])
+    # Committing the paths directly stages them too, so no separate git add
+    result = _git(
+        "commit", "-m", f"chore: prepare release v{version}",
+        "--", PYPROJECT_PATH, SCHEMA_INDEX_PATH, CHANGELOG_PATH,
+    )
+
+    if result.returncode != 0:
+        print(f"Failed to commit changes: {(result.stderr or result.stdout).strip()}")
+        return
 
-    # Commit
-    subprocess.run(["git", "commit", "-m", f"chore: prepare release v{version}"])
     print(f"Committed changes for version {version}")
 
 
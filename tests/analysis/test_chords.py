@@ -0,0 +1,130 @@
+"""Tests for chord detection module."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+import numpy as np
+import soundfile as sf
+
+from mcp_audio_server.analysis import _chord_kernel
+from mcp_audio_server.analysis.chord_detection import (
+    AdvancedChordDetector,
+    BasicChordDetector,
+    _label_frames,
+    _label_frames_numpy,
+)
+
+
+@pytest.fixture
+def basic_detector():
+    """Return a basic chord detector instance."""
+    return BasicChordDetector()
+
+
+def test_chroma_to_chords_labels_major_and_minor(basic_detector):
+    """Test that chroma frames are mapped to major and minor labels."""
+    chroma = np.zeros((12, 3))
+    # C major: C, E, G
+    chroma[[0, 4, 7], 0] = [1.0, 0.6, 0.5]
+    # A minor: A, C, E
+    chroma[[9, 0, 4], 1] = [1.0, 0.6, 0.5]
+    # Silent frame
+    timestamps = np.array([0.0, 0.5, 1.0])
+
+    chords = basic_detector._chroma_to_chords(chroma, timestamps)
+
+    assert [chord.label for chord in chords] == ["C", "Am", "Cm"]
+    assert [chord.time for chord in chords] == [0.0, 0.5, 1.0]
+    assert chords[0].confidence == pytest.approx(1.0 / 2.1)
+    assert chords[2].confidence == 0
+
+
+def test_chroma_to_chords_truncates_to_timestamps(basic_detector):
+    """Test that only frames with a timestamp are labelled."""
+    chroma = np.random.rand(12, 5)
+    timestamps = np.arange(3) * 0.5
+
+    chords = basic_detector._chroma_to_chords(chroma, timestamps)
+
+    assert len(chords) == 3
+    assert all(0 <= chord.confidence <= 1.0 for chord in chords)
+
+
+def test_detect_chords_c_major_fixture(basic_detector):
+    """Test detecting a C major chord from an audio fixture."""
+    wav, sr = sf.read("tests/fixtures/chords/C_major.wav")
+
+    chords = basic_detector.detect_chords(wav, sr)
+
+    assert len(chords) > 0
+    assert all(chord.label == "C" for chord in chords)
+
+
+def test_detect_chords_stft_chroma():
+    """Test that the STFT chroma implementation returns timed chords."""
+    wav, sr = sf.read("tests/fixtures/chords/C_major.wav")
+    detector = BasicChordDetector({"chroma_impl": "stft"})
+
+    chords = detector.detect_chords(wav, sr)
+
+    assert len(chords) > 0
+    assert all(0 <= chord.confidence <= 1.0 for chord in chords)
+
+
+def test_label_frames_matches_numpy_reference():
+    """Test that the compiled labelling kernel matches the NumPy version."""
+    chroma = np.random.rand(12, 50)
+    chroma[:, 7] = 0
+
+    roots, is_major, confidences = _label_frames(chroma)
+    ref_roots, ref_is_major, ref_confidences = _label_frames_numpy(chroma)
+
+    np.testing.assert_array_equal(roots, ref_roots)
+    np.testing.assert_array_equal(is_major, ref_is_major)
+    np.testing.assert_allclose(confidences, ref_confidences)
+
+
+def test_advanced_detector_seventh_chord_labels():
+    """Test that the advanced detector only adds seventh suffixes."""
+    wav, sr = sf.read("tests/fixtures/chords/C_major.wav")
+    detector = AdvancedChordDetector()
+
+    chords = detector.detect_chords(wav, sr)
+
+    assert len(chords) > 0
+    assert all(chord.label in ("C", "Cmaj7") for chord in chords)
+
+
+def test_detect_chords_ndarray_matches_chord_list(basic_detector):
+    """Test that the structured array and Chord list agree."""
+    wav, sr = sf.read("tests/fixtures/chords/G_minor.wav")
+
+    records = basic_detector.detect_chords_ndarray(wav, sr)
+    chords = basic_detector.detect_chords(wav, sr)
+
+    assert records.dtype.names == ("time", "label", "confidence")
+    assert [chord.label for chord in chords] == records["label"].tolist()
+    assert [chord.time for chord in chords] == records["time"].tolist()
+
+
+def test_aot_kernel_matches_numpy_reference():
+    """Test that the Pythran-compilable kernel matches the NumPy version."""
+    chroma = np.random.rand(12, 20)
+    chroma[:, 3] = 0
+
+    roots, is_major, confidences = _chord_kernel.label_frames(chroma)
+    ref_roots, ref_is_major, ref_confidences = _label_frames_numpy(chroma)
+
+    np.testing.assert_array_equal(roots, ref_roots)
+    np.testing.assert_array_equal(is_major, ref_is_major)
+    np.testing.assert_allclose(confidences, ref_confidences)
+
+
+def test_forked_worker_pool_after_detector_init():
+    """Test that a fork-based pool still works once the detector is warmed up."""
+    BasicChordDetector()
+
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        assert pool.submit(pow, 2, 10).result(timeout=30) == 1024
@@ -0,0 +1,109 @@
+"""Tests for key detection module."""
+
+import librosa
+import pytest
+import numpy as np
+import soundfile as sf
+from librosa.core import constantq
+
+from mcp_audio_server.analysis.key_detection import (
+    BasicKeyDetector,
+    AdvancedKeyDetector,
+)
+
+
+@pytest.fixture
+def basic_detector():
+    """Return a basic key detector instance."""
+    return BasicKeyDetector()
+
+
+@pytest.mark.parametrize(
+    "fixture_name, expected_key",
+    [
+        ("C_major_key.wav", "C"),
+        ("A_minor_key.wav", "Am"),
+        ("G_major_key.wav", "G"),
+        ("D_minor_key.wav", "Dm"),
+    ],
+)
+def test_detect_key_fixtures(basic_detector, fixture_name, expected_key):
+    """Test detecting the key of audio fixtures."""
+    wav, sr = sf.read(f"tests/fixtures/key/{fixture_name}")
+
+    result = basic_detector.detect_key(wav, sr)
+
+    assert result["key"] == expected_key
+    assert 0 <= result["confidence"] <= 1.0
+
+
+def test_detect_key_matches_corrcoef(basic_detector):
+    """Test that key scores match a per-key np.corrcoef reference."""
+    chroma = np.random.rand(12, 40)
+    major = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+    minor = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+    chroma_avg = chroma.mean(axis=1)
+    correlations = [
+        np.corrcoef(np.roll(profile, i), chroma_avg)[0, 1]
+        for profile in (major, minor)
+        for i in range(12)
+    ]
+
+    result = basic_detector.detect_key(np.zeros(0), 22050, {"chroma_cqt": chroma})
+
+    assert result["confidence"] == pytest.approx((max(correlations) + 1) / 2)
+
+
+def test_silent_audio_has_no_key(basic_detector):
+    """Test that silence yields an empty key with zero confidence."""
+    result = basic_detector.detect_key(np.zeros(22050), 22050)
+
+    assert result == {"key": "", "confidence": 0.0}
+
+
+def test_advanced_detector_segment_analysis():
+    """Test per-segment keys for audio longer than one segment."""
+    c_major, sr = sf.read("tests/fixtures/key/C_major_key.wav")
+    g_major, _ = sf.read("tests/fixtures/key/G_major_key.wav")
+    # Two 10-second segments: C major then G major, plus a partial tail
+    segment = int(sr * 10)
+    wav = np.concatenate([
+        np.resize(c_major, segment),
+        np.resize(g_major, segment),
+        c_major[: sr // 2],
+    ])
+    detector = AdvancedKeyDetector({"enable_segment_analysis": True})
+
+    result = detector.detect_key(wav, sr)
+
+    assert [seg["key"] for seg in result["segments"]] == ["C", "G"]
+    assert result["segments"][1]["start_time"] == 10
+    assert 0 <= result["confidence"] <= 1.0
+
+
+def test_cqt_basis_cache_matches_uncached(monkeypatch):
+    """Test that cached CQT filter bases give the same chroma on every call."""
+    wav, sr = sf.read("tests/fixtures/key/A_minor_key.wav", dtype="float32")
+    cached = [librosa.feature.chroma_cqt(y=wav, sr=sr) for _ in range(2)]
+
+    wrapped = getattr(constantq, "__vqt_filter_fft")
+    monkeypatch.setattr(constantq, "__vqt_filter_fft", wrapped.__wrapped__)
+    uncached = librosa.feature.chroma_cqt(y=wav, sr=sr)
+
+    np.testing.assert_array_equal(cached[0], uncached)
+    np.testing.assert_array_equal(cached[1], uncached)
+
+
+@pytest.mark.parametrize(
+    "fixture_name, expected_key",
+    [("A_minor_key.wav", "Am"), ("G_major_key.wav", "G"), ("D_minor_key.wav", "Dm")],
+)
+def test_detect_key_stft_chroma(fixture_name, expected_key):
+    """Test key detection with the opt-in STFT chroma."""
+    wav, sr = sf.read(f"tests/fixtures/key/{fixture_name}")
+    detector = BasicKeyDetector({"chroma_impl": "stft"})
+
+    result = detector.detect_key(wav, sr)
+
+    assert result["key"] == expected_key
+    assert 0 <= result["confidence"] <= 1.0
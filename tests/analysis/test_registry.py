@@ -0,0 +1,50 @@
+"""Tests for the analysis plugin registry."""
+
+import pytest
+
+from mcp_audio_server.analysis.chord_detection import BasicChordDetector
+from mcp_audio_server.analysis.key_detection import BasicKeyDetector
+from mcp_audio_server.analysis.registry import AnalysisRegistry
+
+
+def test_autodiscover_registers_decorated_detectors():
+    """Test that autodiscover finds every decorated detector exactly once."""
+    registry = AnalysisRegistry()
+
+    registry.autodiscover()
+
+    assert sorted(registry.list_detectors()) == [
+        "advanced_chords",
+        "advanced_key",
+        "advanced_tempo",
+        "basic_chords",
+        "basic_key",
+        "basic_tempo",
+    ]
+
+
+def test_autodiscover_after_explicit_registration():
+    """Test that autodiscover keeps explicitly registered instances."""
+    registry = AnalysisRegistry()
+    detector = BasicChordDetector()
+    registry.register("basic_chords", detector)
+
+    registry.autodiscover()
+    registry.autodiscover()
+
+    assert registry.get("basic_chords") is detector
+    assert len(registry.list_detectors()) == 6
+
+
+def test_register_rejects_conflicting_detector():
+    """Test that only the same instance can be re-registered under a name."""
+    registry = AnalysisRegistry()
+    detector = BasicChordDetector()
+    registry.register("basic_chords", detector)
+
+    registry.register("basic_chords", detector)
+    with pytest.raises(ValueError):
+        registry.register("basic_chords", BasicChordDetector({"time_resolution": 0.1}))
+    with pytest.raises(ValueError):
+        registry.register("basic_chords", BasicKeyDetector())
+    assert registry.get("basic_chords") is detector
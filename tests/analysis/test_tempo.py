@@ -2,7 +2,6 @@
 
 import pytest
 import numpy as np
-import soundfile as sf
 
 from mcp_audio_server.analysis.tempo_tracking import (
     BasicTempoDetector,
@@ -22,11 +21,11 @@ def advanced_detector():
     return AdvancedTempoDetector({"return_beats": True})
 
 
-def test_detect_tempo_120bpm_fixture(basic_detector):
+def test_detect_tempo_120bpm_fixture(basic_detector, wav_cache):
     """Test detecting tempo from a 120 BPM audio fixture."""
     # Load the test fixture
     audio_path = "tests/fixtures/tempo/120bpm_click.wav"
-    wav, sr = sf.read(audio_path)
+    wav, sr = wav_cache(audio_path)
 
     # Detect tempo
     result = basic_detector.detect_tempo(wav, sr)
@@ -36,11 +35,11 @@ def test_detect_tempo_120bpm_fixture(basic_detector):
     assert 0 <= result["confidence"] <= 1.0
 
 
-def test_detect_tempo_90bpm_fixture(basic_detector):
+def test_detect_tempo_90bpm_fixture(basic_detector, wav_cache):
     """Test detecting tempo from a 90 BPM audio fixture."""
     # Load the test fixture
     audio_path = "tests/fixtures/tempo/90bpm_click.wav"
-    wav, sr = sf.read(audio_path)
+    wav, sr = wav_cache(audio_path)
 
     # Detect tempo
     result = basic_detector.detect_tempo(wav, sr)
@@ -50,26 +49,27 @@ def test_detect_tempo_90bpm_fixture(basic_detector):
     assert 0 <= result["confidence"] <= 1.0
 
 
-def test_advanced_detector_returns_beat_positions(advanced_detector):
+def test_advanced_detector_returns_beat_positions(advanced_detector, wav_cache):
     """Test that advanced detector returns beat positions."""
     # Load the test fixture
     audio_path = "tests/fixtures/tempo/120bpm_click.wav"
-    wav, sr = sf.read(audio_path)
+    wav, sr = wav_cache(audio_path)
 
     # Detect tempo with advanced detector
     result = advanced_detector.detect_tempo(wav, sr)
 
     # Assert beat positions are included
     assert "beat_positions" in result
-    assert isinstance(result["beat_positions"], list)
+    assert isinstance(result["beat_positions"], np.ndarray)
+    assert result["beat_positions"].dtype == np.float32
     assert len(result["beat_positions"]) > 0
 
 
-def test_detect_tempo_with_music(basic_detector, advanced_detector):
+def test_detect_tempo_with_music(basic_detector, advanced_detector, wav_cache):
     """Test detecting tempo from music with chords (not just clicks)."""
     # Load the test fixture
     audio_path = "tests/fixtures/tempo/120bpm_with_chord.wav"
-    wav, sr = sf.read(audio_path)
+    wav, sr = wav_cache(audio_path)
 
     # Detect tempo with basic detector
     basic_result = basic_detector.detect_tempo(wav, sr)
@@ -96,23 +96,48 @@ def test_empty_audio(basic_detector):
     assert "confidence" in result
 
 
-def test_detect_tempo_all_fixtures(basic_detector):
+@pytest.mark.parametrize("fixture_path,expected_tempo", [
+    ("tests/fixtures/tempo/60bpm_click.wav", 60),
+    ("tests/fixtures/tempo/90bpm_click.wav", 90),
+    ("tests/fixtures/tempo/120bpm_click.wav", 120),
+    ("tests/fixtures/tempo/150bpm_click.wav", 150),
+])
+def test_detect_tempo_all_fixtures(basic_detector, wav_cache, fixture_path, expected_tempo):
     """Test detecting tempo from all available tempo fixtures."""
-    # Define the expected tempos
-    fixtures = [
-        ("tests/fixtures/tempo/60bpm_click.wav", 60),
-        ("tests/fixtures/tempo/90bpm_click.wav", 90),
-        ("tests/fixtures/tempo/120bpm_click.wav", 120),
-        ("tests/fixtures/tempo/150bpm_click.wav", 150),
-    ]
-
-    # Test each fixture
-    for fixture_path, expected_tempo in fixtures:
-        wav, sr = sf.read(fixture_path)
-        result = basic_detector.detect_tempo(wav, sr)
-
-        # Allow for a 5% margin of error
-        margin = expected_tempo * 0.05
-        min_tempo = expected_tempo - margin
-        max_tempo = expected_tempo + margin
-        assert min_tempo <= result["tempo"] <= max_tempo
+    wav, sr = wav_cache(fixture_path)
+    result = basic_detector.detect_tempo(wav, sr)
+
+    # Allow for a 5% margin of error
+    margin = expected_tempo * 0.05
+    min_tempo = expected_tempo - margin
+    max_tempo = expected_tempo + margin
+    assert min_tempo <= result["tempo"] <= max_tempo
+
+
+def test_detect_tempo_with_precomputed_onset_env(basic_detector, wav_cache):
+    """Test that a precomputed onset envelope is used instead of the waveform."""
+    import librosa
+
+    wav, sr = wav_cache("tests/fixtures/tempo/120bpm_click.wav")
+    onset_env = librosa.onset.onset_strength(y=wav, sr=sr)
+
+    # An empty waveform shows the detector relied on the supplied features
+    result = basic_detector.detect_tempo(np.zeros(0), sr, {"onset_env": onset_env})
+
+    assert 118 <= result["tempo"] <= 122
+
+
+def test_onset_env_shared_between_detectors(basic_detector, advanced_detector, wav_cache):
+    """Test that the onset envelope from one detector can feed another."""
+    wav, sr = wav_cache("tests/fixtures/tempo/120bpm_click.wav")
+
+    features = {}
+
+    basic_result = basic_detector.detect_tempo(wav, sr, features)
+    onset_env = features["onset_env"]
+    advanced_result = advanced_detector.detect_tempo(wav, sr, features)
+
+    assert features["onset_env"] is onset_env
+    assert not hasattr(basic_detector, "onset_env")
+    assert abs(basic_result["tempo"] - advanced_result["tempo"]) < 5
+    assert len(advanced_result["beat_positions"]) > 0
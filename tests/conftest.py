@@ -0,0 +1,44 @@
+"""Shared pytest fixtures."""
+
+import orjson
+import pytest
+import soundfile as sf
+
+from mcp_audio_server import cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep cache files out of the system cache directory during tests."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    cache._memory_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def wav_cache():
+    """Return a loader that reads each WAV fixture once per test session."""
+    loaded = {}
+
+    def load(path):
+        if path not in loaded:
+            wav, sr = sf.read(path, dtype="float32", always_2d=False)
+            wav.flags.writeable = False  # Shared between tests
+            loaded[path] = (wav, sr)
+        return loaded[path]
+
+    return load
+
+
+@pytest.fixture(scope="session")
+def post_json():
+    """Return a poster that encodes JSON bodies with orjson.
+
+    The stdlib encoder TestClient uses for ``json=`` is slow on multi-MB
+    base64 audio strings.
+    """
+    headers = {"content-type": "application/json"}
+
+    def post(client, url, body):
+        return client.post(url, content=orjson.dumps(body), headers=headers)
+
+    return post
@@ -7,57 +7,118 @@ This script creates various audio files for testing the MCP audio server.
 import numpy as np
 import soundfile as sf
 import os
+import sys
+from functools import lru_cache
 from pathlib import Path
-import librosa
 import subprocess
 
 SAMPLE_RATE = 44100  # Standard sample rate in Hz
 DURATION = 3.0       # Duration of each sample in seconds
 
-def generate_sine_wave(frequency, duration, sample_rate=SAMPLE_RATE, amplitude=0.8):
-    """Generate a pure sine wave at the given frequency."""
+NOISE_SEED = 0       # Fixed so regenerated noise fixtures are identical
+
+# Waveforms are float32: soundfile converts to the PCM subtype on write
+_rng = np.random.default_rng(NOISE_SEED)
+
+@lru_cache(maxsize=32)
+def _time_base(sample_rate, duration):
+    """Shared, read-only sample times for a duration at a sample rate."""
+    # Kept float64: phases are computed in cycles before wrapping
     t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = amplitude * np.sin(2 * np.pi * frequency * t)
+    t.flags.writeable = False
+    return t
+
+def _sin_cycles(cycles, amplitude):
+    """Return amplitude * sin(2*pi*cycles) as float32, using cycles as scratch."""
+    # Drop whole cycles in float64 first; a float32 phase of thousands of
+    # radians keeps too little fractional precision
+    cycles -= np.rint(cycles)
+    phase = cycles.astype(np.float32)
+    phase *= np.float32(2 * np.pi)
+    wave = np.sin(phase, out=phase)
+    wave *= np.float32(amplitude)
     return wave
 
+def generate_sine_wave(frequency, duration, sample_rate=SAMPLE_RATE, amplitude=0.8):
+    """Generate a pure sine wave at the given frequency."""
+    return _sin_cycles(frequency * _time_base(sample_rate, duration), amplitude)
+
 def generate_sweep(start_freq, end_freq, duration, sample_rate=SAMPLE_RATE, amplitude=0.8):
     """Generate a frequency sweep (chirp) from start_freq to end_freq."""
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    
-    # Logarithmic sweep
-    phase = 2 * np.pi * start_freq * duration / np.log(end_freq/start_freq) * (np.exp(t/duration * np.log(end_freq/start_freq)) - 1)
-    sweep = amplitude * np.sin(phase)
-    
-    return sweep
+    # Logarithmic sweep, evaluated in place; expm1 avoids exp(x) - 1
+    # cancelling near t=0
+    k = np.log(end_freq / start_freq)
+    cycles = _time_base(sample_rate, duration) * (k / duration)
+    np.expm1(cycles, out=cycles)
+    cycles *= start_freq * duration / k
+    return _sin_cycles(cycles, amplitude)
 
 def generate_white_noise(duration, sample_rate=SAMPLE_RATE, amplitude=0.3):
     """Generate white noise."""
-    noise = amplitude * np.random.randn(int(sample_rate * duration))
+    noise = _rng.standard_normal(int(sample_rate * duration), dtype=np.float32)
+    noise *= np.float32(amplitude)
     return noise
 
-def create_mcp_audio_fixtures():
-    """Create audio fixtures for MCP audio server testing."""
-    base_dir = Path("~/dev/projects/mcp-audio-server/tests/fixtures/audio").expanduser()
+def _is_current(path, sample_rate, duration):
+    """Return True if path already holds a fixture of the expected length."""
+    try:
+        info = sf.info(str(path))
+    except (RuntimeError, OSError):
+        return False
+    return info.samplerate == sample_rate and info.frames == int(sample_rate * duration)
+
+def _write_fixture(path, render, sample_rate=SAMPLE_RATE, duration=DURATION,
+                   force=False, **kwargs):
+    """Render and write a fixture, unless an up-to-date file already exists."""
+    if not force and _is_current(path, sample_rate, duration):
+        return
+    sf.write(path, render(), sample_rate, **kwargs)
+    print(f"Created {path.name}")
+
+def _once(func, *args, **kwargs):
+    """Return a thunk computing func(*args, **kwargs) on its first call only."""
+    result = []
+    def thunk():
+        if not result:
+            result.append(func(*args, **kwargs))
+        return result[0]
+    return thunk
+
+def create_mcp_audio_fixtures(force=False):
+    """
+    Create audio fixtures for MCP audio server testing.
+    
+    Files that already exist with the expected sample rate and length are
+    left alone, without synthesizing them; pass force=True to rewrite all.
+    """
+    base_dir = Path(__file__).resolve().parent / "audio"
     os.makedirs(base_dir, exist_ok=True)
     
-    # Create fixtures in different formats
+    # Most fixtures use the same 440Hz tone at SAMPLE_RATE. Render it once,
+    # long enough for the longest duration file, and hand out read-only
+    # prefixes of it.
+    durations = [0.1, 0.5, 10.0, 30.0]
+    a440 = _once(generate_sine_wave, 440, max(DURATION, *durations))
+    def a440_for(duration=DURATION):
+        tone = a440()[:int(SAMPLE_RATE * duration)]
+        tone.flags.writeable = False
+        return tone
+    
+    # Create fixtures in different formats; soundfile takes the container
+    # from the extension. One WAV per tone: every WAV subtype shares the
+    # same file name, so only the last one written was ever kept.
     formats = [
-        {"ext": "wav", "format": "WAV", "subtype": "PCM_16"},
-        {"ext": "wav", "format": "WAV", "subtype": "PCM_24"},
-        {"ext": "wav", "format": "WAV", "subtype": "PCM_32"},
-        {"ext": "wav", "format": "WAV", "subtype": "FLOAT"},
-        {"ext": "flac", "format": "FLAC", "subtype": "PCM_16"},
-        {"ext": "ogg", "format": "OGG", "subtype": "VORBIS"},
+        {"ext": "wav", "subtype": "FLOAT"},
+        {"ext": "flac", "subtype": "PCM_16"},
+        {"ext": "ogg", "subtype": "VORBIS"},
     ]
     
     # 1. Generate standard test tones
     for freq in [100, 440, 1000, 10000]:
-        tone = generate_sine_wave(freq, DURATION)
+        tone = a440_for if freq == 440 else _once(generate_sine_wave, freq, DURATION)
         for fmt in formats:
-            filename = f"{freq}hz_sine.{fmt['ext']}"
-            sf.write(base_dir / filename, tone, SAMPLE_RATE, 
-                     format=fmt['format'], subtype=fmt['subtype'])
-            print(f"Created {filename}")
+            _write_fixture(base_dir / f"{freq}hz_sine.{fmt['ext']}", tone,
+                           force=force, subtype=fmt['subtype'])
     
     # 2. Generate frequency sweeps
     sweep_pairs = [
@@ -68,96 +129,91 @@ def create_mcp_audio_fixtures():
     ]
     
     for start, end in sweep_pairs:
-        sweep = generate_sweep(start, end, DURATION)
-        filename = f"sweep_{start}hz_to_{end}hz.wav"
-        sf.write(base_dir / filename, sweep, SAMPLE_RATE)
-        print(f"Created {filename}")
+        _write_fixture(base_dir / f"sweep_{start}hz_to_{end}hz.wav",
+                       lambda: generate_sweep(start, end, DURATION), force=force)
     
     # 3. Generate white noise
-    noise = generate_white_noise(DURATION)
-    sf.write(base_dir / "white_noise.wav", noise, SAMPLE_RATE)
-    print("Created white_noise.wav")
+    _write_fixture(base_dir / "white_noise.wav",
+                   lambda: generate_white_noise(DURATION), force=force)
     
     # 4. Generate different sample rates
     for sr in [8000, 16000, 22050, 44100, 48000, 96000]:
         # Resample a 440Hz tone to the target sample rate
-        tone = generate_sine_wave(440, DURATION, sample_rate=sr)
-        filename = f"440hz_sr_{sr}.wav"
-        sf.write(base_dir / filename, tone, sr)
-        print(f"Created {filename}")
+        _write_fixture(base_dir / f"440hz_sr_{sr}.wav",
+                       a440_for if sr == SAMPLE_RATE else
+                       lambda: generate_sine_wave(440, DURATION, sample_rate=sr),
+                       sample_rate=sr, force=force)
     
     # 5. Generate multi-channel audio
-    tone = generate_sine_wave(440, DURATION)
-    
     # Stereo (2 channels)
     # Left channel: 440Hz, Right channel: 880Hz
-    right_channel = generate_sine_wave(880, DURATION)
-    stereo = np.vstack((tone, right_channel)).T
-    sf.write(base_dir / "stereo_440_880hz.wav", stereo, SAMPLE_RATE)
-    print("Created stereo_440_880hz.wav")
+    # Stack along axis 1 so frames are already interleaved (C order) and
+    # soundfile doesn't have to copy a transposed view
+    _write_fixture(base_dir / "stereo_440_880hz.wav", lambda: np.stack(
+        (a440_for(), generate_sine_wave(880, DURATION)),
+        axis=1
+    ), force=force)
     
     # 5.1 surround (6 channels)
-    ch1 = generate_sine_wave(100, DURATION, amplitude=0.5)
-    ch2 = generate_sine_wave(200, DURATION, amplitude=0.5)
-    ch3 = generate_sine_wave(300, DURATION, amplitude=0.5)
-    ch4 = generate_sine_wave(400, DURATION, amplitude=0.5)
-    ch5 = generate_sine_wave(500, DURATION, amplitude=0.5)
-    ch6 = generate_sine_wave(50, DURATION, amplitude=0.5)  # LFE channel
-    surround = np.vstack((ch1, ch2, ch3, ch4, ch5, ch6)).T
-    sf.write(base_dir / "surround_5_1.wav", surround, SAMPLE_RATE)
-    print("Created surround_5_1.wav")
+    channel_freqs = [100, 200, 300, 400, 500, 50]  # Last is the LFE channel
+    _write_fixture(base_dir / "surround_5_1.wav", lambda: np.stack(
+        [generate_sine_wave(freq, DURATION, amplitude=0.5) for freq in channel_freqs],
+        axis=1
+    ), force=force)
     
     # 6. Generate MP3 files using FFmpeg
-    try:
-        # First create a WAV file, then convert to MP3
-        tone = generate_sine_wave(440, DURATION)
-        temp_wav = base_dir / "temp.wav"
-        sf.write(temp_wav, tone, SAMPLE_RATE)
-        
-        # Convert to MP3 at different bitrates
-        for bitrate in [64, 128, 192, 320]:
-            mp3_file = base_dir / f"440hz_mp3_{bitrate}k.mp3"
-            subprocess.run([
-                "ffmpeg", "-y", "-i", str(temp_wav), 
-                "-b:a", f"{bitrate}k", str(mp3_file)
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            print(f"Created 440hz_mp3_{bitrate}k.mp3")
-        
-        # Clean up temp file
-        os.remove(temp_wav)
-    except (subprocess.SubprocessError, FileNotFoundError):
-        print("Warning: FFmpeg not available, skipping MP3 generation")
+    bitrates = [64, 128, 192, 320]
+    mp3_files = [base_dir / f"440hz_mp3_{bitrate}k.mp3" for bitrate in bitrates]
+    if force or not all(path.exists() for path in mp3_files):
+        try:
+            # Pipe the raw samples into one ffmpeg that encodes every bitrate,
+            # so the tone is neither written to disk nor decoded per output
+            tone = a440_for()
+            cmd = [
+                "ffmpeg", "-y", "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1",
+                "-i", "pipe:0"
+            ]
+            for bitrate, path in zip(bitrates, mp3_files):
+                cmd += ["-b:a", f"{bitrate}k", str(path)]
+            
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            proc.communicate(tone.astype(np.float32, copy=False).tobytes())
+            if proc.returncode != 0:
+                raise subprocess.CalledProcessError(proc.returncode, cmd)
+            
+            for path in mp3_files:
+                print(f"Created {path.name}")
+        except (subprocess.SubprocessError, FileNotFoundError):
+            print("Warning: FFmpeg not available, skipping MP3 generation")
     
     # 7. Generate short and long duration files
-    durations = [0.1, 0.5, 10.0, 30.0]
     for dur in durations:
-        tone = generate_sine_wave(440, dur)
-        filename = f"440hz_duration_{dur}s.wav"
-        sf.write(base_dir / filename, tone, SAMPLE_RATE)
-        print(f"Created {filename}")
+        _write_fixture(base_dir / f"440hz_duration_{dur}s.wav",
+                       lambda: a440_for(dur), duration=dur, force=force)
     
     # 8. Generate special test cases
     # Silence
-    silence = np.zeros(int(SAMPLE_RATE * DURATION))
-    sf.write(base_dir / "silence.wav", silence, SAMPLE_RATE)
-    print("Created silence.wav")
+    _write_fixture(base_dir / "silence.wav",
+                   lambda: np.zeros(int(SAMPLE_RATE * DURATION), dtype=np.float32),
+                   force=force)
     
     # DC offset (non-zero mean)
-    dc_offset = generate_sine_wave(440, DURATION) + 0.5
-    sf.write(base_dir / "dc_offset.wav", dc_offset, SAMPLE_RATE)
-    print("Created dc_offset.wav")
+    _write_fixture(base_dir / "dc_offset.wav",
+                   lambda: a440_for() + 0.5, force=force)
     
     # Very high amplitude (near clipping)
-    high_amp = generate_sine_wave(440, DURATION, amplitude=0.99)
-    sf.write(base_dir / "high_amplitude.wav", high_amp, SAMPLE_RATE)
-    print("Created high_amplitude.wav")
+    _write_fixture(base_dir / "high_amplitude.wav",
+                   lambda: generate_sine_wave(440, DURATION, amplitude=0.99), force=force)
     
     # Clipped audio
-    clipped = generate_sine_wave(440, DURATION, amplitude=1.5)
-    clipped = np.clip(clipped, -1.0, 1.0)
-    sf.write(base_dir / "clipped.wav", clipped, SAMPLE_RATE)
-    print("Created clipped.wav")
+    def render_clipped():
+        clipped = generate_sine_wave(440, DURATION, amplitude=1.5)
+        return np.clip(clipped, -1.0, 1.0, out=clipped)
+    _write_fixture(base_dir / "clipped.wav", render_clipped, force=force)
 
 if __name__ == "__main__":
-    create_mcp_audio_fixtures()
+    create_mcp_audio_fixtures(force="--force" in sys.argv[1:])
     print("All MCP audio fixtures generated successfully!")
@@ -7,6 +7,7 @@ This script creates WAV files with specific chords, tempos, and keys for testing
 import numpy as np
 import soundfile as sf
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # Base frequencies for notes (A4 = 440Hz standard tuning)
@@ -36,10 +37,38 @@ CHORD_TYPES = {
     'dominant7': [0, 4, 7, 10],  # Root, major third, perfect fifth, minor seventh
 }
 
+# Lookup tables for chord synthesis: frequencies in NOTE_FREQUENCIES order,
+# equal-tempered ratios by semitone, and chord intervals as index arrays
+_NOTE_INDEX = {note: i for i, note in enumerate(NOTE_FREQUENCIES)}
+_NOTE_HZ = np.array(list(NOTE_FREQUENCIES.values()))
+_SEMITONE_RATIOS = 2.0 ** (np.arange(12) / 12.0)
+_CHORD_OFFSETS = {name: np.array(offsets) for name, offsets in CHORD_TYPES.items()}
+
 SAMPLE_RATE = 44100  # Standard sample rate in Hz
 DURATION = 3.0       # Duration of each sample in seconds
 
 
+def _sin_cycles(cycles, amplitude):
+    """Return amplitude * sin(2*pi*cycles) as float32, using cycles as scratch."""
+    # Drop whole cycles in float64 first; a float32 phase of thousands of
+    # radians keeps too little fractional precision
+    cycles -= np.rint(cycles)
+    phase = cycles.astype(np.float32)
+    phase *= np.float32(2 * np.pi)
+    wave = np.sin(phase, out=phase)
+    wave *= np.float32(amplitude)
+    return wave
+
+
+@lru_cache(maxsize=32)
+def _time_base(sample_rate, duration):
+    """Shared, read-only sample times for a duration at a sample rate."""
+    # Kept float64: chord phases are computed in cycles before wrapping
+    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    t.flags.writeable = False
+    return t
+
+
 def get_note_frequency(note, octave=4):
     """Get the frequency of a note in a specific octave."""
     base_freq = NOTE_FREQUENCIES[note]
@@ -52,38 +81,40 @@ def get_note_frequency(note, octave=4):
 
 def generate_tone(frequency, duration, sample_rate=SAMPLE_RATE, amplitude=0.3):
     """Generate a pure sine wave tone at the given frequency."""
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    tone = amplitude * np.sin(2 * np.pi * frequency * t)
-    return tone
+    return _sin_cycles(frequency * _time_base(sample_rate, duration), amplitude)
 
 
-def generate_chord(root_note, chord_type, duration=DURATION, sample_rate=SAMPLE_RATE):
-    """Generate a chord based on the root note and chord type."""
+def generate_chord(root_note, chord_type, duration=DURATION, sample_rate=SAMPLE_RATE,
+                   out=None):
+    """Generate a chord based on the root note and chord type, into out if given."""
     if root_note not in NOTE_FREQUENCIES:
         raise ValueError(f"Unknown note: {root_note}")
     if chord_type not in CHORD_TYPES:
         raise ValueError(f"Unknown chord type: {chord_type}")
     
-    root_freq = NOTE_FREQUENCIES[root_note]
-    chord = np.zeros(int(sample_rate * duration))
+    freqs = _NOTE_HZ[_NOTE_INDEX[root_note]] * _SEMITONE_RATIOS[_CHORD_OFFSETS[chord_type]]
+    t = _time_base(sample_rate, duration)
     
-    # Add the frequencies for each note in the chord
-    for semitone_offset in CHORD_TYPES[chord_type]:
-        freq = root_freq * (2 ** (semitone_offset / 12))
-        chord += generate_tone(freq, duration, sample_rate)
+    # One sin call over a (notes, samples) phase matrix
+    chord = _sin_cycles(np.multiply.outer(freqs, t), 1.0).sum(axis=0, out=out)
     
     # Normalize to prevent clipping
-    chord = chord / np.max(np.abs(chord))
+    chord /= max(chord.max(), -chord.min())
     return chord
 
 
 def generate_chord_progression(chords, durations, sample_rate=SAMPLE_RATE):
     """Generate a chord progression with the given chords and durations."""
-    progression = np.array([])
+    lengths = [int(sample_rate * duration) for duration in durations]
+    # Written out as PCM_16, so float32 loses nothing and halves the buffer
+    progression = np.empty(sum(lengths), dtype=np.float32)
     
-    for (root, chord_type), duration in zip(chords, durations):
-        chord = generate_chord(root, chord_type, duration, sample_rate)
-        progression = np.append(progression, chord)
+    # Each chord is summed and normalized directly in its slice
+    start = 0
+    for (root, chord_type), duration, length in zip(chords, durations, lengths):
+        generate_chord(root, chord_type, duration, sample_rate,
+                       out=progression[start:start + length])
+        start += length
     
     return progression
 
@@ -96,26 +127,22 @@ def generate_metronome(tempo, duration, sample_rate=SAMPLE_RATE):
     total_samples = int(sample_rate * duration)
     
     # Create an empty array
-    click_track = np.zeros(total_samples)
+    click_track = np.zeros(total_samples, dtype=np.float32)
     
-    # Add clicks at beat intervals
+    # Click sound (short burst), identical for every beat
+    click_duration = 0.01  # 10ms click
+    click_samples = int(sample_rate * click_duration)
+    t = np.arange(click_samples, dtype=np.float32) / np.float32(sample_rate)
+    click = np.sin(np.float32(2 * np.pi * 1000) * t)
+    click *= np.float32(0.5)
+    
+    # Apply envelope to avoid clicks
+    click *= np.exp(np.float32(-5 / click_duration) * t)
+    
+    # Add clicks at beat intervals, cutting the last one at the end of the track
     for i in range(0, total_samples, samples_per_beat):
-        # Click sound (short burst)
-        click_duration = 0.01  # 10ms click
-        click_samples = int(sample_rate * click_duration)
-        
-        # Ensure we don't go beyond the array bounds
         end_idx = min(i + click_samples, total_samples)
-        
-        # Generate short sine burst for click
-        t = np.linspace(0, click_duration, end_idx - i, endpoint=False)
-        click = 0.5 * np.sin(2 * np.pi * 1000 * t)
-        
-        # Apply envelope to avoid clicks
-        envelope = np.exp(-5 * t / click_duration)
-        click = click * envelope
-        
-        click_track[i:end_idx] = click
+        click_track[i:end_idx] = click[:end_idx - i]
     
     return click_track
 
@@ -135,7 +162,7 @@ def create_test_files():
         for chord_type in chord_types:
             chord = generate_chord(root, chord_type)
             filename = f"{root}_{chord_type}.wav"
-            sf.write(base_dir / 'chords' / filename, chord, SAMPLE_RATE)
+            sf.write(base_dir / 'chords' / filename, chord, SAMPLE_RATE, subtype='PCM_16')
             print(f"Created {filename}")
     
     # 2. Generate chord progressions
@@ -158,14 +185,14 @@ def create_test_files():
     
     for chords, durations, filename in progressions:
         progression = generate_chord_progression(chords, durations)
-        sf.write(base_dir / 'chords' / filename, progression, SAMPLE_RATE)
+        sf.write(base_dir / 'chords' / filename, progression, SAMPLE_RATE, subtype='PCM_16')
         print(f"Created {filename}")
     
     # 3. Generate tempo examples
     for tempo in [60, 90, 120, 180]:
         metronome = generate_metronome(tempo, DURATION)
         filename = f"{tempo}bpm_click.wav"
-        sf.write(base_dir / 'tempo' / filename, metronome, SAMPLE_RATE)
+        sf.write(base_dir / 'tempo' / filename, metronome, SAMPLE_RATE, subtype='PCM_16')
         print(f"Created {filename}")
         
         # Also create a combined version with a chord
@@ -173,7 +200,7 @@ def create_test_files():
         combined = 0.7 * chord + 0.3 * metronome
         combined = combined / np.max(np.abs(combined))
         filename = f"{tempo}bpm_with_chord.wav"
-        sf.write(base_dir / 'tempo' / filename, combined, SAMPLE_RATE)
+        sf.write(base_dir / 'tempo' / filename, combined, SAMPLE_RATE, subtype='PCM_16')
         print(f"Created {filename}")
     
     # 4. Generate key examples (simple chord progressions in different keys)
@@ -190,18 +217,18 @@ def create_test_files():
             [1.0, 1.0, 1.0, 1.0]
         )
         filename = f"{key}_major_key.wav"
-        sf.write(base_dir / 'key' / filename, progression, SAMPLE_RATE)
+        sf.write(base_dir / 'key' / filename, progression, SAMPLE_RATE, subtype='PCM_16')
         print(f"Created {filename}")
     
     # 5. Generate edge cases
     # Silent audio
-    silent = np.zeros(int(SAMPLE_RATE * DURATION))
-    sf.write(base_dir / 'edge_cases' / 'silent.wav', silent, SAMPLE_RATE)
+    silent = np.zeros(int(SAMPLE_RATE * DURATION), dtype=np.float32)
+    sf.write(base_dir / 'edge_cases' / 'silent.wav', silent, SAMPLE_RATE, subtype='PCM_16')
     print("Created silent.wav")
     
     # Very short audio (100ms)
     short_chord = generate_chord('C', 'major', 0.1)
-    sf.write(base_dir / 'edge_cases' / 'very_short.wav', short_chord, SAMPLE_RATE)
+    sf.write(base_dir / 'edge_cases' / 'very_short.wav', short_chord, SAMPLE_RATE, subtype='PCM_16')
     print("Created very_short.wav")
     
     # Very long audio (10s)
@@ -209,14 +236,13 @@ def create_test_files():
         [('C', 'major'), ('F', 'major'), ('G', 'major'), ('C', 'major')],
         [2.5, 2.5, 2.5, 2.5]
     )
-    sf.write(base_dir / 'edge_cases' / 'very_long.wav', long_progression, SAMPLE_RATE)
+    sf.write(base_dir / 'edge_cases' / 'very_long.wav', long_progression, SAMPLE_RATE, subtype='PCM_16')
     print("Created very_long.wav")
     
     # Low sample rate
     low_sr = 8000
-    t = np.linspace(0, DURATION, int(low_sr * DURATION), endpoint=False)
-    low_quality = 0.5 * np.sin(2 * np.pi * 440 * t)
-    sf.write(base_dir / 'edge_cases' / 'low_sample_rate.wav', low_quality, low_sr)
+    low_quality = generate_tone(440, DURATION, low_sr, amplitude=0.5)
+    sf.write(base_dir / 'edge_cases' / 'low_sample_rate.wav', low_quality, low_sr, subtype='PCM_16')
     print("Created low_sample_rate.wav")
     
     # 6. Generate error test cases
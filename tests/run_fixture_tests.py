@@ -4,9 +4,11 @@ Utility script to run tests with MCP audio fixtures.
 This script helps with running tests against the audio fixtures we've created.
 """
 
+import json
 import os
 import sys
 import argparse
+import importlib.util
 import subprocess
 from pathlib import Path
 import random
@@ -68,6 +70,9 @@ def parse_args():
         help="Number of random samples to test (when --random is used)",
     )
     
+    # Files for the 'specific' test type; --random fills in several at once
+    parser.set_defaults(specific_files=None)
+    
     return parser.parse_args()
 
 
@@ -81,9 +86,19 @@ def generate_fixtures():
     print("Fixtures generated.")
 
 
+def parallel_args():
+    """Return pytest-xdist arguments when the plugin is installed."""
+    if importlib.util.find_spec("xdist") is None:
+        return []
+    # loadfile keeps each module on one worker, so its cached payloads and
+    # module-level client are built once per file
+    return ["-n", "auto", "--dist", "loadfile"]
+
+
 def get_test_command(args):
     """Build the pytest command based on command line arguments."""
-    cmd = ["pytest", "-v"]
+    # Fixture tests are independent per file, so spread them across CPUs
+    cmd = ["pytest", "-vv" if args.verbose else "-v", *parallel_args()]
     
     # Use mock implementations for stable testing
     os.environ["USE_MOCK_IMPLEMENTATIONS"] = "1"
@@ -108,14 +123,11 @@ def get_test_command(args):
         cmd.append("tests/test_audio_fixtures.py::test_edge_cases")
     elif args.test_type == "error":
         cmd.append("tests/test_audio_fixtures.py::test_error_cases")
-    elif args.test_type == "specific" and args.specific_file:
+    elif args.test_type == "specific" and (args.specific_files or args.specific_file):
         # For specific file testing, we'll create a temporary test file
-        create_specific_test(args.specific_file)
+        create_specific_test(args.specific_files or [args.specific_file])
         cmd.append("tests/test_specific_fixture.py")
     
-    if args.verbose:
-        cmd.append("-v")
-    
     return cmd
 
 
@@ -126,58 +138,67 @@ def get_random_fixtures(directory, num_samples=5, pattern="*.wav"):
     return random.sample(files, min(num_samples, len(files)))
 
 
-def create_specific_test(specific_file):
-    """Create a temporary test file for testing a specific fixture."""
-    test_file_content = f"""
+def create_specific_test(specific_files):
+    """Create a temporary test file for testing specific fixtures in one run."""
+    # The file list goes through the environment, so the module is the
+    # same for every run and one pytest process covers all the files
+    os.environ["FIXTURE_LIST"] = json.dumps([str(path) for path in specific_files])
+    
+    test_file_content = """
+import base64
+import json
 import os
+
 import pytest
-import base64
 from fastapi.testclient import TestClient
 
 from mcp_audio_server.main import app
 
 client = TestClient(app)
 
-def get_test_audio():
+FIXTURE_LIST = json.loads(os.environ["FIXTURE_LIST"])
+
+def get_test_audio(path):
     \"\"\"Load specific test audio file as base64.\"\"\"
-    with open("{specific_file}", "rb") as f:
+    with open(path, "rb") as f:
         audio_bytes = f.read()
     return base64.b64encode(audio_bytes).decode("utf-8")
 
-def test_specific_file():
+@pytest.mark.parametrize("path", FIXTURE_LIST, ids=os.path.basename)
+def test_specific_file(path):
     \"\"\"Test a specific audio file.\"\"\"
-    audio_data = get_test_audio()
-    file_ext = os.path.splitext("{specific_file}")[1][1:]
+    audio_data = get_test_audio(path)
+    file_ext = os.path.splitext(path)[1][1:]
     
-    request_data = {{
+    request_data = {
         "audio_data": audio_data,
         "format": file_ext,
-        "options": {{"model": "basic"}},
+        "options": {"model": "basic"},
         "analyzers": ["chords", "tempo", "key"]
-    }}
+    }
     
     response = client.post("/analyze", json=request_data)
-    print(f"\\nResponse status code: {{response.status_code}}")
-    print(f"Response headers: {{response.headers}}")
+    print(f"\\nResponse status code: {response.status_code}")
+    print(f"Response headers: {response.headers}")
     result = response.json()
-    print(f"Response: {{result}}")
+    print(f"Response: {result}")
     
     if response.status_code == 200:
         assert "schema_version" in result
         if "chords" in result:
-            print(f"Chords detected: {{result['chords']}}")
+            print(f"Chords detected: {result['chords']}")
         if "tempo" in result:
-            print(f"Tempo detected: {{result['tempo']}}")
+            print(f"Tempo detected: {result['tempo']}")
         if "key" in result:
-            print(f"Key detected: {{result['key']}}")
+            print(f"Key detected: {result['key']}")
     else:
-        print(f"Error: {{result}}")
+        print(f"Error: {result}")
 """
     
     with open("tests/test_specific_fixture.py", "w") as f:
         f.write(test_file_content)
     
-    print(f"Created test file for testing {specific_file}")
+    print(f"Created test file for testing {len(specific_files)} fixture(s)")
 
 
 def main():
@@ -193,11 +214,11 @@ def main():
         fixtures = get_random_fixtures(AUDIO_DIR, args.sample_size)
         
         for fixture in fixtures:
-            print(f"\nTesting with {fixture}...")
-            args.test_type = "specific"
-            args.specific_file = fixture
-            cmd = get_test_command(args)
-            subprocess.run(cmd, check=True)
+            print(f"  {fixture}")
+        args.test_type = "specific"
+        args.specific_files = fixtures
+        cmd = get_test_command(args)
+        subprocess.run(cmd, check=True)
     else:
         # Run the standard tests
         cmd = get_test_command(args)
@@ -10,6 +10,7 @@ import os
 import sys
 import subprocess
 import argparse
+import importlib.util
 from pathlib import Path
 
 # Default paths
@@ -63,6 +64,15 @@ def check_fixtures():
     return True
 
 
+def parallel_args():
+    """Return pytest-xdist arguments when the plugin is installed."""
+    if importlib.util.find_spec("xdist") is None:
+        return []
+    # loadfile keeps each module on one worker, so its cached payloads and
+    # module-level client are built once per file
+    return ["-n", "auto", "--dist", "loadfile"]
+
+
 def run_tests(args):
     """Run pytest with specified options."""
     if not check_fixtures():
@@ -84,6 +94,11 @@ def run_tests(args):
         cmd.append("tests/test_audio_fixtures.py")
         cmd.append("tests/test_mcp_audio_fixtures.py")
     
+    # Spread tests across CPUs; `coverage run` would only see the
+    # controller process, so stay serial when measuring coverage
+    if not args.coverage:
+        cmd += parallel_args()
+    
     # Add coverage args if requested
     if args.coverage:
         os.makedirs(COVERAGE_DIR, exist_ok=True)
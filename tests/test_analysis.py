@@ -15,30 +15,35 @@ from tests.mock_implementations import (
 )
 from mcp_audio_server.analysis.registry import AnalysisRegistry
 
+# Time base for synthetic test signals, shared read-only. Kept float64:
+# phases built from it reach thousands of radians.
+SAMPLE_RATE = 44100
+DURATION = 3.0  # seconds
+T = np.arange(int(SAMPLE_RATE * DURATION)) / SAMPLE_RATE
+T.flags.writeable = False
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def sample_audio():
-    """Create a sample audio array for testing."""
+    """Create a sample audio array for testing, shared read-only by all tests."""
     # Create a simple sine wave at 440 Hz (A4 note)
-    sample_rate = 44100
-    duration = 3.0  # seconds
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    # A4 = 440 Hz
-    a4 = np.sin(2 * np.pi * 440 * t)
-    # Add a lower frequency to simulate a C chord (C, E, G)
-    c4 = np.sin(2 * np.pi * 261.63 * t) * 0.5
-    e4 = np.sin(2 * np.pi * 329.63 * t) * 0.5
-    g4 = np.sin(2 * np.pi * 392.00 * t) * 0.5
-    # Combine the signals
-    audio = a4 + c4 + e4 + g4
+    # A4 = 440 Hz, plus lower frequencies at half level to simulate a
+    # C chord (C, E, G)
+    freqs = np.array([440.0, 261.63, 329.63, 392.00])
+    amps = np.array([1.0, 0.5, 0.5, 0.5], dtype=np.float32)
+    # Evaluate all partials in one sin pass, then combine them. The phase
+    # stays float64 for accuracy; the samples are float32 like decoded audio.
+    phase = np.multiply.outer(2 * np.pi * freqs, T)
+    audio = amps @ np.sin(phase, dtype=np.float32)
     # Normalize
-    audio = audio / np.max(np.abs(audio))
-    return audio, sample_rate
+    audio /= np.max(np.abs(audio))
+    audio.flags.writeable = False
+    return audio, SAMPLE_RATE
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def registry():
-    """Create a test registry."""
+    """Create a test registry; the mock detectors hold only their config."""
     registry = AnalysisRegistry()
     registry.register("basic_chords", BasicChordDetector())
     registry.register("advanced_chords", AdvancedChordDetector())
@@ -156,10 +161,7 @@ def test_advanced_chord_detection(sample_audio):
     assert len(advanced_chords) > 0
     
     # Advanced detector might include 7th chords
-    seven_chord_count = 0
-    for chord in advanced_chords:
-        if '7' in chord.label:
-            seven_chord_count += 1
+    seven_chord_count = sum('7' in chord.label for chord in advanced_chords)
     
     # Note: This is a probabilistic test, might occasionally fail
     # as the advanced detector randomly assigns 7th chords
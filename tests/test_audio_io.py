@@ -0,0 +1,118 @@
+"""Tests for audio decoding utilities."""
+
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from mcp_audio_server import audio_io
+from mcp_audio_server.audio_io import (
+    AudioDecodeError,
+    AudioDecodingException,
+    PYAV_AVAILABLE,
+    TARGET_SAMPLE_RATE,
+    decode_with_pyav,
+    normalize_audio,
+)
+
+requires_pyav = pytest.mark.skipif(not PYAV_AVAILABLE, reason="PyAV not installed")
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="FFmpeg/FFprobe not installed",
+)
+
+
+@requires_pyav
+@pytest.mark.parametrize(
+    "fixture_name",
+    ["440hz_sine.wav", "440hz_sine.flac", "440hz_mp3_320k.mp3", "stereo_440_880hz.wav"],
+)
+def test_decode_with_pyav_normalizes_audio(fixture_name):
+    """Test that PyAV decoding yields mono float32 audio at the target rate."""
+    with open(f"tests/fixtures/audio/{fixture_name}", "rb") as f:
+        audio, sr = decode_with_pyav(f.read())
+
+    assert sr == TARGET_SAMPLE_RATE
+    assert audio.ndim == 1
+    assert audio.dtype == np.float32
+    assert 0 < np.abs(audio).max() <= 1.0
+
+
+@requires_pyav
+def test_decode_with_pyav_matches_soundfile():
+    """Test that decoded PCM WAV samples match soundfile's float32 read."""
+    path = "tests/fixtures/audio/440hz_sine.wav"
+    expected, _ = sf.read(path, dtype="float32")
+
+    with open(path, "rb") as f:
+        audio, _ = decode_with_pyav(f.read())
+
+    np.testing.assert_allclose(audio, expected, atol=1 / 32768)
+
+
+@requires_pyav
+def test_decode_with_pyav_rejects_non_audio():
+    """Test that non-audio bytes are rejected with a structured error."""
+    with pytest.raises(AudioDecodingException) as exc_info:
+        decode_with_pyav(b"This is not an audio file, just text." * 10)
+
+    assert exc_info.value.error_code == AudioDecodeError.INVALID_FILE_TYPE
+
+
+@requires_pyav
+def test_decode_with_pyav_from_worker_threads():
+    """Test that decoding works off the main thread, e.g. from a thread pool."""
+    with open("tests/fixtures/audio/440hz_sine.wav", "rb") as f:
+        data = f.read()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(decode_with_pyav, [data] * 4))
+
+    assert all(sr == TARGET_SAMPLE_RATE for _, sr in results)
+    assert len({len(audio) for audio, _ in results}) == 1
+
+
+@requires_pyav
+def test_decode_with_pyav_times_out(monkeypatch):
+    """Test that decoding past the time limit raises a timeout error."""
+    monkeypatch.setattr(audio_io, "FFMPEG_TIMEOUT_SEC", -1)
+    with open("tests/fixtures/audio/440hz_sine.wav", "rb") as f:
+        data = f.read()
+
+    with pytest.raises(AudioDecodingException) as exc_info:
+        decode_with_pyav(data)
+
+    assert exc_info.value.error_code == AudioDecodeError.TIMEOUT
+
+
+@requires_ffmpeg
+def test_normalize_audio_streams_pcm():
+    """Test that FFmpeg's piped PCM output matches soundfile's float32 read."""
+    path = "tests/fixtures/audio/440hz_sine.wav"
+    expected, _ = sf.read(path, dtype="float32")
+
+    audio, sr = normalize_audio(path)
+
+    assert sr == TARGET_SAMPLE_RATE
+    assert audio.dtype == np.float32
+    np.testing.assert_allclose(audio, expected, atol=1 / 32768)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+def test_normalize_audio_shares_one_deadline(monkeypatch):
+    """Test that time spent in FFprobe counts against the FFmpeg budget."""
+    monkeypatch.setattr(audio_io, "FFMPEG_TIMEOUT_SEC", 0.2)
+
+    def slow_info(path, timeout):
+        time.sleep(0.2)
+        return {"duration": 3.0, "size_bytes": 1, "size_mb": 0.0, "codec": "pcm_s16le"}
+
+    monkeypatch.setattr(audio_io, "get_audio_info", slow_info)
+
+    with pytest.raises(AudioDecodingException) as exc_info:
+        normalize_audio("tests/fixtures/audio/440hz_sine.wav")
+
+    assert exc_info.value.error_code == AudioDecodeError.TIMEOUT
@@ -0,0 +1,279 @@
+"""Tests for the caching utilities."""
+
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+import pytest
+
+from mcp_audio_server import cache
+
+
+@pytest.fixture
+def feature_cache(monkeypatch):
+    """Enable the feature cache, which is off by default."""
+    monkeypatch.setattr(cache, "FEATURE_CACHE_ENABLED", True)
+
+
+def test_cached_feature_computes_once(tmp_path, monkeypatch, feature_cache):
+    """Test that a cached feature is computed on a miss and reused on a hit."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    waveform = np.linspace(-1, 1, 1000, dtype=np.float32)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(12, dtype=np.float32)
+
+    first = cache.cached_feature("test_feature", waveform, 22050, compute)
+    second = cache.cached_feature("test_feature", waveform, 22050, compute)
+
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first, second)
+    assert second.dtype == np.float32
+
+
+def test_cached_feature_keyed_by_waveform_and_sr(tmp_path, monkeypatch, feature_cache):
+    """Test that different waveforms or sample rates don't share entries."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    waveform = np.zeros(100)
+
+    a = cache.cached_feature("f", waveform, 22050, lambda: np.array([1.0]))
+    b = cache.cached_feature("f", waveform, 44100, lambda: np.array([2.0]))
+    c = cache.cached_feature("f", waveform + 1, 22050, lambda: np.array([3.0]))
+
+    assert (a[0], b[0], c[0]) == (1.0, 2.0, 3.0)
+
+
+def test_compute_file_hash_sources_agree(tmp_path, monkeypatch):
+    """Test that bytes, paths and file objects hash identically."""
+    monkeypatch.setattr(cache, "HASH_CHUNK_SIZE", 7)
+    data = b"RIFF" + bytes(range(256)) * 3
+    path = tmp_path / "audio.wav"
+    path.write_bytes(data)
+    expected = hashlib.sha256(data).hexdigest()
+
+    assert cache.compute_file_hash(data) == expected
+    assert cache.compute_file_hash(memoryview(data)) == expected
+    assert cache.compute_file_hash(path) == expected
+    assert cache.compute_file_hash(str(path)) == expected
+    assert cache.compute_file_hash(io.BytesIO(data)) == expected
+
+
+def test_compute_payload_hash():
+    """Test that payload keys are stable and distinguish payloads."""
+    payload = base64.b64encode(b"RIFF" + bytes(range(256))).decode("ascii")
+
+    key = cache.compute_payload_hash(payload)
+
+    assert key == cache.compute_payload_hash(payload)
+    assert key != cache.compute_payload_hash(payload[:-4])
+    assert len(key) == 32
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    """Test that saved analysis results are returned unchanged."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    data = {"key": "C", "beats": [0.5 * i for i in range(1000)], "chords": [{"label": "Am"}]}
+
+    assert asyncio.run(cache.save_to_cache("abc123", data))
+    cache._memory_cache.clear()
+
+    assert asyncio.run(cache.get_from_cache("abc123")) == data
+
+
+def test_cache_reads_legacy_json_entries(tmp_path, monkeypatch):
+    """Test that JSON entries written before msgpack are still served."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    legacy_path = cache.get_cache_path("def456").with_suffix(".json")
+    legacy_path.write_text(json.dumps({"tempo": 120.0}))
+
+    assert asyncio.run(cache.get_from_cache("def456")) == {"tempo": 120.0}
+
+
+def test_concurrent_saves_and_reads(tmp_path, monkeypatch):
+    """Test that concurrent cache writes and reads of distinct keys all succeed."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    keys = [f"{i:02x}key" for i in range(16)]
+
+    async def run():
+        saved = await asyncio.gather(*(cache.save_to_cache(k, {"id": k}) for k in keys))
+        cache._memory_cache.clear()
+        loaded = await asyncio.gather(*(cache.get_from_cache(k) for k in keys))
+        return saved, loaded
+
+    saved, loaded = asyncio.run(run())
+
+    assert all(saved)
+    assert loaded == [{"id": k} for k in keys]
+    assert not list(tmp_path.glob("**/*.tmp"))
+
+
+def test_performance_stats_intervals(monkeypatch):
+    """Test that checkpoints return the time since the previous checkpoint."""
+    clock = iter([10.0, 11.0, 13.5, 14.0])
+    monkeypatch.setattr(cache.time, "perf_counter", lambda: next(clock))
+    stats = cache.PerformanceStats("op")
+
+    assert stats.checkpoint("decode") == 1.0
+    assert stats.checkpoint("analyze") == 2.5
+    result = stats.finish()
+
+    assert result["checkpoints"] == {"decode": 1.0, "analyze": 3.5, "total": 4.0}
+    assert result["intervals"] == {
+        "start_to_decode": 1.0,
+        "decode_to_analyze": 2.5,
+        "analyze_to_total": 0.5,
+    }
+
+
+def test_cache_round_trips_ndarrays(tmp_path, monkeypatch):
+    """Test that numpy arrays in results are cached without converting to lists."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    beats = np.linspace(0, 10, 21, dtype=np.float32)
+
+    assert asyncio.run(cache.save_to_cache("beats1", {"beat_positions": beats}))
+    cache._memory_cache.clear()
+    loaded = asyncio.run(cache.get_from_cache("beats1"))["beat_positions"]
+
+    assert isinstance(loaded, np.ndarray)
+    assert loaded.dtype == np.float32
+    np.testing.assert_array_equal(loaded, beats)
+
+
+def test_memory_cache_serves_hot_keys(tmp_path, monkeypatch):
+    """Test that a file cache hit is served from memory afterwards."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    cache._memory_cache.clear()
+    asyncio.run(cache.save_to_cache("hot1", {"key": "G"}))
+    cache._memory_cache.clear()
+
+    first = asyncio.run(cache.get_from_cache("hot1"))
+    for path in tmp_path.glob("**/hot1*"):
+        path.unlink()
+    second = asyncio.run(cache.get_from_cache("hot1"))
+
+    assert first == second == {"key": "G"}
+
+
+def test_memory_cache_lru_and_ttl(monkeypatch):
+    """Test least-recently-used eviction and expiry of in-memory entries."""
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    memory = cache.MemoryCache(maxsize=2, ttl=10)
+
+    memory.set("a", 1)
+    memory.set("b", 2)
+    memory.get("a")
+    memory.set("c", 3)
+
+    assert (memory.get("a"), memory.get("b"), memory.get("c")) == (1, None, 3)
+    now[0] += 10
+    assert memory.get("a") is None
+
+
+class _FakePipeline:
+    """Minimal stand-in for a redis.asyncio pipeline."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, key):
+        self.commands.append(lambda: self.client.store.get(key))
+        return self
+
+    def ttl(self, key):
+        self.commands.append(lambda: self.client.ttls.get(key, -2))
+        return self
+
+    async def execute(self):
+        await asyncio.sleep(0)
+        return [command() for command in self.commands]
+
+
+class _FakeAsyncRedis:
+    """Minimal stand-in for a redis.asyncio client."""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    async def setex(self, key, ttl, value):
+        await asyncio.sleep(0)
+        self.store[key] = value
+        self.ttls[key] = ttl
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+def test_redis_cache_is_awaited(tmp_path, monkeypatch):
+    """Test that Redis reads and writes go through the asyncio client."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    client = _FakeAsyncRedis()
+    monkeypatch.setattr(cache, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(cache, "redis_client", client, raising=False)
+
+    asyncio.run(cache.save_to_cache("redis1", {"tempo": 90.0}))
+    cache._memory_cache.clear()
+    for path in tmp_path.glob("**/redis1*"):
+        path.unlink()
+
+    assert json.loads(client.store["mcp:analysis:redis1"]) == {"tempo": 90.0}
+    assert asyncio.run(cache.get_from_cache("redis1")) == {"tempo": 90.0}
+
+
+def test_cached_feature_keyed_by_params(feature_cache):
+    """Test that changing compute parameters doesn't serve a stale feature."""
+    waveform = np.ones(100, dtype=np.float32)
+
+    a = cache.cached_feature("f", waveform, 22050, lambda: np.array([1.0]), {"hop_length": 512})
+    b = cache.cached_feature("f", waveform, 22050, lambda: np.array([2.0]), {"hop_length": 256})
+    c = cache.cached_feature("f", waveform, 22050, lambda: np.array([3.0]), {"hop_length": 512})
+
+    assert (a[0], b[0], c[0]) == (1.0, 2.0, 1.0)
+
+
+def test_memory_cache_keeps_file_entry_expiry(tmp_path, monkeypatch):
+    """Test that a file hit is only kept in memory for its remaining lifetime."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    asyncio.run(cache.save_to_cache("old1", {"key": "D"}))
+    cache._memory_cache.clear()
+    path = cache.get_cache_path("old1")
+    aged = time.time() - cache.DEFAULT_CACHE_TTL + 5
+    os.utime(path, (aged, aged))
+
+    assert asyncio.run(cache.get_from_cache("old1")) == {"key": "D"}
+
+    expires_at, _ = cache._memory_cache._entries["old1"]
+    assert expires_at - time.monotonic() <= 5
+
+
+def test_cached_feature_off_by_default(tmp_path, monkeypatch):
+    """Test that features are recomputed and nothing is written unless enabled."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    waveform = np.ones(100, dtype=np.float32)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.array([1.0])
+
+    cache.cached_feature("f", waveform, 22050, compute)
+    cache.cached_feature("f", waveform, 22050, compute)
+
+    assert len(calls) == 2
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,234 @@
+"""Tests for concurrency controls."""
+
+import asyncio
+import resource
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from mcp_audio_server import concurrency
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Use small limits and run functions in-process instead of in the pool."""
+    monkeypatch.setattr(concurrency, "MAX_CONCURRENT", 2)
+    monkeypatch.setattr(concurrency, "MAX_QUEUE_SIZE", 1)
+    monkeypatch.setattr(concurrency, "_request_semaphore", asyncio.Semaphore(2))
+    monkeypatch.setattr(concurrency, "_waiting_requests", 0)
+
+    async def run_inline(func, *args, **kwargs):
+        return await func(*args, **kwargs)
+
+    monkeypatch.setattr(concurrency, "run_in_process_pool", run_inline)
+
+
+def test_concurrency_limit_queue_and_overflow(limits):
+    """Test that requests beyond the slots queue, and beyond the queue are rejected."""
+    running = []
+    peak = []
+    release = None
+
+    async def work(i):
+        running.append(i)
+        peak.append(len(running))
+        await release.wait()
+        running.remove(i)
+        return i
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(concurrency.with_concurrency_control(work, i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(concurrency.ServerBusy):
+            await concurrency.with_concurrency_control(work, 3)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert max(peak) == 2
+    assert concurrency._waiting_requests == 0
+
+
+def test_burst_beyond_queue_is_rejected(limits):
+    """Test that a same-tick burst is admitted only up to slots plus queue."""
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        return await asyncio.gather(
+            *(concurrency.with_concurrency_control(work) for _ in range(10)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert results.count("done") == 3
+    assert sum(isinstance(r, concurrency.ServerBusy) for r in results) == 7
+
+
+def test_queued_request_times_out(limits, monkeypatch):
+    """Test that a request waiting too long for a slot gets ServerBusy."""
+    monkeypatch.setattr(concurrency, "REQUEST_TIMEOUT", 0.01)
+
+    async def work():
+        return "done"
+
+    async def run():
+        # Occupy both slots
+        await concurrency._request_semaphore.acquire()
+        await concurrency._request_semaphore.acquire()
+        with pytest.raises(concurrency.ServerBusy):
+            await concurrency.with_concurrency_control(work)
+        concurrency._request_semaphore.release()
+        return await concurrency.with_concurrency_control(work)
+
+    assert asyncio.run(run()) == "done"
+    assert concurrency._waiting_requests == 0
+
+
+def test_run_in_process_pool_reuses_pool():
+    """Test that functions run in one shared worker pool."""
+    try:
+        first = asyncio.run(concurrency.run_in_process_pool(pow, 2, 10))
+        pool = concurrency._process_pool
+        second = asyncio.run(concurrency.run_in_process_pool(divmod, 7, 2))
+
+        assert (first, second) == (1024, (3, 1))
+        assert concurrency._process_pool is pool
+    finally:
+        concurrency.shutdown_process_pool()
+    assert concurrency._process_pool is None
+
+
+def test_thread_concurrency_control_runs_in_thread():
+    """Test that thread-offloaded work runs off the event loop thread."""
+    loop_thread = []
+
+    async def run():
+        loop_thread.append(threading.get_ident())
+        return await concurrency.with_thread_concurrency_control(threading.get_ident)
+
+    worker_thread = asyncio.run(run())
+
+    assert worker_thread != loop_thread[0]
+
+
+def test_shared_array_reaches_workers():
+    """Test that a SharedArray handle arrives in the worker as the array."""
+    signal = np.linspace(-1.0, 1.0, 4096, dtype=np.float32)
+
+    async def run(shared):
+        return await asyncio.gather(
+            concurrency.run_in_process_pool(np.sum, shared),
+            concurrency.run_in_process_pool(np.array_equal, shared, signal),
+        )
+
+    try:
+        with concurrency.shared_array(signal) as shared:
+            assert isinstance(shared, concurrency.SharedArray)
+            total, same = asyncio.run(run(shared))
+    finally:
+        concurrency.shutdown_process_pool()
+
+    assert same
+    assert total == pytest.approx(float(signal.sum()), abs=1e-3)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=shared.name)
+
+
+def test_admission_retry_absorbs_transient_busy(monkeypatch):
+    """Test that ServerBusy is retried with capped backoff, then re-raised."""
+    delays = []
+
+    async def record_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(concurrency.asyncio, "sleep", record_sleep)
+    attempts = []
+
+    async def busy_twice():
+        attempts.append(len(attempts))
+        if len(attempts) <= 2:
+            raise concurrency.ServerBusy(retry_after=3)
+        return "done"
+
+    async def always_busy():
+        raise concurrency.ServerBusy(retry_after=1)
+
+    assert asyncio.run(concurrency.with_admission_retry(busy_twice)) == "done"
+    assert delays == [1, 2]
+
+    delays.clear()
+    with pytest.raises(concurrency.ServerBusy):
+        asyncio.run(concurrency.with_admission_retry(always_busy, max_retries=2))
+    assert delays == [1, 1]
+
+
+def test_admission_retry_shares_one_deadline(limits, monkeypatch):
+    """Test that a queued request is not re-queued after its timeout expires."""
+    monkeypatch.setattr(concurrency, "REQUEST_TIMEOUT", 0.05)
+
+    async def run():
+        # Occupy both slots
+        await concurrency._request_semaphore.acquire()
+        await concurrency._request_semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with pytest.raises(concurrency.ServerBusy):
+            await concurrency.with_admission_retry(concurrency._acquire_slot, max_retries=3)
+        return loop.time() - start
+
+    # Retrying after each timed-out wait would take over a second
+    assert asyncio.run(run()) < 0.5
+    assert concurrency._waiting_requests == 0
+
+
+def test_admission_context_holds_one_slot_for_the_block(limits, monkeypatch):
+    """Test that a block is admitted once and times out as a whole."""
+    monkeypatch.setattr(concurrency, "REQUEST_TIMEOUT", 0.05)
+
+    async def run():
+        async with concurrency.admission_context(max_retries=0):
+            held = concurrency._request_semaphore._value
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            async with concurrency.admission_context(max_retries=0):
+                await asyncio.sleep(0.03)
+                await asyncio.sleep(0.03)
+        return held, concurrency._request_semaphore._value
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_set_limit_only_tightens():
+    """Test that resource limits are lowered but never raised."""
+    original = resource.getrlimit(resource.RLIMIT_NOFILE)
+    soft, hard = original
+    try:
+        concurrency._set_limit(resource.RLIMIT_NOFILE, soft - 1)
+        assert resource.getrlimit(resource.RLIMIT_NOFILE) == (soft - 1, hard)
+
+        concurrency._set_limit(resource.RLIMIT_NOFILE, soft)
+        assert resource.getrlimit(resource.RLIMIT_NOFILE) == (soft - 1, hard)
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, original)
+
+
+def test_task_cpu_limit_is_relative_to_usage(monkeypatch):
+    """Test that each pool task gets a fresh CPU budget on top of past usage."""
+    monkeypatch.setattr(concurrency, "DISABLE_RLIMIT", False)
+    original = resource.getrlimit(resource.RLIMIT_CPU)
+    try:
+        concurrency._arm_task_cpu_limit()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        assert hard == original[1]
+        assert soft >= usage.ru_utime + usage.ru_stime + concurrency.TASK_CPU_BUDGET
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, original)
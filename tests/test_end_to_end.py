@@ -1,32 +1,54 @@
 """End-to-end tests for the MCP Audio Server FastAPI application."""
 
-import base64
+import asyncio
 import json
 import os
 import pytest
+import soundfile as sf
 from fastapi.testclient import TestClient
 
-from mcp_audio_server.main import app
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
 
+from mcp_audio_server.main import analyze_audio, app
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def client():
-    """Return a FastAPI test client."""
-    return TestClient(app)
+    """Return a FastAPI test client, running app startup and shutdown once."""
+    with TestClient(app) as c:
+        yield c
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_audio_path():
     """Return the path to a test audio file."""
     return "tests/fixtures/tempo/120bpm_click.wav"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_audio_base64(test_audio_path):
-    """Return a base64-encoded test audio file."""
+    """Return a base64-encoded test audio file, read once per session."""
     with open(test_audio_path, "rb") as f:
         audio_data = f.read()
-        return base64.b64encode(audio_data).decode("utf-8")
+        return b64encode(audio_data).decode("ascii")
+
+
+@pytest.fixture(scope="session")
+def test_audio_bytes(test_audio_path):
+    """Return the raw bytes of the test audio file, read once per session."""
+    with open(test_audio_path, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def test_audio(test_audio_path):
+    """Return the decoded test audio and its sample rate, read once per session."""
+    audio, sr = sf.read(test_audio_path, dtype="float32", always_2d=False)
+    audio.flags.writeable = False
+    return audio, sr
 
 
 def test_health_endpoint(client):
@@ -50,28 +72,16 @@ def test_readiness_endpoint(client):
     assert "timestamp" in data
 
 
-def test_analyze_chords_endpoint(client, test_audio_base64):
-    """Test the analyze_chords endpoint with valid request data."""
-    request_data = {
-        "audio_data": test_audio_base64,
-        "format": "wav",
-        "options": {
-            "model": "basic"
-        }
-    }
-    
-    response = client.post("/analyze_chords", json=request_data)
-    assert response.status_code == 200
-    
-    # Extract the response data
-    data = response.json()
+def test_analyze_audio(test_audio):
+    """Test the analysis pipeline behind analyze_chords with valid audio."""
+    audio, sr = test_audio
+    data = asyncio.run(analyze_audio(audio, sr, "basic"))
     
     # Validate the structure of the response
     assert "schema_version" in data
     assert "chords" in data
     assert isinstance(data["chords"], list)
     assert "duration" in data
-    assert "correlation_id" in data
     
     # For the test audio (120bpm_click.wav), we expect tempo to be around 120
     assert "tempo" in data
@@ -82,13 +92,31 @@ def test_analyze_chords_endpoint(client, test_audio_base64):
     assert "sample_rate" in data["processing_info"]
     assert "processing_time" in data["processing_info"]
     assert "model_used" in data["processing_info"]
+
+
+def test_analyze_chords_endpoint(client, test_audio_base64, post_json):
+    """Test the analyze_chords endpoint wraps the analysis with a correlation ID."""
+    request_data = {
+        "audio_data": test_audio_base64,
+        "format": "wav",
+        "options": {
+            "model": "basic"
+        }
+    }
+    
+    response = post_json(client, "/analyze_chords", request_data)
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert "chords" in data
+    assert "correlation_id" in data
     
     # Verify the correlation ID is returned in the headers
     assert "X-Correlation-ID" in response.headers
     assert response.headers["X-Correlation-ID"] == data["correlation_id"]
 
 
-def test_analyze_chords_with_invalid_format(client, test_audio_base64):
+def test_analyze_chords_with_invalid_format(client, test_audio_base64, post_json):
     """Test analyze_chords endpoint with an invalid format."""
     request_data = {
         "audio_data": test_audio_base64,
@@ -96,7 +124,7 @@ def test_analyze_chords_with_invalid_format(client, test_audio_base64):
         "options": {}
     }
     
-    response = client.post("/analyze_chords", json=request_data)
+    response = post_json(client, "/analyze_chords", request_data)
     assert response.status_code == 400
     
     data = response.json()
@@ -105,7 +133,7 @@ def test_analyze_chords_with_invalid_format(client, test_audio_base64):
     assert "correlation_id" in data
 
 
-def test_analyze_chords_with_invalid_audio_data(client):
+def test_analyze_chords_with_invalid_audio_data(client, post_json):
     """Test analyze_chords endpoint with invalid audio data."""
     request_data = {
         "audio_data": "invalid_base64_data",
@@ -113,7 +141,7 @@ def test_analyze_chords_with_invalid_audio_data(client):
         "options": {}
     }
     
-    response = client.post("/analyze_chords", json=request_data)
+    response = post_json(client, "/analyze_chords", request_data)
     assert response.status_code == 400
     
     data = response.json()
@@ -122,24 +150,42 @@ def test_analyze_chords_with_invalid_audio_data(client):
     assert "correlation_id" in data
 
 
-def test_analyze_chords_with_advanced_model(client, test_audio_base64):
-    """Test analyze_chords endpoint with the advanced model."""
-    request_data = {
-        "audio_data": test_audio_base64,
-        "format": "wav",
-        "options": {
-            "model": "advanced"
-        }
-    }
-    
-    response = client.post("/analyze_chords", json=request_data)
+def test_analyze_chords_raw_endpoint(client, test_audio_bytes):
+    """Test the analyze_chords/raw endpoint with audio file bytes as the body."""
+    response = client.post(
+        "/analyze_chords/raw",
+        params={"format": "wav", "model": "basic"},
+        content=test_audio_bytes,
+        headers={"content-type": "application/octet-stream"},
+    )
     assert response.status_code == 200
     
     data = response.json()
+    assert "chords" in data
+    assert isinstance(data["chords"], list)
+    assert data["processing_info"]["model_used"] == "basic"
+    assert response.headers["X-Correlation-ID"] == data["correlation_id"]
+
+
+def test_analyze_chords_raw_with_invalid_format(client, test_audio_bytes):
+    """Test analyze_chords/raw rejects a format outside the request schema."""
+    response = client.post(
+        "/analyze_chords/raw",
+        params={"format": "invalid_format"},
+        content=test_audio_bytes,
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert response.status_code == 400
+
+
+def test_analyze_audio_with_advanced_model(test_audio):
+    """Test the analysis pipeline with the advanced model."""
+    audio, sr = test_audio
+    data = asyncio.run(analyze_audio(audio, sr, "advanced"))
     assert data["processing_info"]["model_used"] == "advanced"
 
 
-def test_correlation_id_propagation(client, test_audio_base64):
+def test_correlation_id_propagation(client, test_audio_base64, post_json):
     """Test that correlation ID is properly propagated in the response."""
     request_data = {
         "audio_data": test_audio_base64,
@@ -147,7 +193,7 @@ def test_correlation_id_propagation(client, test_audio_base64):
         "options": {}
     }
     
-    response = client.post("/analyze_chords", json=request_data)
+    response = post_json(client, "/analyze_chords", request_data)
     assert response.status_code == 200
     
     data = response.json()
@@ -155,7 +201,7 @@ def test_correlation_id_propagation(client, test_audio_base64):
     assert response.headers["X-Correlation-ID"] == data["correlation_id"]
 
 
-def test_response_headers(client, test_audio_base64):
+def test_response_headers(client, test_audio_base64, post_json):
     """Test that the response contains the expected headers."""
     request_data = {
         "audio_data": test_audio_base64,
@@ -163,7 +209,7 @@ def test_response_headers(client, test_audio_base64):
         "options": {}
     }
     
-    response = client.post("/analyze_chords", json=request_data)
+    response = post_json(client, "/analyze_chords", request_data)
     assert response.status_code == 200
     
     # Verify Content-Type header
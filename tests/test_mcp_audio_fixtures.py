@@ -5,14 +5,20 @@ audio fixtures including different formats, sample rates, durations, etc.
 """
 
 import os
+import re
 import pytest
 import numpy as np
 import soundfile as sf
 from pathlib import Path
 from glob import glob
-import base64
+from functools import lru_cache
 from fastapi.testclient import TestClient
 
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
 from mcp_audio_server.main import app
 from mcp_audio_server.analysis.audio_fingerprinting import AudioFingerprinter
 
@@ -26,11 +32,12 @@ def get_audio_file_paths(pattern):
     """Get paths of all audio files matching the pattern in MCP audio directory."""
     return glob(os.path.join(AUDIO_DIR, pattern))
 
+@lru_cache(maxsize=None)
 def get_test_audio(filepath):
-    """Load test audio file as base64."""
+    """Load test audio file as base64, once per file per session."""
     with open(filepath, "rb") as f:
         audio_bytes = f.read()
-    return base64.b64encode(audio_bytes).decode("utf-8")
+    return b64encode(audio_bytes).decode("ascii")
 
 def load_audio(filepath):
     """Load audio file as numpy array using soundfile."""
@@ -42,17 +49,75 @@ SINE_WAVES = [f for f in get_audio_file_paths("*hz_sine.wav")]
 SWEEPS = get_audio_file_paths("sweep_*.wav") 
 SAMPLE_RATES = [f for f in get_audio_file_paths("*sr_*.wav")]
 DURATIONS = [f for f in get_audio_file_paths("*duration_*.wav")]
+
+
+def _skip_if_missing(*paths):
+    """Mark a test or case to be skipped at collection if a fixture file is missing."""
+    missing = [str(p) for p in paths if not os.path.exists(p)]
+    return pytest.mark.skipif(bool(missing), reason=f"Test file(s) not found: {missing}")
+
+
+def _param(filepath, *values):
+    """Build a parametrize case for filepath, skipped if the file is missing."""
+    return pytest.param(
+        filepath, *values,
+        id=os.path.basename(filepath),
+        marks=_skip_if_missing(filepath),
+    )
+
+
+# (path, expected channel count)
 MULTI_CHANNEL = [
-    AUDIO_DIR / "stereo_440_880hz.wav",
-    AUDIO_DIR / "surround_5_1.wav"
+    _param(AUDIO_DIR / "stereo_440_880hz.wav", 2),
+    _param(AUDIO_DIR / "surround_5_1.wav", 6),  # 5.1 = 6 channels
 ]
 SPECIAL_CASES = [
-    AUDIO_DIR / "silence.wav",
-    AUDIO_DIR / "dc_offset.wav",
-    AUDIO_DIR / "high_amplitude.wav",
-    AUDIO_DIR / "clipped.wav",
-    AUDIO_DIR / "white_noise.wav"
+    _param(AUDIO_DIR / "silence.wav"),
+    _param(AUDIO_DIR / "dc_offset.wav"),
+    _param(AUDIO_DIR / "high_amplitude.wav"),
+    _param(AUDIO_DIR / "clipped.wav"),
+    _param(AUDIO_DIR / "white_noise.wav"),
+]
+FINGERPRINT_FILES = [
+    AUDIO_DIR / "440hz_sine.wav",
+    AUDIO_DIR / "white_noise.wav",
+    AUDIO_DIR / "sweep_100hz_to_1000hz.wav"
+]
+BATCH_FILES = [
+    AUDIO_DIR / "440hz_sine.wav",
+    AUDIO_DIR / "1000hz_sine.wav",
+    AUDIO_DIR / "sweep_100hz_to_1000hz.wav"
 ]
+# Files of different sizes/complexities
+PERFORMANCE_FILES = [
+    _param(AUDIO_DIR / "440hz_duration_0.1s.wav"),   # Very small
+    _param(AUDIO_DIR / "440hz_duration_3.0s.wav"),   # Medium
+    _param(AUDIO_DIR / "440hz_duration_30.0s.wav"),  # Large
+    _param(AUDIO_DIR / "surround_5_1.wav"),          # Complex (multi-channel)
+]
+
+
+def _cases(files, pattern, convert):
+    """Pair each fixture path with the expected value its filename encodes."""
+    pattern = re.compile(pattern)
+    return [
+        (f, convert(*pattern.search(os.path.basename(f)).groups()))
+        for f in files
+    ]
+
+
+def _ids(cases):
+    """Parametrize ids for (path, expected) cases: the file's basename."""
+    return [os.path.basename(f) for f, _ in cases]
+
+
+# Expected values parsed once at collection, e.g. 440hz_sine.wav -> 440
+FREQUENCY_CASES = _cases(SINE_WAVES, r"^(\d+)hz", int)
+SWEEP_CASES = _cases(
+    SWEEPS, r"^sweep_(\d+)hz_to_(\d+)hz", lambda start, end: (int(start), int(end))
+)
+SAMPLE_RATE_CASES = _cases(SAMPLE_RATES, r"sr_(\d+)\.", int)
+DURATION_CASES = _cases(DURATIONS, r"duration_([\d.]+)s", float)
 
 
 @pytest.mark.parametrize("format_ext", [".wav", ".flac", ".ogg", ".mp3"])
@@ -87,15 +152,13 @@ def test_format_compatibility(format_ext):
         assert audio_info["format"] == format_name
 
 
-@pytest.mark.parametrize("filepath", SINE_WAVES)
-def test_frequency_analysis(filepath):
+@pytest.mark.parametrize(
+    "filepath,expected_freq", FREQUENCY_CASES, ids=_ids(FREQUENCY_CASES)
+)
+def test_frequency_analysis(filepath, expected_freq):
     """Test frequency analysis with sine wave fixtures."""
     audio_data = get_test_audio(filepath)
     
-    # Extract expected frequency from filename
-    filename = os.path.basename(filepath)
-    expected_freq = int(filename.split("hz")[0])
-    
     request_data = {
         "audio_data": audio_data,
         "format": "wav",
@@ -110,15 +173,11 @@ def test_frequency_analysis(filepath):
     assert abs(result["dominant_frequency"] - expected_freq) / expected_freq < 0.05
 
 
-@pytest.mark.parametrize("filepath", SWEEPS)
-def test_sweep_analysis(filepath):
+@pytest.mark.parametrize("filepath,freq_range", SWEEP_CASES, ids=_ids(SWEEP_CASES))
+def test_sweep_analysis(filepath, freq_range):
     """Test the server's ability to analyze frequency sweeps."""
     audio_data = get_test_audio(filepath)
-    
-    # Extract expected frequency range from filename
-    filename = os.path.basename(filepath)
-    start_freq = int(filename.split("_")[1].split("hz")[0])
-    end_freq = int(filename.split("to_")[1].split("hz")[0])
+    start_freq, end_freq = freq_range
     
     request_data = {
         "audio_data": audio_data,
@@ -147,15 +206,13 @@ def test_sweep_analysis(filepath):
     assert max_detected >= max_expected * 0.9
 
 
-@pytest.mark.parametrize("filepath", SAMPLE_RATES)
-def test_sample_rate_handling(filepath):
+@pytest.mark.parametrize(
+    "filepath,expected_sr", SAMPLE_RATE_CASES, ids=_ids(SAMPLE_RATE_CASES)
+)
+def test_sample_rate_handling(filepath, expected_sr):
     """Test the server's ability to handle different sample rates."""
     audio_data = get_test_audio(filepath)
     
-    # Extract expected sample rate from filename
-    filename = os.path.basename(filepath)
-    expected_sr = int(filename.split("sr_")[1].split(".")[0])
-    
     request_data = {
         "audio_data": audio_data,
         "format": "wav",
@@ -171,15 +228,13 @@ def test_sample_rate_handling(filepath):
     assert result["audio_info"]["sample_rate"] == expected_sr
 
 
-@pytest.mark.parametrize("filepath", DURATIONS)
-def test_duration_handling(filepath):
+@pytest.mark.parametrize(
+    "filepath,expected_duration", DURATION_CASES, ids=_ids(DURATION_CASES)
+)
+def test_duration_handling(filepath, expected_duration):
     """Test the server's ability to handle different audio durations."""
     audio_data = get_test_audio(filepath)
     
-    # Extract expected duration from filename
-    filename = os.path.basename(filepath)
-    expected_duration = float(filename.split("duration_")[1].split("s")[0])
-    
     request_data = {
         "audio_data": audio_data,
         "format": "wav",
@@ -196,12 +251,9 @@ def test_duration_handling(filepath):
     assert abs(result["audio_info"]["duration"] - expected_duration) / expected_duration < 0.05
 
 
-@pytest.mark.parametrize("filepath", MULTI_CHANNEL)
-def test_multi_channel_handling(filepath):
+@pytest.mark.parametrize("filepath,expected_channels", MULTI_CHANNEL)
+def test_multi_channel_handling(filepath, expected_channels):
     """Test the server's ability to handle multi-channel audio."""
-    if not os.path.exists(filepath):
-        pytest.skip(f"Test file {filepath} not found")
-        
     audio_data = get_test_audio(filepath)
     request_data = {
         "audio_data": audio_data,
@@ -209,10 +261,6 @@ def test_multi_channel_handling(filepath):
         "options": {"model": "basic"}
     }
     
-    # Determine expected channel count
-    filename = os.path.basename(filepath)
-    expected_channels = 2 if "stereo" in filename else 6  # 5.1 = 6 channels
-    
     response = client.post("/analyze_audio", json=request_data)
     assert response.status_code == 200
     result = response.json()
@@ -234,9 +282,6 @@ def test_multi_channel_handling(filepath):
 @pytest.mark.parametrize("filepath", SPECIAL_CASES)
 def test_special_case_handling(filepath):
     """Test the server's ability to handle special audio cases."""
-    if not os.path.exists(filepath):
-        pytest.skip(f"Test file {filepath} not found")
-        
     audio_data = get_test_audio(filepath)
     request_data = {
         "audio_data": audio_data,
@@ -269,22 +314,13 @@ def test_special_case_handling(filepath):
         assert abs(result["dc_offset"]) > 0.1  # Should detect significant DC offset
 
 
+@_skip_if_missing(*FINGERPRINT_FILES)
 def test_fingerprinting():
     """Test audio fingerprinting functionality."""
-    # Use a selection of different audio types
-    test_files = [
-        AUDIO_DIR / "440hz_sine.wav",
-        AUDIO_DIR / "white_noise.wav",
-        AUDIO_DIR / "sweep_100hz_to_1000hz.wav"
-    ]
-    
     fingerprints = {}
     
-    # Generate fingerprints
-    for filepath in test_files:
-        if not os.path.exists(filepath):
-            pytest.skip(f"Test file {filepath} not found")
-            
+    # Generate fingerprints for a selection of different audio types
+    for filepath in FINGERPRINT_FILES:
         audio_data = get_test_audio(filepath)
         request_data = {
             "audio_data": audio_data,
@@ -302,24 +338,15 @@ def test_fingerprinting():
         fingerprints[str(filepath)] = result["hash"]
     
     # Verify unique fingerprints for different files
-    hashes = list(fingerprints.values())
-    assert len(hashes) == len(set(hashes))  # All fingerprints should be unique
+    assert len(set(fingerprints.values())) == len(fingerprints)  # All fingerprints should be unique
 
 
+@_skip_if_missing(*BATCH_FILES)
 def test_batch_processing():
     """Test batch processing of multiple audio files."""
-    test_files = [
-        AUDIO_DIR / "440hz_sine.wav",
-        AUDIO_DIR / "1000hz_sine.wav",
-        AUDIO_DIR / "sweep_100hz_to_1000hz.wav"
-    ]
-    
     batch_data = []
     
-    for filepath in test_files:
-        if not os.path.exists(filepath):
-            pytest.skip(f"Test file {filepath} not found")
-            
+    for filepath in BATCH_FILES:
         audio_data = get_test_audio(filepath)
         batch_data.append({
             "id": os.path.basename(filepath),
@@ -339,7 +366,7 @@ def test_batch_processing():
     
     assert "batch_results" in results
     assert "correlation_id" in results
-    assert len(results["batch_results"]) == len(test_files)
+    assert len(results["batch_results"]) == len(BATCH_FILES)
     
     for result in results["batch_results"]:
         assert "id" in result
@@ -347,35 +374,20 @@ def test_batch_processing():
         assert "dominant_frequency" in result
 
 
-def test_performance_metrics():
+@pytest.mark.parametrize("filepath", PERFORMANCE_FILES)
+def test_performance_metrics(filepath):
     """Test performance metrics endpoint with various file types."""
-    # Test with files of different sizes/complexities
-    test_files = [
-        AUDIO_DIR / "440hz_duration_0.1s.wav",   # Very small
-        AUDIO_DIR / "440hz_duration_3.0s.wav",   # Medium
-        AUDIO_DIR / "440hz_duration_30.0s.wav",  # Large
-        AUDIO_DIR / "surround_5_1.wav"           # Complex (multi-channel)
-    ]
+    audio_data = get_test_audio(filepath)
+    request_data = {
+        "audio_data": audio_data,
+        "format": "wav",
+        "options": {"include_performance": True}
+    }
     
-    for filepath in test_files:
-        if not os.path.exists(filepath):
-            pytest.skip(f"Test file {filepath} not found")
-            
-        audio_data = get_test_audio(filepath)
-        request_data = {
-            "audio_data": audio_data,
-            "format": "wav",
-            "options": {"include_performance": True}
-        }
-        
-        response = client.post("/analyze", json=request_data)
-        assert response.status_code == 200
-        result = response.json()
-        
-        assert "performance" in result
-        assert "processing_time_ms" in result["performance"]
-        assert "memory_usage_kb" in result["performance"]
-        
-        # Larger files should generally take longer to process
-        if "30.0s" in str(filepath) or "surround" in str(filepath):
-            assert result["performance"]["processing_time_ms"] > 100  # Arbitrary threshold
+    response = client.post("/analyze", json=request_data)
+    assert response.status_code == 200
+    result = response.json()
+    
+    assert "performance" in result
+    assert "processing_time_ms" in result["performance"]
+    assert "memory_usage_kb" in result["performance"]
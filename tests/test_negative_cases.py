@@ -1,45 +1,68 @@
 """Tests for negative cases that intentionally violate limits and constraints."""
 
-import base64
 import os
+import struct
 import pytest
 import numpy as np
 from fastapi.testclient import TestClient
 
+try:
+    from pybase64 import b64encode  # SIMD codec; the oversized WAV is ~5 MB of base64
+except ImportError:
+    from base64 import b64encode
+
 from mcp_audio_server.main import app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Return a FastAPI test client."""
-    return TestClient(app)
+    """Return a FastAPI test client, running app startup and shutdown once."""
+    with TestClient(app) as c:
+        yield c
+
+
+def _wav_header(num_samples, sample_rate, channels=1, bits=16):
+    """Return the 44-byte header of a PCM WAV file."""
+    block_align = channels * bits // 8
+    data_size = num_samples * block_align
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align,
+        block_align, bits,
+        b'data', data_size,
+    )
+
+
+def _wav_base64(pcm, sample_rate):
+    """Wrap mono int16 samples in a WAV header and return it base64-encoded."""
+    wav = _wav_header(len(pcm), sample_rate) + pcm.tobytes()
+    return b64encode(wav).decode('ascii')
+
 
+@pytest.fixture(scope="session")
+def oversized_wav_base64():
+    """Return a base64 WAV too large to analyze, built once per session."""
+    # 10 seconds at a very high sample rate. The limit is on size, not
+    # content, so the samples are silence with a short noise tail.
+    sample_rate = 192000
+    num_samples = sample_rate * 10
+    large_audio = np.zeros(num_samples, dtype=np.int16)
+    rng = np.random.default_rng(0)
+    large_audio[-1000:] = rng.integers(-32768, 32768, 1000)
+    return _wav_base64(large_audio, sample_rate)
 
-def test_file_too_large(client):
+
+@pytest.fixture(scope="session")
+def small_wav_base64():
+    """Return a valid but small base64 WAV, built once per session."""
+    return _wav_base64(np.zeros(1000, dtype=np.int16), 44100)
+
+
+def test_file_too_large(client, oversized_wav_base64):
     """Test handling of audio files that are too large."""
-    # Generate a large audio file (10 seconds of random noise at high sample rate)
-    sample_rate = 192000  # Very high sample rate
-    duration = 10  # 10 seconds
-    num_samples = sample_rate * duration
-    
-    # Create random noise (this will be a large file when encoded)
-    large_audio = np.random.uniform(-1, 1, num_samples).astype(np.float32)
-    
-    # Convert to bytes
-    import io
-    import soundfile as sf
-    
-    buffer = io.BytesIO()
-    sf.write(buffer, large_audio, sample_rate, format='WAV')
-    buffer.seek(0)
-    audio_bytes = buffer.read()
-    
-    # Encode as base64
-    audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-    
-    # Create the request
     request_data = {
-        "audio_data": audio_base64,
+        "audio_data": oversized_wav_base64,
         "format": "wav",
         "options": {}
     }
@@ -56,7 +79,7 @@ def test_wrong_mime_type(client):
     """Test handling of files with incorrect MIME types."""
     # Create a fake "audio" file that is actually a text file
     fake_audio = "This is not an audio file, just some text.".encode('utf-8')
-    fake_audio_base64 = base64.b64encode(fake_audio).decode('utf-8')
+    fake_audio_base64 = b64encode(fake_audio).decode('ascii')
     
     # Create the request
     request_data = {
@@ -97,7 +120,7 @@ def test_corrupted_audio(client):
     corrupted_audio = wav_header + corrupted_data
     
     # Encode as base64
-    corrupted_base64 = base64.b64encode(corrupted_audio).decode('utf-8')
+    corrupted_base64 = b64encode(corrupted_audio).decode('ascii')
     
     # Create the request
     request_data = {
@@ -118,7 +141,7 @@ def test_empty_audio(client):
     """Test handling of empty audio files."""
     # Create an empty audio file
     empty_audio = bytes()
-    empty_base64 = base64.b64encode(empty_audio).decode('utf-8')
+    empty_base64 = b64encode(empty_audio).decode('ascii')
     
     # Create the request
     request_data = {
@@ -153,26 +176,11 @@ def test_missing_required_field(client):
     assert "detail" in data
 
 
-def test_invalid_model_option(client):
+def test_invalid_model_option(client, small_wav_base64):
     """Test handling of requests with invalid model options."""
-    # Create a valid but small audio file
-    audio_data = np.zeros(1000, dtype=np.float32)
-    
-    # Convert to bytes
-    import io
-    import soundfile as sf
-    
-    buffer = io.BytesIO()
-    sf.write(buffer, audio_data, 44100, format='WAV')
-    buffer.seek(0)
-    audio_bytes = buffer.read()
-    
-    # Encode as base64
-    audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-    
     # Create the request with an invalid model option
     request_data = {
-        "audio_data": audio_base64,
+        "audio_data": small_wav_base64,
         "format": "wav",
         "options": {
             "model": "non_existent_model"
@@ -0,0 +1,124 @@
+"""Tests for the versioned schema loader."""
+
+import json
+import os
+
+import pytest
+
+from mcp_audio_server.utils import schema_loader
+
+
+@pytest.fixture
+def schema_dir(tmp_path, monkeypatch):
+    """Point the loader at a throwaway schema directory with one schema."""
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v1" / "thing.schema.json").write_text(json.dumps({"type": "object"}))
+    index = {
+        "current_version": "1.0.0",
+        "schemas": {"1.0.0": {"thing": "v1/thing.schema.json"}},
+    }
+    (tmp_path / "index.json").write_text(json.dumps(index))
+
+    monkeypatch.setattr(schema_loader, "SCHEMA_DIR", str(tmp_path))
+    monkeypatch.setattr(schema_loader, "INDEX_PATH", str(tmp_path / "index.json"))
+    monkeypatch.setattr(schema_loader, "_index_cache", None)
+    monkeypatch.setattr(schema_loader, "_schema_cache", {})
+    monkeypatch.setattr(schema_loader, "_missing_schemas", set())
+    monkeypatch.setattr(schema_loader, "_supported_versions", None)
+    monkeypatch.setattr(schema_loader, "_schema_by_digest", {})
+    return tmp_path
+
+
+def test_load_schema_is_cached(schema_dir):
+    """Test that repeated loads return the cached schema without re-reading it."""
+    first = schema_loader.load_schema("thing")
+    (schema_dir / "v1" / "thing.schema.json").write_text("not json")
+
+    assert schema_loader.load_schema("thing") is first
+    assert schema_loader.load_schema("thing", "1.0.0") is first
+
+
+def test_index_change_reloads_schemas(schema_dir):
+    """Test that a modified index is re-read and drops cached schemas."""
+    first = schema_loader.load_schema("thing")
+    (schema_dir / "v1" / "thing.schema.json").write_text(json.dumps({"type": "array"}))
+    index_path = schema_dir / "index.json"
+    stat = index_path.stat()
+    os.utime(index_path, (stat.st_atime, stat.st_mtime + 10))
+
+    reloaded = schema_loader.load_schema("thing")
+
+    assert reloaded is not first
+    assert reloaded == {"type": "array"}
+
+
+def test_get_version_summary_reads_only_the_index(schema_dir):
+    """Test that version metadata comes from the index, not the schema files."""
+    index = json.loads((schema_dir / "index.json").read_text())
+    index["version_history"] = [{"version": "1.0.0", "deprecated": False}]
+    (schema_dir / "index.json").write_text(json.dumps(index))
+    (schema_dir / "v1" / "thing.schema.json").unlink()
+
+    assert schema_loader.get_version_summary("1.0.0") == {
+        "version": "1.0.0",
+        "deprecated": False,
+    }
+    assert schema_loader.get_version_summary("9.9.9") is None
+
+
+def test_identical_schemas_are_shared_across_versions(schema_dir):
+    """Test that versions shipping the same schema bytes share one dict."""
+    (schema_dir / "v2").mkdir()
+    (schema_dir / "v2" / "thing.schema.json").write_bytes(
+        (schema_dir / "v1" / "thing.schema.json").read_bytes()
+    )
+    index = json.loads((schema_dir / "index.json").read_text())
+    index["schemas"]["2.0.0"] = {"thing": "v2/thing.schema.json"}
+    (schema_dir / "index.json").write_text(json.dumps(index))
+
+    assert schema_loader.load_schema("thing", "2.0.0") is schema_loader.load_schema("thing", "1.0.0")
+
+
+def test_missing_schema_file_is_remembered(schema_dir):
+    """Test that a missing schema file is reported without re-checking the disk."""
+    schema_file = schema_dir / "v1" / "thing.schema.json"
+    contents = schema_file.read_bytes()
+    schema_file.unlink()
+
+    with pytest.raises(ValueError, match="Schema file not found"):
+        schema_loader.load_schema("thing")
+
+    # Restoring the file has no effect until the index changes
+    schema_file.write_bytes(contents)
+    with pytest.raises(ValueError, match="Schema file not found"):
+        schema_loader.load_schema("thing")
+
+    index_path = schema_dir / "index.json"
+    stat = index_path.stat()
+    os.utime(index_path, (stat.st_atime, stat.st_mtime + 10))
+    assert schema_loader.load_schema("thing") == {"type": "object"}
+
+
+def test_version_accessors_follow_index(schema_dir):
+    """Test that version lookups reuse the parsed index until it changes."""
+    index_path = schema_dir / "index.json"
+    index = json.loads(index_path.read_text())
+    index["version_history"] = [
+        {"version": "0.9.0", "deprecated": True},
+        {"version": "1.0.0"},
+    ]
+    index_path.write_text(json.dumps(index))
+
+    supported = schema_loader.get_supported_versions()
+    assert list(supported) == ["1.0.0"]
+    assert schema_loader.get_supported_versions() is supported
+    assert schema_loader.get_current_version() == "1.0.0"
+
+    index["current_version"] = "2.0.0"
+    index["version_history"].append({"version": "2.0.0"})
+    index_path.write_text(json.dumps(index))
+    stat = index_path.stat()
+    os.utime(index_path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert list(schema_loader.get_supported_versions()) == ["1.0.0", "2.0.0"]
+    assert schema_loader.get_current_version() == "2.0.0"
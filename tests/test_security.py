@@ -0,0 +1,99 @@
+"""Tests for security and file-handling utilities."""
+
+import os
+import stat
+
+import pytest
+
+from mcp_audio_server import security
+
+
+@pytest.mark.parametrize("header,expected", [
+    (b"RIFF\x24\x08\x00\x00WAVEfmt ", "audio/wav"),
+    (b"ID3\x04\x00\x00\x00\x00\x00\x22TS", "audio/mpeg"),
+    (b"\xff\xfb\x90\x64\x00\x00\x00\x00", "audio/mpeg"),
+    (b"OggS\x00\x02\x00\x00\x00\x00\x00\x00", "audio/ogg"),
+    (b"fLaC\x00\x00\x00\x22\x10\x00\x10\x00", "audio/flac"),
+    (b"\xff\xf1\x50\x80\x02\x1f\xfc", "audio/aac"),
+    (b"RIFF\x24\x08\x00\x00AVI LIST", None),
+    (b"This is not", None),
+    (b"", None),
+])
+def test_sniff_audio_mime(header, expected):
+    """Test that known audio containers are recognised from their header."""
+    assert security._sniff_audio_mime(header) == expected
+
+
+def test_validate_file_type_sniffs_without_libmagic(tmp_path, monkeypatch):
+    """Test that audio files validate, and others are rejected, without libmagic."""
+    monkeypatch.setattr(security, "MAGIC_AVAILABLE", False)
+    audio = tmp_path / "a.ogg"
+    audio.write_bytes(b"OggS" + bytes(60))
+    text = tmp_path / "a.wav"
+    text.write_bytes(b"This is not an audio file")
+
+    assert security.validate_file_type(str(audio)) == (True, "audio/ogg")
+    assert security.validate_file_type(str(text)) == (False, "unknown")
+    assert security.validate_buffer_type(b"fLaC" + bytes(60)) == (True, "audio/flac")
+
+
+def test_validate_file_type_extension_fast_path(tmp_path):
+    """Test that non-strict checks trust known extensions without reading the file."""
+    missing = tmp_path / "missing.WAV"
+    assert security.validate_file_type(str(missing), strict=False) == (True, "audio/wav")
+    assert security.validate_file_type(str(missing)) == (False, "unknown")
+
+    # Unknown extensions still fall back to the header sniff
+    audio = tmp_path / "clip.bin"
+    audio.write_bytes(b"OggS" + bytes(60))
+    assert security.validate_file_type(str(audio), strict=False) == (True, "audio/ogg")
+
+
+@pytest.mark.parametrize("filename,expected", [
+    ("take_01.wav", True),
+    ("Mix-2.final.flac", True),
+    ("", False),
+    ("../etc/passwd", False),
+    ("/abs.wav", False),
+    ("a b.wav", False),
+    ("clip.wav\n", False),
+])
+def test_validate_filename(filename, expected):
+    """Test that only plain names from the allowed character set pass."""
+    assert security.validate_filename(filename) is expected
+
+
+def test_secure_temp_file(tmp_path, monkeypatch):
+    """Test that temp files are owner-only, named on disk, and removed on exit."""
+    monkeypatch.setattr(security.SecureTempFile, "_TEMP_DIR", str(tmp_path))
+    with security.SecureTempFile(suffix=".wav") as handle:
+        handle.write(b"RIFF")
+        handle.flush()
+        assert handle.name.startswith(str(tmp_path))
+        assert handle.name.endswith(".wav")
+        assert stat.S_IMODE(os.stat(handle.name).st_mode) == 0o600
+        path = handle.name
+    assert not os.path.exists(path)
+
+
+def test_sweep_stale_temp_files(tmp_path, monkeypatch):
+    """Test that only old files with the server's prefix are swept."""
+    monkeypatch.setattr(security, "_temp_dir_swept", False)
+    stale = tmp_path / "mcp_old.wav"
+    fresh = tmp_path / "mcp_new.wav"
+    foreign = tmp_path / "other.wav"
+    for path in (stale, fresh, foreign):
+        path.write_bytes(b"x")
+    old = os.stat(stale).st_mtime - 2 * security.TEMP_FILE_TTL
+    os.utime(stale, (old, old))
+    os.utime(foreign, (old, old))
+
+    security._sweep_stale_temp_files(tmp_path)
+    assert not stale.exists()
+    assert fresh.exists() and foreign.exists()
+
+    # A second sweep in the same process is a no-op
+    fresh.touch()
+    os.utime(fresh, (old, old))
+    security._sweep_stale_temp_files(tmp_path)
+    assert fresh.exists()